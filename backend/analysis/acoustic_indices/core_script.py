@@ -13,7 +13,7 @@ from scipy.stats import entropy
 def extract_metadata_from_filename(filename):
     """Extracts date and time info from the standard filename format."""
     match_date = re.search(r'_(\d{8})_', filename)
-    match_time = re.search(r'_(\d{6})\.wav$', filename)
+    match_time = re.search(r'_(\d{6})\.(?:wav|flac)$', filename)
     if match_time and match_date:
         time_str = match_time.group(1)
         date_str = match_date.group(1)
@@ -114,7 +114,7 @@ def main(args):
             for j, segment in enumerate(segments):
                 ADI, ACI, AEI, NDSI, MFC, CLS = compute_acoustic_indices(segment, sr)
                 results_data.append({
-                    "Filename": filename, "Segment": j + 1,
+                    "Filename": filename, "Filepath": filepath, "Segment": j + 1,
                     "Year": year, "Month": month, "Date": date, "Hour": hour, "Minute": minute,
                     "ADI": ADI, "ACI": ACI, "AEI": AEI, "NDSI": NDSI, "MFC": MFC, "CLS": CLS
                 })
@@ -140,7 +140,7 @@ def main(args):
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="Calculate acoustic indices from audio files.")
     
-    parser.add_argument('--input-files', nargs='+', required=True, help="One or more paths to input audio WAV files.")
+    parser.add_argument('--input-files', nargs='+', required=True, help="One or more paths to input audio WAV or FLAC files.")
     parser.add_argument('--output-file', type=str, required=True, help="Path to save the output CSV file.")
     parser.add_argument('--noise-file', type=str, required=True, help="Path to the static noise reference WAV file.")
     
@@ -5,6 +5,9 @@ from pathlib import Path
 import os            # <-- ADD THIS
 from glob import glob  # <-- ADD THIS
 
+# Recordings archived to FLAC keep their name apart from the extension.
+AUDIO_EXTENSIONS = ('.wav', '.flac')
+
 def main():
     """
     This wrapper script acts as the bridge between the FastAPI backend and core_script.py.
@@ -35,18 +38,20 @@ def main():
     for source_path_str in input_sources:
         # We need the full absolute path for glob to work correctly
         full_source_path = str(Path(source_path_str).resolve()) 
+        if not os.path.exists(full_source_path) and os.path.isfile(str(Path(full_source_path).with_suffix('.flac'))):
+            full_source_path = str(Path(full_source_path).with_suffix('.flac'))
         
         if os.path.isdir(full_source_path):
-            # It's a directory, find all .wav files inside, recursively
-            search_pattern = os.path.join(full_source_path, "**", "*.wav")
-            wav_files = glob(search_pattern, recursive=True)
-            expanded_input_files.extend(wav_files)
-        elif os.path.isfile(full_source_path) and full_source_path.lower().endswith('.wav'):
+            # It's a directory, find all recordings inside, recursively
+            for extension in AUDIO_EXTENSIONS:
+                search_pattern = os.path.join(full_source_path, "**", "*" + extension)
+                expanded_input_files.extend(glob(search_pattern, recursive=True))
+        elif os.path.isfile(full_source_path) and full_source_path.lower().endswith(AUDIO_EXTENSIONS):
             # It's a single file (for backward compatibility, though UI won't do this)
             expanded_input_files.append(full_source_path)
 
     if not expanded_input_files:
-        print("Error: No .wav files found in the selected directories.", file=sys.stderr)
+        print("Error: No .wav or .flac files found in the selected directories.", file=sys.stderr)
         sys.exit(1) # Fail fast
     # --- END NEW LOGIC ---
 
@@ -57,17 +62,11 @@ def main():
         str(core_script_path),
         '--output-file', payload['output_file'],
         '--noise-file', str(noise_file_path),  
-        '--input-files', *expanded_input_files # <-- USE THE EXPANDED LIST
+        '--input-files', *expanded_input_files, # <-- USE THE EXPANDED LIST
+        # Built from the manifest by the script registry when the job was created.
+        *payload.get('arguments', {}).get('main', []),
     ]
 
-    # Add optional parameters from the payload if they exist
-    parameters = payload.get('parameters', {})
-    for key, value in parameters.items():
-        if value is not None:
-            # Converts snake_case (e.g., segment_duration) to kebab-case (--segment-duration)
-            arg_name = '--' + key.replace('_', '-')
-            command.extend([arg_name, str(value)])
-
     # --- Execute the Command ---
     print(f"Wrapper: Executing command...\n{' '.join(command)}\n")
     
@@ -7,6 +7,7 @@ import numpy as np
 import pandas as pd
 import soundfile as sf
 import tensorflow as tf
+from scipy.signal import butter, sosfilt
 from birdnetlib import Recording
 from birdnetlib.analyzer import Analyzer
 import argparse
@@ -14,6 +15,9 @@ import argparse
 # --- Configuration ---
 TARGET_SR = 48000
 SNR_DB = 18
+WINDOW_SECONDS = 3.0 # BirdNET analyses non-overlapping 3 s chunks
+GATE_BAND_HZ = (1000, 10000) # Where most bird vocalisation energy sits
+GATE_FLOOR_PERCENTILE = 10
 
 # --- Helper Functions ---
 
@@ -39,7 +43,7 @@ def extract_datetime_components(filename):
     """Extracts date and time from the standard filename format."""
     basename = os.path.basename(filename)
     match_date = re.search(r'_(\d{8})_', basename)
-    match_time = re.search(r'_(\d{6})\.wav$', basename)
+    match_time = re.search(r'_(\d{6})\.(?:wav|flac)$', basename)
     if match_time and match_date:
         time_str = match_time.group(1)
         date_str = match_date.group(1)
@@ -51,10 +55,51 @@ def extract_datetime_components(filename):
         return year, month, day, hour, minute
     return None, None, None, None, None
 
-def analyze_bird_audio(audio_path, noise_clip, analyzer, lat, lon, min_conf):
+def window_band_energy(audio, sr=TARGET_SR, window_seconds=WINDOW_SECONDS):
+    """
+    Band-limited energy (dB) of each BirdNET window, from one bandpass filter
+    pass and a reshape, with the final partial window zero-padded.
+    """
+    window = int(window_seconds * sr)
+    n_windows = int(np.ceil(len(audio) / window))
+    sos = butter(4, GATE_BAND_HZ, btype='bandpass', fs=sr, output='sos')
+    band = sosfilt(sos, audio)
+    band = np.pad(band, (0, n_windows * window - len(band)))
+    power = np.mean(band.reshape(n_windows, window) ** 2, axis=1)
+    return 10 * np.log10(power + 1e-12)
+
+def select_windows(energy_db, margin_db, keep_db, neighbors):
+    """
+    Adaptive gate: a window is analysed if it rises `margin_db` above the
+    file's noise floor (a low percentile of window energies) or is louder
+    than `keep_db` outright, so uniformly busy recordings are never gated out.
+    Neighbours of selected windows are kept for calls crossing a boundary.
+    Returns (keep mask, threshold in dB).
+    """
+    noise_floor = np.percentile(energy_db, GATE_FLOOR_PERCENTILE)
+    threshold = min(noise_floor + margin_db, keep_db)
+    selected = energy_db >= threshold
+    keep = selected.copy()
+    for shift in range(1, neighbors + 1):
+        keep[:-shift] |= selected[shift:]
+        keep[shift:] |= selected[:-shift]
+    return keep, threshold
+
+def ungate_times(df, kept_windows):
+    """Maps start/end times in the gated audio back to the original file: chunk k is window kept_windows[k]."""
+    chunk = np.round(df["start_time"].to_numpy() / WINDOW_SECONDS).astype(int)
+    offset = kept_windows[chunk] * WINDOW_SECONDS - chunk * WINDOW_SECONDS
+    df["start_time"] += offset
+    df["end_time"] += offset
+
+def analyze_bird_audio(audio_path, noise_clip, analyzer, lat, lon, min_conf, gate=None, embeddings=False):
     """
     Loads, denoises, and analyzes a single audio file with BirdNET.
-    Returns a DataFrame of detections.
+    With `gate` (margin_db, keep_db, neighbors), only windows passing the
+    energy gate are sent to the model; their detections are mapped back to
+    times in the original file. With `embeddings`, the model's feature
+    vector for each analysed window is extracted as well.
+    Returns DataFrames of detections, per-window gate decisions and embeddings.
     """
     audio_raw, orig_sr = librosa.load(audio_path, sr=None)
     
@@ -63,6 +108,25 @@ def analyze_bird_audio(audio_path, noise_clip, analyzer, lat, lon, min_conf):
     
     final_sound = remove_static_noise(audio_raw, noise_clip, sr=TARGET_SR, snr_db=SNR_DB)
 
+    windows_df = pd.DataFrame()
+    kept_windows = None
+    if gate is not None:
+        window = int(WINDOW_SECONDS * TARGET_SR)
+        energy_db = window_band_energy(final_sound)
+        keep, threshold = select_windows(energy_db, *gate)
+        windows_df = pd.DataFrame({
+            "window_start": np.arange(len(keep)) * WINDOW_SECONDS,
+            "window_end": (np.arange(len(keep)) + 1) * WINDOW_SECONDS,
+            "band_energy_db": energy_db,
+            "threshold_db": threshold,
+            "analysed": keep,
+        })
+        kept_windows = np.flatnonzero(keep)
+        if len(kept_windows) == 0:
+            return pd.DataFrame(), windows_df, pd.DataFrame()
+        padded = np.pad(final_sound, (0, len(keep) * window - len(final_sound)))
+        final_sound = padded.reshape(len(keep), window)[kept_windows].ravel()
+
     with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmpfile:
         sf.write(tmpfile.name, final_sound, samplerate=TARGET_SR)
         tmp_audio_path = tmpfile.name
@@ -76,7 +140,17 @@ def analyze_bird_audio(audio_path, noise_clip, analyzer, lat, lon, min_conf):
             min_conf=min_conf,
         )
         recording.analyze()
-        return pd.DataFrame(recording.detections)
+        detections_df = pd.DataFrame(recording.detections)
+        if kept_windows is not None and not detections_df.empty:
+            ungate_times(detections_df, kept_windows)
+
+        embeddings_df = pd.DataFrame()
+        if embeddings:
+            recording.extract_embeddings()
+            embeddings_df = pd.DataFrame(recording.embeddings)
+            if kept_windows is not None and not embeddings_df.empty:
+                ungate_times(embeddings_df, kept_windows)
+        return detections_df, windows_df, embeddings_df
     finally:
         os.remove(tmp_audio_path)
 
@@ -84,12 +158,17 @@ def analyze_bird_audio(audio_path, noise_clip, analyzer, lat, lon, min_conf):
 
 def main():
     parser = argparse.ArgumentParser(description="Run BirdNET analysis on a list of audio files.")
-    parser.add_argument('--input-files', nargs='+', required=True, help="List of .wav file paths to analyze.")
+    parser.add_argument('--input-files', nargs='+', required=True, help="List of .wav or .flac file paths to analyze.")
     parser.add_argument('--output-file', type=str, required=True, help="Path to save the combined CSV output.")
     parser.add_argument('--static-noise-file', type=str, required=True, help="Path to the static noise .wav file.")
     parser.add_argument('--lat', type=float, required=True, help="Latitude for analysis.")
     parser.add_argument('--lon', type=float, required=True, help="Longitude for analysis.")
     parser.add_argument('--min-confidence', type=float, default=0.5, help="Minimum confidence threshold.")
+    parser.add_argument('--energy-gate', action='store_true', help="Only run BirdNET on 3 s windows with energy in the bird band.")
+    parser.add_argument('--gate-margin-db', type=float, default=6.0, help="dB above the file's noise floor a window needs to be analysed.")
+    parser.add_argument('--gate-keep-db', type=float, default=-50.0, help="Windows with band energy above this (dBFS) are always analysed.")
+    parser.add_argument('--gate-neighbors', type=int, default=1, help="Also analyse this many windows either side of a selected window.")
+    parser.add_argument('--embeddings', action='store_true', help="Also save BirdNET's feature embedding for every analysed window.")
     
     args = parser.parse_args()
 
@@ -103,7 +182,10 @@ def main():
         print(f"FATAL ERROR: Could not load noise file. {e}", file=sys.stderr)
         sys.exit(1)
 
+    gate = (args.gate_margin_db, args.gate_keep_db, args.gate_neighbors) if args.energy_gate else None
     all_detections = []
+    all_windows = []
+    all_embeddings = []
     print(f"--- Processing {len(args.input_files)} file(s) ---")
 
     for filepath in args.input_files:
@@ -114,10 +196,23 @@ def main():
             continue
 
         try:
-            detections_df = analyze_bird_audio(filepath, noise_clip, analyzer, args.lat, args.lon, args.min_confidence)
+            detections_df, windows_df, embeddings_df = analyze_bird_audio(
+                filepath, noise_clip, analyzer, args.lat, args.lon, args.min_confidence, gate, args.embeddings
+            )
+
+            if not embeddings_df.empty:
+                embeddings_df.insert(0, "filepath", filepath)
+                embeddings_df.insert(0, "filename", fname)
+                all_embeddings.append(embeddings_df)
+
+            if not windows_df.empty:
+                windows_df.insert(0, "filename", fname)
+                all_windows.append(windows_df)
+                print(f"  Energy gate: analysing {int(windows_df['analysed'].sum())} of {len(windows_df)} windows")
 
             if not detections_df.empty:
                 detections_df["filename"] = fname
+                detections_df["filepath"] = filepath
                 detections_df["year"] = year
                 detections_df["month"] = month
                 detections_df["day"] = day
@@ -130,6 +225,23 @@ def main():
         except Exception as e:
             print(f"  ERROR processing {fname}: {e}", file=sys.stderr)
 
+    if all_windows:
+        windows_path = os.path.splitext(args.output_file)[0] + "_windows.csv"
+        windows_df = pd.concat(all_windows, ignore_index=True)
+        windows_df.to_csv(windows_path, index=False)
+        skipped = int((~windows_df["analysed"]).sum())
+        print(f"--- Energy gate skipped {skipped} of {len(windows_df)} windows; decisions saved to: {windows_path} ---")
+
+    if all_embeddings:
+        # Vectors go to a float16 .npy (row i matches row i of the CSV); the
+        # server appends them to its similarity index when the job completes.
+        embeddings_df = pd.concat(all_embeddings, ignore_index=True)
+        base = os.path.splitext(args.output_file)[0]
+        vectors = np.asarray(embeddings_df.pop("embeddings").tolist(), dtype=np.float16)
+        np.save(base + "_embeddings.npy", vectors)
+        embeddings_df.to_csv(base + "_embeddings.csv", index=False)
+        print(f"--- Saved {len(vectors)} window embeddings to: {base}_embeddings.npy ---")
+
     if all_detections:
         final_df = pd.concat(all_detections, ignore_index=True)
         final_df.to_csv(args.output_file, index=False)
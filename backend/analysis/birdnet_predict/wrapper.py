@@ -5,6 +5,9 @@ from pathlib import Path
 import os
 from glob import glob
 
+# Recordings archived to FLAC keep their name apart from the extension.
+AUDIO_EXTENSIONS = ('.wav', '.flac')
+
 def main():
     if len(sys.argv) < 2:
         print("Error: Path to payload.json not provided.", file=sys.stderr)
@@ -33,16 +36,18 @@ def main():
     expanded_input_files = []
     for source_path_str in input_sources:
         source_path = Path(source_path_str)
+        if not source_path.exists() and source_path.with_suffix('.flac').is_file():
+            source_path = source_path.with_suffix('.flac')
         if source_path.is_dir():
-            # It's a directory, find all .wav files inside
-            wav_files = glob(os.path.join(source_path, "**", "*.wav"), recursive=True)
-            expanded_input_files.extend(wav_files)
-        elif source_path.is_file() and source_path.name.lower().endswith('.wav'):
+            # It's a directory, find all recordings inside
+            for extension in AUDIO_EXTENSIONS:
+                expanded_input_files.extend(glob(os.path.join(source_path, "**", "*" + extension), recursive=True))
+        elif source_path.is_file() and source_path.name.lower().endswith(AUDIO_EXTENSIONS):
             # It's a single file, just add it
             expanded_input_files.append(str(source_path))
 
     if not expanded_input_files:
-        print("Error: No .wav files found in the selected directories.", file=sys.stderr)
+        print("Error: No .wav or .flac files found in the selected directories.", file=sys.stderr)
         sys.exit(1)
     # --- END NEW LOGIC ---
 
@@ -54,8 +59,9 @@ def main():
         '--static-noise-file', str(noise_file_path),
         '--lat', "28.53",  # Hardcoded for now, could be a parameter
         '--lon', "77.18",  # Hardcoded for now, could be a parameter
-        '--min-confidence', str(payload.get('parameters', {}).get('min_confidence', 0.5)),
-        '--input-files', *expanded_input_files
+        '--input-files', *expanded_input_files,
+        # Built from the manifest by the script registry when the job was created.
+        *payload.get('arguments', {}).get('main', []),
     ]
 
     # --- Execute the Command ---
@@ -6,6 +6,9 @@ import tempfile
 import os
 from glob import glob  # <-- Make sure this import is here
 
+# Recordings archived to FLAC keep their name apart from the extension.
+AUDIO_EXTENSIONS = ('.wav', '.flac')
+
 def run_subprocess(command, job_dir):
     """Helper function to run a subprocess and print output."""
     stdout_path = job_dir / f"{Path(command[2]).stem}_stdout.log"
@@ -42,7 +45,8 @@ def main():
         payload = json.load(f)
 
     job_dir = payload_path.parent
-    parameters = payload.get('parameters', {})
+    # Built from the manifest by the script registry when the job was created.
+    arguments = payload.get('arguments', {})
     
     # --- Define paths ---
     # (Paths remain unchanged)
@@ -58,24 +62,26 @@ def main():
 
     # --- NEW LOGIC: Expand directories into a file list ---
     # This must be done BEFORE Stage 1
-    print("Expanding directories to find .wav files...")
+    print("Expanding directories to find .wav and .flac files...")
     input_sources = payload['input_files']
     expanded_input_files = []
     
     for source_path_str in input_sources:
         full_source_path = str(Path(source_path_str).resolve()) 
+        if not os.path.exists(full_source_path) and os.path.isfile(str(Path(full_source_path).with_suffix('.flac'))):
+            full_source_path = str(Path(full_source_path).with_suffix('.flac'))
         
         if os.path.isdir(full_source_path):
-            search_pattern = os.path.join(full_source_path, "**", "*.wav")
-            wav_files = glob(search_pattern, recursive=True)
-            expanded_input_files.extend(wav_files)
-        elif os.path.isfile(full_source_path) and full_source_path.lower().endswith('.wav'):
+            for extension in AUDIO_EXTENSIONS:
+                search_pattern = os.path.join(full_source_path, "**", "*" + extension)
+                expanded_input_files.extend(glob(search_pattern, recursive=True))
+        elif os.path.isfile(full_source_path) and full_source_path.lower().endswith(AUDIO_EXTENSIONS):
             expanded_input_files.append(full_source_path)
 
     if not expanded_input_files:
-        print("Error: No .wav files found in the selected directories.", file=sys.stderr)
+        print("Error: No .wav or .flac files found in the selected directories.", file=sys.stderr)
         sys.exit(1) # Fail fast
-    print(f"Found {len(expanded_input_files)} .wav files to process.")
+    print(f"Found {len(expanded_input_files)} recordings to process.")
     # --- END NEW LOGIC ---
 
 
@@ -88,8 +94,8 @@ def main():
         '--static-noise-file', str(noise_file_path),
         '--lat', "28.53", 
         '--lon', "77.18", 
-        '--min-confidence', str(parameters.get('min_confidence_birdnet', 0.5)),
-        '--input-files', *expanded_input_files  # <--- MODIFIED
+        '--input-files', *expanded_input_files,  # <--- MODIFIED
+        *arguments.get('birdnet', []),
     ]
 
     if not run_subprocess(birdnet_command, job_dir):
@@ -110,8 +116,7 @@ def main():
         str(graphing_core_script_path),
         '--input-csv', str(temp_csv_path), # <--- Input is the temp file
         '--output-prefix', final_plot_prefix,
-        '--min-confidence-chart', str(parameters.get('min_confidence_chart', 0.3)),
-        '--species-per-plot', str(parameters.get('species_per_plot', 50))
+        *arguments.get('chart', []),
     ]
 
     if not run_subprocess(graphing_command, job_dir):
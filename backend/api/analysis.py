@@ -1,140 +1,151 @@
 # backend/api/analysis.py
 
-import os
-import sys
 import json
 import shutil
 import psutil
 
-import subprocess
 import aiofiles
-from pathlib import Path
-from datetime import datetime
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from datetime import date, time
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Query
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
-router = APIRouter()
-
-PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
-ANALYSIS_DIR = PROJECT_ROOT / "backend" / "analysis"
-JOBS_DIR = PROJECT_ROOT / "data" / "processing" / "jobs"
-DATA_DIR = PROJECT_ROOT / "data"
+from ..core import detection_store, embedding_index, flac_archive, index_store, recording_catalog, script_registry, watch_ingest
+from ..core.models import PrescreenSettings
+from ..core.jobs import ACTIVE_JOBS, JOBS_DIR, create_job, get_job_dir, run_job_process
+from ..core.script_registry import ParameterError
 
-ACTIVE_JOBS: Dict[str, subprocess.Popen] = {}
+router = APIRouter()
 
 class JobRequest(BaseModel):
     script_id: str
     input_files: List[str]
     parameters: Dict[str, Any] = Field(default_factory=dict)
+    prescreen: PrescreenSettings = Field(default_factory=PrescreenSettings)
 
-def get_job_dir(job_id: str) -> Path:
-    JOBS_DIR.mkdir(parents=True, exist_ok=True)
-    return JOBS_DIR / job_id
-
-def run_job_process(job_id: str, payload: dict):
-    """This function runs in the background and executes the correct wrapper script."""
-    job_dir = get_job_dir(job_id)
-    payload_path = job_dir / "payload.json"
-    results_path = job_dir / "results.json"
-    stdout_path = job_dir / "stdout.log"
-    stderr_path = job_dir / "stderr.log"
-
-    script_id = payload.get("script_id")
-    script_dir = ANALYSIS_DIR / script_id
-    wrapper_path = script_dir / "wrapper.py"
-
-    output_file_path = job_dir / "results.csv"
-    payload['output_file'] = str(output_file_path)
-
-    with open(payload_path, 'w') as f:
-        json.dump(payload, f, indent=4)
-        
-    with open(results_path, 'r+') as f:
-        status_data = json.load(f)
-        status_data['status'] = 'running'
-        f.seek(0)
-        json.dump(status_data, f, indent=4)
-
-    command = [sys.executable, str(wrapper_path), str(payload_path)]
-    
-    with open(stdout_path, 'w') as stdout_file, open(stderr_path, 'w') as stderr_file:
-        process = subprocess.Popen(command, stdout=stdout_file, stderr=stderr_file, text=True)
-        ACTIVE_JOBS[job_id] = process
-        process.wait()
+class WatchRequest(BaseModel):
+    scripts: Dict[str, Dict[str, Any]]
+    debounce_seconds: float = Field(60.0, ge=5)
+    max_batch: int = Field(200, ge=1)
+    backfill: bool = False
+    prescreen: PrescreenSettings = Field(default_factory=PrescreenSettings)
 
-    if job_id in ACTIVE_JOBS:
-        del ACTIVE_JOBS[job_id]
-
-    with open(results_path, 'r+') as f:
-        status_data = json.load(f)
-        if process.returncode == 0:
-            status_data['status'] = 'completed'
-            status_data['output_file'] = str(output_file_path) # Add output file path on success
-        else:
-            status_data['status'] = 'failed'
-            status_data['message'] = f"Process exited with code {process.returncode}"
-        f.seek(0)
-        f.truncate()
-        json.dump(status_data, f, indent=4)
+class ArchiveRequest(BaseModel):
+    enabled: bool
 
 @router.get("/analysis/scripts", tags=["Analysis"])
 async def get_available_scripts():
-    """Scans the analysis directory for manifest.json files and returns their contents."""
-    scripts = []
-    if not ANALYSIS_DIR.exists():
-        return []
-    for script_dir in ANALYSIS_DIR.iterdir():
-        if script_dir.is_dir():
-            manifest_path = script_dir / "manifest.json"
-            if manifest_path.exists():
-                async with aiofiles.open(manifest_path, 'r') as f:
-                    manifest_data = json.loads(await f.read())
-                    manifest_data['id'] = script_dir.name # Use directory name as the unique ID
-                    scripts.append(manifest_data)
-    return scripts
+    """Returns the manifests held by the script registry (reloaded by its watcher, not per request)."""
+    return script_registry.list_scripts()
 
 @router.get("/analysis/external-files", tags=["Analysis"])
 async def get_external_files():
-    """Finds all WAV files in the external_data directories of all spots."""
-    wav_files = []
-    spots_dir = DATA_DIR / "spots"
-    if not spots_dir.exists():
-        return []
-    for spot_folder in spots_dir.iterdir():
-        if spot_folder.is_dir():
-            external_data_dir = spot_folder / "external_data"
-            if external_data_dir.exists():
-                for root, _, files in os.walk(external_data_dir):
-                    for file in files:
-                        if file.lower().endswith('.wav'):
-                            full_path = Path(root) / file
-                            # Make the path relative to the project root for consistency
-                            relative_path = full_path.relative_to(PROJECT_ROOT)
-                            wav_files.append(str(relative_path))
-    return sorted(wav_files)
+    """Lists all WAV files in the external_data directories of all spots, from the recording catalog."""
+    return await run_in_threadpool(recording_catalog.list_paths, source="external")
+
+
+@router.get("/analysis/recordings", tags=["Analysis"])
+async def get_recordings(
+    spot: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    start_time: Optional[time] = None,
+    end_time: Optional[time] = None,
+    limit: int = Query(1000, ge=1, le=10000),
+    offset: int = Query(0, ge=0)
+):
+    """
+    Queries catalogued recordings by spot, date range and time of day, with
+    header-derived duration, sample rate and channel count for each file.
+    A time window such as 18:00-06:00 wraps past midnight.
+    """
+    return await run_in_threadpool(
+        recording_catalog.query_recordings,
+        spot=spot,
+        start_date=start_date.isoformat() if start_date else None,
+        end_date=end_date.isoformat() if end_date else None,
+        start_minute=start_time.hour * 60 + start_time.minute if start_time else None,
+        end_minute=end_time.hour * 60 + end_time.minute if end_time else None,
+        limit=limit,
+        offset=offset
+    )
 
 
-@router.post("/analysis/run", tags=["Analysis"])
-async def run_analysis(job_request: JobRequest, background_tasks: BackgroundTasks):
-    job_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.urandom(4).hex()}"
-    job_dir = get_job_dir(job_id)
-    job_dir.mkdir(parents=True, exist_ok=True)
-    
-    payload = job_request.dict()
-    payload['job_id'] = job_id
-    payload['submitted_at'] = datetime.now().isoformat()
+@router.post("/analysis/catalog/rescan", tags=["Analysis"])
+async def rescan_catalog(force: bool = False):
+    """Re-syncs the recording catalog with the disk; `force` ignores directory mtimes."""
+    changes = await run_in_threadpool(recording_catalog.rescan, force)
+    return {"message": "Catalog rescanned.", "changes": changes}
 
-    initial_status = {
-        "job_id": job_id, "script_id": payload['script_id'],
-        "submitted_at": payload['submitted_at'], "status": "queued"
-    }
-    async with aiofiles.open(job_dir / "results.json", 'w') as f:
-        await f.write(json.dumps(initial_status, indent=4))
 
+@router.post("/analysis/run", tags=["Analysis"])
+async def run_analysis(job_request: JobRequest, background_tasks: BackgroundTasks):
+    if script_registry.get_script(job_request.script_id) is None:
+        raise HTTPException(status_code=404, detail=f"Analysis script '{job_request.script_id}' not found.")
+    try:
+        parameters = script_registry.validate_parameters(job_request.script_id, job_request.parameters)
+    except ParameterError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    job_id, payload = create_job(
+        job_request.script_id, job_request.input_files, parameters,
+        prescreen=job_request.prescreen.model_dump()
+    )
     background_tasks.add_task(run_job_process, job_id, payload)
     return {"message": "Job started successfully", "job_id": job_id}
 
+@router.get("/analysis/watch", tags=["Analysis"])
+async def get_watches():
+    """Lists spots whose external_data folders are watched, with their scripts and queued file counts."""
+    return watch_ingest.get_watches()
+
+@router.put("/analysis/watch/{spot_id}", tags=["Analysis"])
+async def set_watch(spot_id: str, watch_request: WatchRequest):
+    """
+    Watches a spot's external_data folder: new WAVs are batched once no file
+    has arrived for `debounce_seconds`, analysed incrementally by each script,
+    and appended to data/spots/<spot>/analysis/<script>_running.csv.
+    """
+    try:
+        config = await run_in_threadpool(
+            watch_ingest.set_watch, spot_id, watch_request.scripts,
+            watch_request.debounce_seconds, watch_request.max_batch, watch_request.backfill,
+            watch_request.prescreen.model_dump()
+        )
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {"message": "Watch enabled.", "spot_id": spot_id, "watch": config}
+
+@router.delete("/analysis/watch/{spot_id}", tags=["Analysis"])
+async def delete_watch(spot_id: str):
+    try:
+        watch_ingest.remove_watch(spot_id)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"message": "Watch disabled."}
+
+@router.get("/analysis/archive", tags=["Analysis"])
+async def get_archive_status():
+    """Archival mode settings, how many recordings have been converted to FLAC, and the space saved."""
+    return flac_archive.status()
+
+@router.put("/analysis/archive", tags=["Analysis"])
+async def set_archive(archive_request: ArchiveRequest):
+    """
+    Turns archival mode on or off. While on, imported WAV recordings that have
+    not changed for a few hours are re-encoded as lossless FLAC in the background.
+    """
+    return await run_in_threadpool(flac_archive.set_enabled, archive_request.enabled)
+
+@router.post("/analysis/archive/run", tags=["Analysis"])
+async def run_archive():
+    """Starts an archival sweep now, retrying files that failed before."""
+    flac_archive.run_now()
+    return {"message": "Archive sweep started."}
+
 @router.get("/analysis/jobs", tags=["Analysis"])
 async def get_jobs():
     jobs = []
@@ -193,30 +204,15 @@ async def delete_job(job_id: str):
         raise HTTPException(status_code=404, detail="Job not found.")
         
     shutil.rmtree(job_dir)
+    detection_store.remove_job(job_id)
+    index_store.remove_job(job_id)
+    embedding_index.remove_job(job_id)
     return {"message": "Job deleted successfully."}
 
 
 @router.get("/analysis/audio-sources", tags=["Analysis"])
 async def get_audio_sources():
     """
-    Finds all directories within data/spots that contain .wav files.
+    Lists all directories within data/spots that contain .wav files, from the recording catalog.
     """
-    audio_sources = set()
-    spots_dir = DATA_DIR / "spots"
-    if not spots_dir.exists():
-        return []
-
-    for spot_folder in spots_dir.iterdir():
-        if not spot_folder.is_dir():
-            continue
-
-        for root, _, files in os.walk(spot_folder):
-            for file in files:
-                if file.lower().endswith('.wav'):
-                    # Add the directory path, relative to the project root
-                    dir_path = Path(root).relative_to(PROJECT_ROOT)
-                    audio_sources.add(str(dir_path))
-                    # We found a WAV file, no need to check other files in this dir
-                    break 
-
-    return sorted(list(audio_sources))
\ No newline at end of file
+    return await run_in_threadpool(recording_catalog.list_directories)
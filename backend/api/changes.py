@@ -0,0 +1,25 @@
+# backend/api/changes.py
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Query
+from fastapi.concurrency import run_in_threadpool
+
+from ..core import change_feed
+
+router = APIRouter()
+
+
+@router.get("/changes", tags=["Sync"])
+async def get_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(500, ge=1, le=5000),
+    kind: Optional[List[Literal["spot", "observation", "route", "site"]]] = Query(None)
+):
+    """
+    Spots, observations, routes and sites created or modified after the
+    `since` cursor. Start from 0 for a full snapshot, then pass back the
+    returned `cursor`; keep paging while `hasMore` is true. A null `record`
+    means it was removed. If `epoch` differs from the one the cursor came
+    from, start again from 0.
+    """
+    return await run_in_threadpool(change_feed.changes_since, since, limit, kind)
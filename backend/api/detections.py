@@ -0,0 +1,52 @@
+# backend/api/detections.py
+from datetime import date
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Query
+from fastapi.concurrency import run_in_threadpool
+
+from ..core import detection_store
+
+router = APIRouter()
+
+
+@router.get("/detections", tags=["Detections"])
+async def get_detections(
+    species: Optional[str] = None,
+    spot: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    hour: Optional[int] = Query(None, ge=0, le=23),
+    min_confidence: Optional[float] = Query(None, ge=0, le=1),
+    limit: int = Query(1000, ge=1, le=10000),
+    offset: int = Query(0, ge=0)
+):
+    """
+    Queries BirdNET detections from every completed job. `species` matches
+    the common or scientific name, case-insensitively.
+    """
+    return await run_in_threadpool(
+        detection_store.query, species, spot,
+        start_date.isoformat() if start_date else None,
+        end_date.isoformat() if end_date else None,
+        hour, min_confidence, limit, offset
+    )
+
+
+@router.get("/detections/summary", tags=["Detections"])
+async def get_detection_summary(
+    group_by: Literal["species", "spot", "date", "hour"] = "species",
+    species: Optional[str] = None,
+    spot: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    hour: Optional[int] = Query(None, ge=0, le=23),
+    min_confidence: Optional[float] = Query(None, ge=0, le=1)
+):
+    """Detection counts and confidence statistics grouped by species, spot, date or hour of day."""
+    return await run_in_threadpool(
+        detection_store.summarize, group_by, species, spot,
+        start_date.isoformat() if start_date else None,
+        end_date.isoformat() if end_date else None,
+        hour, min_confidence
+    )
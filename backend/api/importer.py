@@ -1,5 +1,8 @@
-from fastapi import APIRouter, HTTPException, File, UploadFile, Form
-from typing import List
+from fastapi import APIRouter, HTTPException, File, UploadFile, Form, Header, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from ..core import bulk_import
 from ..core.file_handler import import_external_files_to_spots
 
 router = APIRouter()
@@ -23,4 +26,59 @@ async def import_media(
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {str(e)}")
+
+class ImportFile(BaseModel):
+    name: str
+    size: int = Field(..., ge=0)
+    sha256: Optional[str] = Field(None, pattern=r"^[0-9a-fA-F]{64}$")
+
+
+class ImportSessionRequest(BaseModel):
+    spot_names: List[str] = Field(..., min_length=1)
+    files: List[ImportFile] = Field(..., min_length=1)
+    chunk_size: int = bulk_import.DEFAULT_CHUNK_SIZE
+
+
+@router.post("/import-sessions", tags=["Importer"])
+async def create_import_session(request: ImportSessionRequest):
+    """
+    Starts a resumable import of large files (e.g. an SD-card dump) into one
+    or more spots. Upload each file's chunks with PUT .../chunks/{index}, in
+    any order and in parallel; after an interruption, GET the session to see
+    which chunks are still missing.
+    """
+    try:
+        return await bulk_import.create_session(
+            request.spot_names, [file.model_dump() for file in request.files], request.chunk_size
+        )
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/import-sessions/{session_id}", tags=["Importer"])
+async def get_import_session(session_id: str):
+    try:
+        await bulk_import.resume(session_id)
+        return await run_in_threadpool(bulk_import.status, session_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.put("/import-sessions/{session_id}/files/{file_id}/chunks/{index}", tags=["Importer"])
+async def upload_import_chunk(
+    session_id: str,
+    file_id: str,
+    index: int,
+    request: Request,
+    x_chunk_sha256: Optional[str] = Header(None)
+):
+    """Receives one chunk as the raw request body; an optional X-Chunk-SHA256 header is verified."""
+    try:
+        return await bulk_import.write_chunk(session_id, file_id, index, request.stream(), x_chunk_sha256)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except bulk_import.ChunkError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,49 @@
+# backend/api/indices.py
+from datetime import date
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Query
+from fastapi.concurrency import run_in_threadpool
+
+from ..core import index_store
+
+router = APIRouter()
+
+IndexName = Literal["ADI", "ACI", "AEI", "NDSI", "MFC", "CLS"]
+
+
+@router.get("/indices/spots", tags=["Acoustic Indices"])
+async def get_index_spots():
+    """Spots that have acoustic index data, with the dates it covers."""
+    return await run_in_threadpool(index_store.list_spots)
+
+
+@router.get("/indices/series", tags=["Acoustic Indices"])
+async def get_index_series(
+    spot: str,
+    index: IndexName,
+    resolution: Literal["hour", "day", "month"] = "day",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+):
+    """
+    Mean, min, max and segment count of one index per hour, day or month for
+    a spot, e.g. a seasonal curve. Served from rollups kept up to date as
+    acoustic-indices jobs complete.
+    """
+    return await run_in_threadpool(
+        index_store.series, spot, index, resolution,
+        start_date.isoformat() if start_date else None,
+        end_date.isoformat() if end_date else None
+    )
+
+
+@router.get("/indices/diel", tags=["Acoustic Indices"])
+async def get_index_diel(
+    spot: str,
+    index: IndexName,
+    start_month: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$"),
+    end_month: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$")
+):
+    """The 24-hour (diel) profile of one index at a spot over a range of months (YYYY-MM)."""
+    return await run_in_threadpool(index_store.diel, spot, index, start_month, end_month)
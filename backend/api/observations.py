@@ -0,0 +1,66 @@
+# backend/api/observations.py
+from datetime import date
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from ..core import observation_store
+
+router = APIRouter()
+
+ObservationType = Literal["Field Observation", "External Media Import"]
+
+
+@router.get("/observations", tags=["Observations"])
+async def get_observations(
+    spot: Optional[str] = None,
+    observation_type: Optional[ObservationType] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    limit: int = Query(1000, ge=1, le=10000),
+    offset: int = Query(0, ge=0)
+):
+    """Observation summaries across all spots, filtered by spot, type and inclusive date range."""
+    return await run_in_threadpool(
+        observation_store.query, spot, observation_type,
+        start_date.isoformat() if start_date else None,
+        end_date.isoformat() if end_date else None,
+        limit, offset
+    )
+
+
+@router.get("/observations/summary", tags=["Observations"])
+async def get_observation_summary(
+    group_by: Literal["spot", "type", "date"] = "spot",
+    spot: Optional[str] = None,
+    observation_type: Optional[ObservationType] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+):
+    """Observation counts with first and last timestamps, grouped by spot, type or date."""
+    return await run_in_threadpool(
+        observation_store.summarize, group_by, spot, observation_type,
+        start_date.isoformat() if start_date else None,
+        end_date.isoformat() if end_date else None
+    )
+
+
+@router.get("/observations/export.csv", tags=["Observations"])
+async def export_observations(
+    spot: Optional[str] = None,
+    observation_type: Optional[ObservationType] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+):
+    """Streams observations_summary.csv, generated on demand from the observation store."""
+    rows = observation_store.export_csv(
+        spot, observation_type,
+        start_date.isoformat() if start_date else None,
+        end_date.isoformat() if end_date else None
+    )
+    return StreamingResponse(
+        rows, media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": 'attachment; filename="observations_summary.csv"'}
+    )
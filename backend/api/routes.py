@@ -1,44 +1,50 @@
 # backend/api/routes.py
-import json
 from pathlib import Path
+from typing import Optional
 
-import aiofiles
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 
-from ..core.models import RouteData
-from ..core.file_handler import add_name_to_lookup, is_name_unique
+from ..core import change_feed, route_index, route_sessions, route_store
+from ..core.models import RouteData, RoutePointBatch, RouteSessionClose
+from ..core.file_handler import claim_name, release_name
 from ..core.utils import validate_name, slugify, get_timestamp_filename
 
 router = APIRouter()
 
 DATA_DIR = Path("data")
-ROUTE_DIR = DATA_DIR / "routes"
 ROUTE_NAMES_FILE = DATA_DIR / "route_names.json"
 
 
+async def _claim_route_id(name: Optional[str]) -> str:
+    """Reserves a route name and returns the id its file is saved under."""
+    if not name:
+        return get_timestamp_filename()
+    validate_name(name)
+    if not await claim_name(name, ROUTE_NAMES_FILE):
+        raise HTTPException(status_code=409, detail="A route with this name already exists.")
+    return slugify(name)
+
+
 @router.post("/save-route", tags=["Routes"])
 async def save_route(route_data: RouteData):
     """
     Saves a new route with a unique name or a timestamp-based name.
     """
     try:
-        route_name_slug = ""
-        if route_data.name:
-            validate_name(route_data.name)
-            if not await is_name_unique(route_data.name, ROUTE_NAMES_FILE):
-                raise HTTPException(status_code=409, detail="A route with this name already exists.")
-            route_name_slug = slugify(route_data.name)
-            await add_name_to_lookup(route_data.name, ROUTE_NAMES_FILE)
-
-        filename = f"{route_name_slug or get_timestamp_filename()}.json"
-        file_path = ROUTE_DIR / filename
-        route_json_data = route_data.model_dump(exclude={'name'})
-
-        async with aiofiles.open(file_path, 'w') as f:
-            await f.write(json.dumps(route_json_data, indent=2))
-
-        return {"message": "Route saved successfully!"}
+        route_id = await _claim_route_id(route_data.name)
+        try:
+            points = [point.model_dump() for point in route_data.points]
+            summary = await run_in_threadpool(route_store.save, route_id, route_data.name, points)
+        except Exception:
+            if route_data.name:
+                await release_name(route_data.name, ROUTE_NAMES_FILE)
+            raise
+        feed_record = await run_in_threadpool(route_store.feed_record, route_id)
+        await run_in_threadpool(change_feed.record, "route", route_id, feed_record)
+
+        return {"message": "Route saved successfully!", "route": summary}
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -47,12 +53,154 @@ async def save_route(route_data: RouteData):
 
 
 @router.get("/get-routes", tags=["Routes"])
-async def get_routes():
+async def get_routes(
+    zoom: Optional[int] = Query(None, ge=0, le=24),
+    min_distance: Optional[float] = Query(None, ge=0),
+    max_distance: Optional[float] = Query(None, ge=0),
+    min_duration: Optional[float] = Query(None, ge=0),
+    max_duration: Optional[float] = Query(None, ge=0),
+    south: Optional[float] = Query(None, ge=-90, le=90),
+    west: Optional[float] = Query(None, ge=-180, le=180),
+    north: Optional[float] = Query(None, ge=-90, le=90),
+    east: Optional[float] = Query(None, ge=-180, le=180),
+    sort: str = "createdAt",
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    limit: Optional[int] = Query(None, ge=1, le=10000),
+    offset: int = Query(0, ge=0),
+):
+    """
+    Lists route summaries (distance, duration, speeds, bounding box, point
+    count) from the route index, filtered by distance in metres, duration in
+    seconds and/or a south/west/north/east box the route overlaps, sorted by
+    createdAt, distance, duration or name. Paths are only read when `zoom` is
+    given; each route's path is then simplified for that map zoom. Every
+    match is returned unless `limit` (with `offset`) asks for a page.
+    """
+    bounds = [south, west, north, east]
+    if any(value is not None for value in bounds) and None in bounds:
+        raise HTTPException(status_code=400, detail="Give all of south, west, north and east, or none.")
+
+    def collect():
+        summaries = route_index.query(
+            min_distance, max_distance, min_duration, max_duration,
+            bounds if south is not None else None, sort, order == "desc", limit, offset,
+        )
+        if zoom is None:
+            return summaries
+        all_routes = []
+        for summary in summaries:
+            try:
+                route = route_store.load(summary["routeId"])
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Could not load route '{summary['routeId']}': {e}")
+                continue
+            geometry = route_store.geometry(route, route_store.level_for_zoom(route, zoom))
+            geometry.pop("times", None)
+            all_routes.append({**summary, **geometry})
+        return all_routes
+
+    try:
+        return await run_in_threadpool(collect)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/routes/{route_id}", tags=["Routes"])
+async def get_route(route_id: str, zoom: Optional[int] = Query(None, ge=0, le=24)):
     """
-    Retrieves all saved routes.
+    One route with every recorded point and its timestamps, or its path
+    simplified for `zoom`.
     """
-    all_routes = []
-    for file_path in ROUTE_DIR.glob("*.json"):
-        async with aiofiles.open(file_path, 'r') as f:
-            all_routes.append(json.loads(await f.read()))
-    return all_routes
+    def build():
+        route = route_store.load(route_id)
+        level = route_store.level_for_zoom(route, zoom) if zoom is not None else None
+        return {**route["summary"], **route_store.geometry(route, level)}
+
+    try:
+        return await run_in_threadpool(build)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Route '{route_id}' not found.")
+
+
+@router.post("/route-sessions", tags=["Routes"])
+async def open_route_session():
+    """
+    Starts recording a route. The client then sends its points in batches as
+    they are recorded and closes the session when the route ends.
+    """
+    return await run_in_threadpool(route_sessions.open_session)
+
+
+@router.get("/route-sessions", tags=["Routes"])
+async def list_route_sessions():
+    """Recordings that were never closed, so an interrupted route can be saved or discarded."""
+    return await run_in_threadpool(route_sessions.list_sessions)
+
+
+@router.get("/route-sessions/{session_id}", tags=["Routes"])
+async def get_route_session(session_id: str):
+    """How many points the server holds, i.e. the offset the next batch should start at."""
+    try:
+        return await run_in_threadpool(route_sessions.status, session_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.post("/route-sessions/{session_id}/points", tags=["Routes"])
+async def append_route_points(session_id: str, batch: RoutePointBatch):
+    """
+    Appends a batch of points starting at point number `offset`. Resending a
+    batch is safe; a batch that starts past the stored points is refused with
+    409 and the offset to resend from.
+    """
+    try:
+        return await route_sessions.append_points(session_id, batch.offset, [p.model_dump() for p in batch.points])
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except route_sessions.OffsetGap as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "pointCount": e.expected})
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.post("/route-sessions/{session_id}/close", tags=["Routes"])
+async def close_route_session(session_id: str, request: RouteSessionClose):
+    """
+    Saves the recorded points as a route under the given name (or a
+    timestamp) and ends the session. Closing an already closed session
+    returns the route it was saved as.
+    """
+    try:
+        async with route_sessions.session_lock(session_id):
+            session = await run_in_threadpool(route_sessions.status, session_id)
+            if "routeId" in session:
+                try:
+                    route = await run_in_threadpool(route_store.load, session["routeId"])
+                except FileNotFoundError:
+                    raise HTTPException(status_code=410, detail="The route saved from this session has been deleted.")
+                return {"message": "Route already saved.", "route": route["summary"]}
+            if session["pointCount"] == 0:
+                raise HTTPException(status_code=400, detail="No points have been recorded in this session.")
+
+            name = request.name or session.get("name")
+            route_id = await _claim_route_id(name)
+            try:
+                summary = await run_in_threadpool(route_sessions.finalize, session_id, route_id, name)
+            except Exception:
+                if name:
+                    await release_name(name, ROUTE_NAMES_FILE)
+                raise
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    feed_record = await run_in_threadpool(route_store.feed_record, route_id)
+    await run_in_threadpool(change_feed.record, "route", route_id, feed_record)
+    return {"message": "Route saved successfully!", "route": summary}
+
+
+@router.delete("/route-sessions/{session_id}", tags=["Routes"])
+async def discard_route_session(session_id: str):
+    try:
+        await route_sessions.discard_session(session_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"message": "Recording discarded."}
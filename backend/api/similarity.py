@@ -0,0 +1,38 @@
+# backend/api/similarity.py
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+
+from ..core import embedding_index
+
+router = APIRouter()
+
+
+@router.get("/similarity/search", tags=["Similarity"])
+async def search_similar_windows(
+    path: str,
+    start_time: float = Query(..., ge=0),
+    end_time: Optional[float] = Query(None, ge=0),
+    k: int = Query(20, ge=1, le=500),
+    spot: Optional[str] = None,
+    include_same_file: bool = False
+):
+    """
+    Finds the k windows most similar to a reference window (or clip, with
+    `end_time`) of a recording that was analysed with BirdNET embeddings on.
+    `path` is the project-relative recording path, as used by the analysis panel.
+    """
+    def search():
+        query = embedding_index.reference_vector(path, start_time, end_time)
+        return embedding_index.similar(query, k, spot, None if include_same_file else path)
+
+    try:
+        return await run_in_threadpool(search)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.get("/similarity/stats", tags=["Similarity"])
+async def get_similarity_stats():
+    return await run_in_threadpool(embedding_index.stats)
@@ -6,8 +6,10 @@ from pathlib import Path
 from datetime import datetime
 
 from fastapi import APIRouter, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 
+from ..core import change_feed
 from ..gee_processor import generate_stratification
 
 router = APIRouter()
@@ -41,6 +43,7 @@ async def add_site(
         site_file_path = SITES_DIR / f"{site_id}.json"
         async with aiofiles.open(site_file_path, 'w') as f:
             await f.write(json.dumps(site_data, indent=2))
+        await run_in_threadpool(change_feed.record, "site", site_id, site_data)
 
         print(f"Site '{siteName}' data saved to {site_file_path}")
 
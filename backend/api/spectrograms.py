@@ -0,0 +1,41 @@
+# backend/api/spectrograms.py
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+
+from ..core import spectrogram_tiles
+
+router = APIRouter()
+
+
+@router.get("/spectrogram/info", tags=["Spectrograms"])
+async def get_spectrogram_info(path: str):
+    """
+    Zoom levels and tile counts for a recording's spectrogram. The first
+    request for a file computes its tile pyramid; later ones are served from
+    the cache until the file changes.
+    """
+    try:
+        meta = await run_in_threadpool(spectrogram_tiles.get_pyramid, path)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=422, detail=f"Could not read recording: {e}")
+    return {key: value for key, value in meta.items() if key not in ("size", "mtime")}
+
+
+@router.get("/spectrogram/tile", tags=["Spectrograms"])
+async def get_spectrogram_tile(
+    path: str,
+    zoom: int = Query(..., ge=0),
+    x: int = Query(..., ge=0)
+):
+    """A grayscale PNG tile of a recording's spectrogram; time runs left to right, frequency bottom to top."""
+    try:
+        png = await run_in_threadpool(spectrogram_tiles.get_tile, path, zoom, x)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except IndexError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=422, detail=f"Could not read recording: {e}")
+    return Response(content=png, media_type="image/png", headers={"Cache-Control": "private, max-age=3600"})
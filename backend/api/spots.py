@@ -1,16 +1,16 @@
 # backend/api/spots.py
-import json
 import uuid
 from pathlib import Path
 from datetime import datetime
+from typing import Literal
 
-import aiofiles
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, File, HTTPException, Query, Request, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse
 
-from ..core.file_handler import (save_media_file_refactored, add_name_to_lookup, 
-                                 is_name_unique, append_to_observations_csv)
-from ..core.models import SpotObservation
+from ..core import image_derivatives, media_store, observation_sync, spot_cache, spot_index, spot_store
+from ..core.file_handler import save_observation_media, claim_name, release_name, record_observation_summary
+from ..core.models import ObservationBatch, SpotObservation
 from ..core.utils import validate_name, slugify
 
 router = APIRouter()
@@ -21,57 +21,81 @@ SPOT_DIR = DATA_DIR / "spots"
 SPOT_NAMES_FILE = DATA_DIR / "spot_names.json"
 
 
+@router.post("/media", tags=["Spots"])
+async def upload_media(file: UploadFile = File(...)):
+    """
+    Streams a photo or audio recording to disk and returns a media id. Pass
+    it as image_media_id / audio_media_id when saving the observation.
+    """
+    try:
+        return await media_store.save_upload(file)
+    except media_store.MediaTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+
+
+@router.get("/media/image", tags=["Spots"])
+async def get_image(path: str, size: Literal["thumb", "preview"] = "thumb"):
+    """
+    A downscaled copy of an observation photo (`path` is its imagePath):
+    "thumb" for lists and map popups, "preview" for the detail view.
+    """
+    try:
+        derivative = await run_in_threadpool(image_derivatives.get, path, size)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except OSError as e:
+        raise HTTPException(status_code=422, detail=f"Could not read image: {e}")
+    return FileResponse(derivative, media_type=image_derivatives.MEDIA_TYPE,
+                        headers={"Cache-Control": "private, max-age=86400"})
+
+
 @router.post("/save-spot", tags=["Spots"])
 async def save_spot(spot: SpotObservation):
 
     try:
+        try:
+            media_store.check(spot.image_media_id)
+            media_store.check(spot.audio_media_id)
+        except LookupError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
         is_new_spot = not spot.spotId
         if is_new_spot:
             validate_name(spot.name)
-            if not await is_name_unique(spot.name, SPOT_NAMES_FILE):
+            if not await claim_name(spot.name, SPOT_NAMES_FILE):
                 raise HTTPException(status_code=409, detail="A spot with this name already exists.")
 
             spot_name_slug = slugify(spot.name)
-            spot_dir = SPOT_DIR / spot_name_slug
-            spot_dir.mkdir(exist_ok=True)
-            spot_file_path = spot_dir / "_data.json"
+            try:
+                header = await run_in_threadpool(
+                    spot_store.create_spot, spot_name_slug, spot.name, spot.latitude, spot.longitude
+                )
+            except Exception:
+                await release_name(spot.name, SPOT_NAMES_FILE)
+                raise
 
-            image_path = await save_media_file_refactored(spot.image_data_url, spot_name_slug)
-            audio_path = await save_media_file_refactored(spot.audio_data_url, spot_name_slug)
+            image_path = await save_observation_media(spot.image_media_id, spot.image_data_url, spot_name_slug)
+            audio_path = await save_observation_media(spot.audio_media_id, spot.audio_data_url, spot_name_slug)
 
             new_observation = {"observationId": str(uuid.uuid4()), "createdAt": datetime.now().isoformat(), "birds": spot.birds, "description": spot.description, "imagePath": image_path, "audioPath": audio_path}
-            spot_data = {"spotId": spot_name_slug, "name": spot.name, "latitude": spot.latitude, "longitude": spot.longitude, "observations": [new_observation]}
-            await add_name_to_lookup(spot.name, SPOT_NAMES_FILE)
+            await spot_store.append_observation(spot_name_slug, new_observation)
+            spot_data = {**header, "observations": [new_observation]}
+            await run_in_threadpool(spot_cache.put, spot_data)
         else:
             spot_name_slug = spot.spotId
-            spot_file_path = SPOT_DIR / spot_name_slug / "_data.json"
-            if not spot_file_path.exists():
+            if not spot_store.spot_exists(spot_name_slug):
                 raise HTTPException(status_code=404, detail="Spot not found.")
 
-            image_path = await save_media_file_refactored(spot.image_data_url, spot_name_slug)
-            audio_path = await save_media_file_refactored(spot.audio_data_url, spot_name_slug)
+            image_path = await save_observation_media(spot.image_media_id, spot.image_data_url, spot_name_slug)
+            audio_path = await save_observation_media(spot.audio_media_id, spot.audio_data_url, spot_name_slug)
             new_observation = {"observationId": str(uuid.uuid4()), "createdAt": datetime.now().isoformat(), "birds": spot.birds, "description": spot.description, "imagePath": image_path, "audioPath": audio_path}
 
-            async with aiofiles.open(spot_file_path, 'r') as f:
-                spot_data = json.loads(await f.read())
-            spot_data["observations"].append(new_observation)
-
-        async with aiofiles.open(spot_file_path, 'w') as f:
-            await f.write(json.dumps(spot_data, indent=2))
-
-        await append_to_observations_csv({
-            "observationId": new_observation["observationId"],
-            "spotId": spot_data["spotId"],
-            "spotName": spot_data["name"],
-            "observationTimestamp": new_observation["createdAt"],
-            "latitude": spot_data["latitude"],
-            "longitude": spot_data["longitude"],
-            "observationType": "Field Observation",
-            "description": new_observation.get("description", ""),
-            "birds": new_observation.get("birds", ""),
-            "imagePath": new_observation.get("imagePath", ""),
-            "audioPath": new_observation.get("audioPath", "")
-        })
+            await spot_store.append_observation(spot_name_slug, new_observation)
+            spot_data = await run_in_threadpool(spot_cache.add_observation, spot_name_slug, new_observation)
+
+        await record_observation_summary(spot_data, new_observation)
 
         return {"message": "Observation saved successfully!", "spotData": spot_data}
     except HTTPException as e:
@@ -81,16 +105,72 @@ async def save_spot(spot: SpotObservation):
         return JSONResponse(status_code=500, content={"message": "An internal server error occurred."})
 
 
+@router.post("/sync/observations", tags=["Spots"])
+async def sync_observations(batch: ObservationBatch):
+    """
+    Bulk upload for observations queued on an offline device. Returns one
+    result per item, in order; resending items with the same idempotencyKey
+    reports them as duplicates instead of saving them again.
+    """
+    results = await observation_sync.sync_batch(batch.observations)
+    counts = {status: sum(r["status"] == status for r in results) for status in ("created", "duplicate", "error")}
+    return {**counts, "results": results}
+
+
 @router.get("/get-spots", tags=["Spots"])
-async def get_spots():
+async def get_spots(request: Request):
+    """
+    Retrieves data for all saved spots from the in-memory spot cache.
+    Responses carry an ETag; a reload with a matching If-None-Match gets 304.
+    """
+    etag, body = spot_cache.payload()
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/spots/in-view", tags=["Spots"])
+async def get_spots_in_view(
+    south: float = Query(..., ge=-90, le=90),
+    west: float = Query(..., ge=-180, le=180),
+    north: float = Query(..., ge=-90, le=90),
+    east: float = Query(..., ge=-180, le=180),
+    zoom: int = Query(..., ge=0, le=22)
+):
     """
-    Retrieves data for all saved spots.
+    Lightweight summaries of the spots inside the map viewport, with nearby
+    spots merged into clusters at lower zoom levels. Full observation
+    histories come from /spots/{spot_id}.
     """
-    all_spots = []
-    for spot_dir in SPOT_DIR.iterdir():
-        if spot_dir.is_dir():
-            spot_file = spot_dir / "_data.json"
-            if spot_file.exists():
-                async with aiofiles.open(spot_file, 'r') as f:
-                    all_spots.append(json.loads(await f.read()))
-    return all_spots
+    if south > north:
+        raise HTTPException(status_code=400, detail="south must not be greater than north.")
+    spots = spot_index.query_box(south, west, north, east)
+    return {"total": len(spots), **spot_index.cluster(spots, zoom)}
+
+
+@router.get("/spots/{spot_id}", tags=["Spots"])
+async def get_spot(spot_id: str):
+    """Full data for one spot, including all observations."""
+    spot = spot_cache.get(spot_id)
+    if spot is None:
+        raise HTTPException(status_code=404, detail="Spot not found.")
+    return spot
+
+
+@router.get("/spots/{spot_id}/observations", tags=["Spots"])
+async def get_spot_observations(
+    spot_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    order: Literal["newest", "oldest"] = "newest"
+):
+    """A page of one spot's observations, newest first by default."""
+    spot = spot_cache.get(spot_id)
+    if spot is None:
+        raise HTTPException(status_code=404, detail="Spot not found.")
+    observations = spot["observations"]
+    return {
+        "total": len(observations), "offset": offset, "limit": limit,
+        "observations": spot_store.page(observations, offset, limit, newest_first=order == "newest"),
+    }
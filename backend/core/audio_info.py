@@ -0,0 +1,128 @@
+# backend/core/audio_info.py
+import re
+import struct
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# Headers larger than this are treated as corrupt rather than scanned forever.
+MAX_HEADER_BYTES = 1 << 20
+
+
+def parse_recording_timestamp(filename: str) -> Optional[datetime]:
+    """
+    Parses the recorder's `..._YYYYMMDD_HHMMSS.wav` naming scheme (or `.flac`
+    once archived), the same format the analysis scripts rely on. Returns None
+    if the name doesn't match.
+    """
+    match_date = re.search(r'_(\d{8})_', filename)
+    match_time = re.search(r'_(\d{6})\.(?:wav|flac)$', filename, re.IGNORECASE)
+    if not (match_date and match_time):
+        return None
+    try:
+        return datetime.strptime(match_date.group(1) + match_time.group(1), "%Y%m%d%H%M%S")
+    except ValueError:
+        return None
+
+
+def read_wav_info(path: Path) -> dict:
+    """
+    Reads the RIFF header of a WAV file without decoding any audio.
+
+    Returns sample_rate, channels, bits_per_sample, format_tag, data_offset,
+    data_bytes, duration and whether the data chunk is truncated (a recorder
+    that lost power mid-file leaves a header promising more data than exists).
+    Raises ValueError if the file is not a readable WAV.
+    """
+    file_size = path.stat().st_size
+    with open(path, 'rb') as f:
+        riff = f.read(12)
+        if len(riff) < 12 or riff[:4] != b'RIFF' or riff[8:12] != b'WAVE':
+            raise ValueError("not a RIFF/WAVE file")
+
+        fmt = None
+        while f.tell() < MAX_HEADER_BYTES:
+            chunk_header = f.read(8)
+            if len(chunk_header) < 8:
+                break
+            chunk_id, chunk_size = struct.unpack('<4sI', chunk_header)
+            if chunk_id == b'fmt ':
+                body = f.read(chunk_size + (chunk_size & 1))
+                if len(body) < 16:
+                    raise ValueError("fmt chunk too short")
+                format_tag, channels, sample_rate, _, block_align, bits = struct.unpack('<HHIIHH', body[:16])
+                if format_tag == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                    format_tag = struct.unpack('<H', body[24:26])[0]
+                fmt = (format_tag, channels, sample_rate, block_align, bits)
+            elif chunk_id == b'data':
+                if fmt is None:
+                    raise ValueError("data chunk before fmt chunk")
+                format_tag, channels, sample_rate, block_align, bits = fmt
+                if channels == 0 or sample_rate == 0 or block_align == 0:
+                    raise ValueError("invalid fmt chunk")
+                data_offset = f.tell()
+                available = max(file_size - data_offset, 0)
+                data_bytes = min(chunk_size, available)
+                data_bytes -= data_bytes % block_align
+                return {
+                    "format_tag": format_tag,
+                    "channels": channels,
+                    "sample_rate": sample_rate,
+                    "bits_per_sample": bits,
+                    "block_align": block_align,
+                    "data_offset": data_offset,
+                    "data_bytes": data_bytes,
+                    "duration": data_bytes / block_align / sample_rate,
+                    "truncated": chunk_size > available,
+                }
+            else:
+                f.seek(chunk_size + (chunk_size & 1), 1)
+    raise ValueError("no data chunk found")
+
+
+def read_flac_info(path: Path) -> dict:
+    """
+    Reads the STREAMINFO block of a FLAC file without decoding any audio.
+    Returns sample_rate, channels, bits_per_sample and duration (None if the
+    encoder did not record the length). Raises ValueError if it is not FLAC.
+    """
+    with open(path, 'rb') as f:
+        head = f.read(10)
+        if head[:3] == b'ID3' and len(head) == 10:
+            # ID3v2 tag in front of the stream; its size is a 28-bit syncsafe integer.
+            f.seek(10 + ((head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9]))
+            head = f.read(4)
+        else:
+            f.seek(4)
+        if head[:4] != b'fLaC':
+            raise ValueError("not a FLAC file")
+        block_header = f.read(4)
+        if len(block_header) < 4 or block_header[0] & 0x7F != 0:
+            raise ValueError("FLAC stream does not start with STREAMINFO")
+        body = f.read(34)
+    if len(body) < 34:
+        raise ValueError("STREAMINFO block too short")
+    packed = int.from_bytes(body[10:18], 'big')
+    sample_rate = packed >> 44
+    channels = ((packed >> 41) & 0x7) + 1
+    bits = ((packed >> 36) & 0x1F) + 1
+    total_frames = packed & 0xFFFFFFFFF
+    if sample_rate == 0:
+        raise ValueError("invalid STREAMINFO sample rate")
+    return {
+        "channels": channels,
+        "sample_rate": sample_rate,
+        "bits_per_sample": bits,
+        "duration": total_frames / sample_rate if total_frames else None,
+    }
+
+
+def read_audio_info(path: Path) -> dict:
+    """Header information for a WAV or FLAC recording, chosen by extension."""
+    if path.suffix.lower() == ".flac":
+        return read_flac_info(path)
+    return read_wav_info(path)
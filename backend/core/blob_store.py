@@ -0,0 +1,135 @@
+# backend/core/blob_store.py
+import hashlib
+import os
+import shutil
+import stat
+import uuid
+from pathlib import Path
+from typing import BinaryIO, Tuple
+
+from .config import DATA_DIR
+
+# Imported media is stored once per distinct content, at
+# blobs/<aa>/<bb>/<sha256>. Spot folders hold hard links to the blob, so the
+# analysis wrappers still see ordinary files under data/spots while a file
+# imported into several spots, or imported again from the same SD card,
+# takes its disk space only once. A blob whose only remaining link is the
+# store's own is no longer used by any spot. Where the filesystem cannot hard
+# link (FAT/exFAT drives, or a spot folder on another device) the spot gets a
+# copy instead, and a `<sha256>.copied` marker beside the blob keeps it from
+# ever being pruned, since its link count says nothing about its users.
+BLOBS_DIR = DATA_DIR / "media" / "blobs"
+STAGING_DIR = BLOBS_DIR / "tmp"
+HASH_BLOCK = 1024 * 1024
+COPIED_SUFFIX = ".copied"
+
+
+def blob_path(sha256: str) -> Path:
+    return BLOBS_DIR / sha256[:2] / sha256[2:4] / sha256
+
+
+def exists(sha256: str) -> bool:
+    return blob_path(sha256).exists()
+
+
+def staging_path() -> Path:
+    STAGING_DIR.mkdir(parents=True, exist_ok=True)
+    return STAGING_DIR / uuid.uuid4().hex
+
+
+def hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while block := f.read(HASH_BLOCK):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_stream(source: BinaryIO) -> Tuple[Path, str]:
+    """Copies a readable binary stream to a staging file, hashing it on the way; returns (path, sha256)."""
+    path = staging_path()
+    digest = hashlib.sha256()
+    with open(path, 'wb') as f:
+        while block := source.read(HASH_BLOCK):
+            digest.update(block)
+            f.write(block)
+    return path, digest.hexdigest()
+
+
+def commit(staged: Path, sha256: str) -> Path:
+    """
+    Moves a fully written file into the store under its hash, or discards it
+    if that content is already stored.
+    """
+    target = blob_path(sha256)
+    if target.exists():
+        staged.unlink(missing_ok=True)
+        return target
+    target.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(staged, target)
+    return target
+
+
+def link(sha256: str, destination: Path) -> bool:
+    """
+    Makes `destination` a hard link to the blob (a copy if the filesystem
+    cannot link). Returns False if it already was one.
+    """
+    source = blob_path(sha256)
+    if destination.exists() and os.path.samefile(source, destination):
+        return False
+    if not link_or_copy(source, destination):
+        source.with_name(source.name + COPIED_SUFFIX).touch()
+    return True
+
+
+def link_or_copy(source: Path, destination: Path) -> bool:
+    """
+    Places another name for `source` at `destination`: a hard link where
+    possible, otherwise a copy. Returns whether it could link.
+    """
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    remove(destination)
+    try:
+        os.link(source, destination)
+        return True
+    except OSError:
+        shutil.copyfile(source, destination)
+        return False
+
+
+def remove(path: Path):
+    """
+    Deletes a file, clearing the read-only flag first if that is what stops
+    it (Windows refuses to unlink read-only files, and older versions of the
+    store made blobs, and so every link to them, read-only).
+    """
+    try:
+        path.unlink(missing_ok=True)
+    except PermissionError:
+        os.chmod(path, stat.S_IREAD | stat.S_IWRITE)
+        path.unlink(missing_ok=True)
+
+
+def prune_orphans() -> int:
+    """Deletes hard-linked blobs that no spot links to any more."""
+    if not BLOBS_DIR.exists():
+        return 0
+    removed = 0
+    for path in BLOBS_DIR.glob("*/*/*"):
+        if path.suffix == COPIED_SUFFIX or path.with_name(path.name + COPIED_SUFFIX).exists():
+            continue
+        try:
+            if path.stat().st_nlink == 1:
+                remove(path)
+                removed += 1
+        except OSError as e:
+            print(f"Could not prune media blob '{path.name}': {e}")
+    for path in STAGING_DIR.glob("*") if STAGING_DIR.exists() else []:
+        try:
+            remove(path)
+        except OSError as e:
+            print(f"Could not remove staged media '{path.name}': {e}")
+    if removed:
+        print(f"Removed {removed} unreferenced media blob(s).")
+    return removed
@@ -0,0 +1,282 @@
+# backend/core/bulk_import.py
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncIterator, List, Optional, Set
+
+import aiofiles
+
+from .config import DATA_DIR
+from .file_handler import import_dir, record_external_import
+from .utils import slugify
+from .write_path import append, lock_for, write_atomic
+from . import blob_store, spot_store
+
+# A resumable import is a session directory holding session.json (the
+# manifest, rewritten only when a file completes), one preallocated
+# <fileId>.part per file that chunks are written into at their offset, and
+# an append-only <fileId>.chunks log of the chunk numbers that are safely on
+# disk. Chunks can arrive in any order and in parallel; after an
+# interruption the client asks which chunks are missing and sends only those.
+# Finished files go into the content-addressed blob store, and a file whose
+# declared SHA-256 is already stored there needs no upload at all.
+SESSIONS_DIR = DATA_DIR / "uploads" / "imports"
+SESSION_FILE = "session.json"
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+MIN_CHUNK_SIZE = 256 * 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+# Sessions are removed this long after they were last touched.
+STALE_AFTER = 7 * 24 * 3600
+
+_SESSION_ID_LENGTH = 32
+
+
+class ChunkError(ValueError):
+    pass
+
+
+def _session_dir(session_id: str) -> Path:
+    if len(session_id) != _SESSION_ID_LENGTH or not session_id.isalnum():
+        raise LookupError("Import session not found.")
+    return SESSIONS_DIR / session_id
+
+
+def _load(session_id: str) -> dict:
+    path = _session_dir(session_id) / SESSION_FILE
+    if not path.exists():
+        raise LookupError("Import session not found.")
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save(session: dict):
+    write_atomic(_session_dir(session["sessionId"]) / SESSION_FILE, json.dumps(session, indent=2))
+
+
+def _file(session: dict, file_id: str) -> dict:
+    for entry in session["files"]:
+        if entry["fileId"] == file_id:
+            return entry
+    raise LookupError("File not found in this import session.")
+
+
+def _received(session_id: str, file_id: str) -> Set[int]:
+    path = _session_dir(session_id) / f"{file_id}.chunks"
+    if not path.exists():
+        return set()
+    with open(path, 'r', encoding='utf-8') as f:
+        return {int(line) for line in f if line.strip().isdigit()}
+
+
+def _chunk_length(entry: dict, chunk_size: int, index: int) -> int:
+    return min(chunk_size, entry["size"] - index * chunk_size)
+
+
+async def create_session(spot_names: List[str], files: List[dict], chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
+    """
+    Opens an import of `files` ({name, size, sha256?}) into every spot in
+    `spot_names`. Raises FileNotFoundError for an unknown spot and
+    ValueError for an invalid file list.
+    """
+    for spot_name in spot_names:
+        if not spot_store.spot_exists(slugify(spot_name)):
+            raise FileNotFoundError(f"Data file for spot '{spot_name}' not found.")
+    if not MIN_CHUNK_SIZE <= chunk_size <= MAX_CHUNK_SIZE:
+        raise ValueError(f"chunk_size must be between {MIN_CHUNK_SIZE} and {MAX_CHUNK_SIZE} bytes.")
+
+    names = set()
+    entries = []
+    for i, file in enumerate(files):
+        name = Path(file["name"]).name
+        if name in ("", ".", "..") or name in names:
+            raise ValueError(f"Invalid or repeated file name '{file['name']}'.")
+        names.add(name)
+        entries.append({
+            "fileId": str(i), "name": name, "size": file["size"],
+            "sha256": (file.get("sha256") or "").lower() or None,
+            "chunks": max(1, -(-file["size"] // chunk_size)),
+            "status": "uploading", "paths": [],
+        })
+
+    session_id = uuid.uuid4().hex
+    directory = _session_dir(session_id)
+    directory.mkdir(parents=True)
+    session = {
+        "sessionId": session_id, "createdAt": datetime.now().isoformat(),
+        "spotNames": spot_names, "dateFolder": datetime.now().strftime("%y%m%d"),
+        "chunkSize": chunk_size, "status": "uploading", "files": entries,
+    }
+    for entry in entries:
+        if entry["sha256"] and blob_store.exists(entry["sha256"]):
+            await asyncio.to_thread(_place, session, entry, entry["sha256"])
+            entry["deduplicated"] = True
+        else:
+            with open(directory / f"{entry['fileId']}.part", 'wb') as f:
+                f.truncate(entry["size"])
+    await _finish_if_done(session)
+    await asyncio.to_thread(_save, session)
+    return status(session_id)
+
+
+def status(session_id: str) -> dict:
+    """The session manifest, with the chunk numbers each unfinished file is still missing."""
+    session = _load(session_id)
+    for entry in session["files"]:
+        if entry["status"] == "complete":
+            entry["missingChunks"] = []
+        else:
+            received = _received(session_id, entry["fileId"])
+            entry["missingChunks"] = [i for i in range(entry["chunks"]) if i not in received]
+    return session
+
+
+async def write_chunk(session_id: str, file_id: str, index: int, body: AsyncIterator[bytes],
+                      sha256: Optional[str] = None) -> dict:
+    """
+    Streams one chunk into its file at the chunk's offset, hashing as it
+    goes. The chunk is recorded only once its length (and, if given, its
+    SHA-256) match and it has been fsynced. The request that completes a
+    file also verifies and places it; the one that completes the session
+    logs the import on each spot.
+    """
+    session = _load(session_id)
+    entry = _file(session, file_id)
+    if entry["status"] == "placing":
+        session = await resume(session_id)
+        entry = _file(session, file_id)
+    if entry["status"] == "complete":
+        return {"fileId": file_id, "chunk": index, "fileStatus": "complete", "sessionStatus": session["status"]}
+    if not 0 <= index < entry["chunks"]:
+        raise ChunkError(f"Chunk {index} is out of range for this file.")
+
+    expected = _chunk_length(entry, session["chunkSize"], index)
+    part_path = _session_dir(session_id) / f"{file_id}.part"
+    if not part_path.exists():
+        # A retried chunk arriving after its file was completed and placed.
+        session = _load(session_id)
+        entry = _file(session, file_id)
+        return {"fileId": file_id, "chunk": index, "fileStatus": entry["status"], "sessionStatus": session["status"]}
+    digest = hashlib.sha256()
+    length = 0
+    async with aiofiles.open(part_path, 'r+b') as f:
+        await f.seek(index * session["chunkSize"])
+        async for piece in body:
+            length += len(piece)
+            if length > expected:
+                raise ChunkError(f"Chunk {index} is longer than the expected {expected} bytes.")
+            digest.update(piece)
+            await f.write(piece)
+        await f.flush()
+        await asyncio.to_thread(os.fsync, f.fileno())
+    if length != expected:
+        raise ChunkError(f"Chunk {index} has {length} bytes; expected {expected}.")
+    if sha256 and digest.hexdigest() != sha256.lower():
+        raise ChunkError(f"Chunk {index} does not match its SHA-256.")
+    await append(_session_dir(session_id) / f"{file_id}.chunks", f"{index}\n")
+
+    if len(_received(session_id, file_id)) == entry["chunks"]:
+        async with lock_for(f"import:{session_id}"):
+            session = await _complete_file(session_id, file_id)
+            entry = _file(session, file_id)
+    return {"fileId": file_id, "chunk": index, "fileStatus": entry["status"], "sessionStatus": session["status"]}
+
+
+def _place(session: dict, entry: dict, sha256: str):
+    """Links a stored blob into every spot of the session and marks the file complete."""
+    entry["paths"] = []
+    for spot_name in session["spotNames"]:
+        destination = import_dir(slugify(spot_name), session["dateFolder"]) / entry["name"]
+        blob_store.link(sha256, destination)
+        entry["paths"].append(destination.as_posix())
+    entry["sha256"], entry["status"] = sha256, "complete"
+
+
+async def _finish_if_done(session: dict):
+    if session["status"] == "complete" or any(f["status"] != "complete" for f in session["files"]):
+        return
+    for i, spot_name in enumerate(session["spotNames"]):
+        await record_external_import(
+            slugify(spot_name), [{"path": f["paths"][i], "sha256": f["sha256"]} for f in session["files"]],
+            notes="Resumable bulk import of external media."
+        )
+    session["status"] = "complete"
+    session["completedAt"] = datetime.now().isoformat()
+
+
+async def _complete_file(session_id: str, file_id: str) -> dict:
+    session = _load(session_id)
+    entry = _file(session, file_id)
+    if entry["status"] == "complete":
+        return session
+
+    directory = _session_dir(session_id)
+    part_path = directory / f"{file_id}.part"
+    file_hash = await asyncio.to_thread(blob_store.hash_file, part_path)
+    if entry["sha256"] and file_hash != entry["sha256"]:
+        # Every chunk is suspect; forget them so the client resends the file.
+        (directory / f"{file_id}.chunks").unlink(missing_ok=True)
+        entry["status"] = "hash_mismatch"
+        await asyncio.to_thread(_save, session)
+        return session
+
+    # Recorded before the part file is moved, so a crash mid-placement can be finished from the blob.
+    entry["sha256"], entry["status"] = file_hash, "placing"
+    await asyncio.to_thread(_save, session)
+    return await _finish_placing(session, entry)
+
+
+async def _finish_placing(session: dict, entry: dict) -> dict:
+    directory = _session_dir(session["sessionId"])
+    part_path = directory / f"{entry['fileId']}.part"
+    if part_path.exists():
+        await asyncio.to_thread(blob_store.commit, part_path, entry["sha256"])
+    await asyncio.to_thread(_place, session, entry, entry["sha256"])
+    (directory / f"{entry['fileId']}.chunks").unlink(missing_ok=True)
+    await _finish_if_done(session)
+    await asyncio.to_thread(_save, session)
+    return session
+
+
+async def resume(session_id: str) -> dict:
+    """
+    Finishes files whose placement was interrupted (status "placing"). If
+    neither the part file nor the blob survived, the file is reopened for
+    upload so the client sends it again.
+    """
+    async with lock_for(f"import:{session_id}"):
+        session = _load(session_id)
+        for entry in session["files"]:
+            if entry["status"] != "placing":
+                continue
+            directory = _session_dir(session_id)
+            if (directory / f"{entry['fileId']}.part").exists() or blob_store.exists(entry["sha256"]):
+                session = await _finish_placing(session, entry)
+            else:
+                (directory / f"{entry['fileId']}.chunks").unlink(missing_ok=True)
+                with open(directory / f"{entry['fileId']}.part", 'wb') as f:
+                    f.truncate(entry["size"])
+                entry["status"] = "uploading"
+                await asyncio.to_thread(_save, session)
+        return session
+
+
+def prune_sessions():
+    """Removes import sessions (finished or not) that have not been touched for STALE_AFTER."""
+    if not SESSIONS_DIR.exists():
+        return
+    cutoff = time.time() - STALE_AFTER
+    for directory in SESSIONS_DIR.iterdir():
+        try:
+            last_touched = max((p.stat().st_mtime for p in directory.iterdir()), default=directory.stat().st_mtime)
+        except OSError:
+            continue
+        if last_touched < cutoff:
+            shutil.rmtree(directory, ignore_errors=True)
+            print(f"Removed stale import session '{directory.name}'.")
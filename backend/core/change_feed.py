@@ -0,0 +1,160 @@
+# backend/core/change_feed.py
+import json
+import threading
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .config import DATA_DIR
+from .db import connect
+
+CHANGES_DB = DATA_DIR / "changes.sqlite"
+SITES_DIR = DATA_DIR / "sites"
+
+# One row per record, holding its latest version. Every write takes a new,
+# higher seq, so "everything after cursor N" is a single index range scan.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    record_id TEXT NOT NULL,
+    record TEXT NOT NULL,
+    changed_at TEXT NOT NULL,
+    UNIQUE (kind, record_id)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_lock = threading.RLock()
+_conn = None
+
+
+def _db():
+    global _conn
+    if _conn is None:
+        _conn = connect(CHANGES_DB)
+        _conn.executescript(SCHEMA)
+        # The epoch changes only if the feed is recreated; clients holding a
+        # cursor from another epoch must start again from 0.
+        _conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('epoch', ?)", (uuid.uuid4().hex,))
+        _conn.commit()
+    return _conn
+
+
+def _write(conn, entries: List[tuple]):
+    now = datetime.now().isoformat()
+    for kind, record_id, record in entries:
+        conn.execute("DELETE FROM changes WHERE kind = ? AND record_id = ?", (kind, record_id))
+        conn.execute(
+            "INSERT INTO changes (kind, record_id, record, changed_at) VALUES (?, ?, ?, ?)",
+            (kind, record_id, json.dumps(record, separators=(',', ':')), now),
+        )
+
+
+def record(kind: str, record_id: str, data: dict):
+    """Logs a new or modified record; it is returned to every client whose cursor is older."""
+    with _lock:
+        conn = _db()
+        with conn:
+            _write(conn, [(kind, record_id, data)])
+
+
+def spot_header(spot: dict) -> dict:
+    return {key: value for key, value in spot.items() if key != "observations"}
+
+
+def record_spot(spot: dict):
+    record("spot", spot["spotId"], spot_header(spot))
+
+
+def record_observation(spot_id: str, observation: dict):
+    record("observation", f"{spot_id}/{observation.get('observationId')}", {**observation, "spotId": spot_id})
+
+
+def _read_records(directory, id_field: str) -> List[dict]:
+    records = []
+    for file_path in sorted(directory.glob("*.json")):
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Change feed: skipping unreadable '{file_path}': {e}")
+            continue
+        data.setdefault(id_field, file_path.stem)
+        records.append(data)
+    return records
+
+
+def _changed_at(row) -> float:
+    return datetime.fromisoformat(row["changed_at"]).timestamp()
+
+
+def reconcile(spots: List[dict], route_mtimes: Dict[str, float], read_route: Callable[[str], dict]):
+    """
+    Brings the feed in line with the data on disk, so spots, routes and sites
+    added, changed or removed while the server was down (restores, copied
+    files, migrations) still reach clients syncing from a cursor. Spots and
+    sites are compared by content; a route is only read when its file is new
+    or newer than its entry. Removed records are logged with a null record.
+    """
+    wanted: Dict[Tuple[str, str], Optional[dict]] = {}
+    for spot in spots:
+        wanted[("spot", spot["spotId"])] = spot_header(spot)
+        for observation in spot.get("observations", []):
+            wanted[("observation", f"{spot['spotId']}/{observation.get('observationId')}")] = {**observation, "spotId": spot["spotId"]}
+    for site in _read_records(SITES_DIR, "siteId"):
+        wanted[("site", site["siteId"])] = site
+
+    with _lock:
+        conn = _db()
+        rows = {(row["kind"], row["record_id"]): row for row in conn.execute("SELECT kind, record_id, record, changed_at FROM changes")}
+        entries = [
+            (kind, record_id, record) for (kind, record_id), record in wanted.items()
+            if (kind, record_id) not in rows or json.loads(rows[(kind, record_id)]["record"]) != record
+        ]
+        for route_id, mtime in route_mtimes.items():
+            row = rows.get(("route", route_id))
+            if row is None or row["record"] == "null" or mtime > _changed_at(row):
+                try:
+                    entries.append(("route", route_id, read_route(route_id)))
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"Change feed: skipping unreadable route '{route_id}': {e}")
+        present = set(wanted) | {("route", route_id) for route_id in route_mtimes}
+        entries += [
+            (kind, record_id, None) for (kind, record_id), row in rows.items()
+            if (kind, record_id) not in present and row["record"] != "null"
+        ]
+        with conn:
+            _write(conn, entries)
+    if entries:
+        print(f"Change feed reconciled {len(entries)} record(s) with the data on disk.")
+
+
+def changes_since(since: int, limit: int, kinds: Optional[List[str]] = None) -> dict:
+    """Records changed after `since`, oldest first. Pass the returned cursor as the next `since`."""
+    clauses, params = ["seq > ?"], [since]
+    if kinds:
+        clauses.append(f"kind IN ({', '.join('?' * len(kinds))})")
+        params += kinds
+    with _lock:
+        conn = _db()
+        epoch = conn.execute("SELECT value FROM meta WHERE key = 'epoch'").fetchone()["value"]
+        rows = conn.execute(
+            f"SELECT seq, kind, record_id, record FROM changes WHERE {' AND '.join(clauses)} ORDER BY seq LIMIT ?",
+            params + [limit + 1],
+        ).fetchall()
+        latest = conn.execute("SELECT COALESCE(MAX(seq), 0) AS seq FROM changes").fetchone()["seq"]
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "epoch": epoch,
+        "cursor": rows[-1]["seq"] if has_more else max(latest, since),
+        "hasMore": has_more,
+        "changes": [
+            {"seq": row["seq"], "kind": row["kind"], "id": row["record_id"], "record": json.loads(row["record"])}
+            for row in rows
+        ],
+    }
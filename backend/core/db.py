@@ -0,0 +1,17 @@
+# backend/core/db.py
+import sqlite3
+from pathlib import Path
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    """
+    Opens a SQLite database shared between the event loop and background
+    threads. Callers serialise access with their own lock; WAL keeps readers
+    from blocking while a background scan is writing.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
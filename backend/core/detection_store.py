@@ -0,0 +1,209 @@
+# backend/core/detection_store.py
+import csv
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from .audio_info import parse_recording_timestamp
+from .config import DATA_DIR
+from .db import connect
+from .jobs import add_completion_hook, get_job_dir, iter_completed_jobs
+from .recording_catalog import add_archive_listener, locate_source
+
+DETECTIONS_DB = DATA_DIR / "processing" / "detections.sqlite"
+
+# Scripts whose results.csv is a BirdNET detection table.
+DETECTION_SCRIPTS = ("birdnet_predict",)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS detections (
+    id INTEGER PRIMARY KEY,
+    job_id TEXT NOT NULL,
+    spot TEXT,
+    path TEXT,
+    filename TEXT NOT NULL,
+    common_name TEXT NOT NULL COLLATE NOCASE,
+    scientific_name TEXT COLLATE NOCASE,
+    confidence REAL NOT NULL,
+    start_time REAL,
+    end_time REAL,
+    detected_at TEXT,
+    date TEXT,
+    hour INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_detections_species ON detections (common_name, spot, date, hour);
+CREATE INDEX IF NOT EXISTS idx_detections_scientific ON detections (scientific_name);
+CREATE INDEX IF NOT EXISTS idx_detections_spot ON detections (spot, date, hour);
+CREATE INDEX IF NOT EXISTS idx_detections_date ON detections (date, hour);
+CREATE INDEX IF NOT EXISTS idx_detections_job ON detections (job_id);
+CREATE TABLE IF NOT EXISTS ingested_jobs (
+    job_id TEXT PRIMARY KEY,
+    detections INTEGER NOT NULL,
+    ingested_at TEXT NOT NULL
+);
+"""
+
+GROUP_COLUMNS = {"species": "common_name", "spot": "spot", "date": "date", "hour": "hour"}
+
+_lock = threading.RLock()
+_conn = None
+
+
+def _db():
+    global _conn
+    if _conn is None:
+        _conn = connect(DETECTIONS_DB)
+        _conn.executescript(SCHEMA)
+    return _conn
+
+
+def ingest_job(job_id: str, payload: Optional[dict] = None) -> int:
+    """Appends a completed BirdNET job's results.csv to the store. Re-ingesting a job is a no-op."""
+    results_csv = get_job_dir(job_id) / "results.csv"
+    if payload is None:
+        with open(get_job_dir(job_id) / "payload.json", 'r') as f:
+            payload = json.load(f)
+
+    with _lock:
+        if _db().execute("SELECT 1 FROM ingested_jobs WHERE job_id = ?", (job_id,)).fetchone():
+            return 0
+
+    # Results written before the filepath column existed only carry the file's basename.
+    fallback = {os.path.basename(p): p for p in payload.get("input_files", [])}
+    rows = []
+    if results_csv.exists():
+        with open(results_csv, 'r', newline='', encoding='utf-8') as f:
+            for record in csv.DictReader(f):
+                filename = record.get("filename", "")
+                path, spot = locate_source(record.get("filepath", ""), filename, fallback)
+                start_time = float(record["start_time"]) if record.get("start_time") else None
+                started = parse_recording_timestamp(filename)
+                detected_at = started + timedelta(seconds=start_time or 0) if started else None
+                rows.append((
+                    job_id, spot, path, filename,
+                    record["common_name"], record.get("scientific_name"), float(record["confidence"]),
+                    start_time, float(record["end_time"]) if record.get("end_time") else None,
+                    detected_at.isoformat() if detected_at else None,
+                    detected_at.date().isoformat() if detected_at else None,
+                    detected_at.hour if detected_at else None,
+                ))
+
+    with _lock:
+        conn = _db()
+        conn.executemany(
+            "INSERT INTO detections (job_id, spot, path, filename, common_name, scientific_name, confidence, "
+            "start_time, end_time, detected_at, date, hour) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.execute(
+            "INSERT INTO ingested_jobs (job_id, detections, ingested_at) VALUES (?, ?, ?)",
+            (job_id, len(rows), datetime.now().isoformat()),
+        )
+        conn.commit()
+    return len(rows)
+
+
+def remove_job(job_id: str):
+    with _lock:
+        conn = _db()
+        conn.execute("DELETE FROM detections WHERE job_id = ?", (job_id,))
+        conn.execute("DELETE FROM ingested_jobs WHERE job_id = ?", (job_id,))
+        conn.commit()
+
+
+def _on_job_completed(job_id: str, payload: dict, status_data: dict):
+    if payload.get("script_id") in DETECTION_SCRIPTS:
+        count = ingest_job(job_id, payload)
+        print(f"Job {job_id}: added {count} detection(s) to the detection store.")
+
+
+def backfill():
+    """Ingests completed BirdNET jobs that finished before the store existed or while it was offline."""
+    with _lock:
+        done = {row["job_id"] for row in _db().execute("SELECT job_id FROM ingested_jobs")}
+    for job_id in iter_completed_jobs(DETECTION_SCRIPTS):
+        if job_id in done:
+            continue
+        try:
+            ingest_job(job_id)
+        except Exception as e:
+            print(f"Could not backfill detections from job {job_id}: {e}")
+
+
+def _on_archived(original_path: str, path: str):
+    with _lock:
+        conn = _db()
+        conn.execute("UPDATE detections SET path = ? WHERE path = ?", (path, original_path))
+        conn.commit()
+
+
+def start():
+    add_completion_hook(_on_job_completed)
+    add_archive_listener(_on_archived)
+    threading.Thread(target=backfill, name="detection-backfill", daemon=True).start()
+
+
+def _filters(species, spot, start_date, end_date, hour, min_confidence):
+    clauses, params = [], []
+    if species:
+        clauses.append("(common_name = ? OR scientific_name = ?)")
+        params.extend([species, species])
+    if spot:
+        clauses.append("spot = ?")
+        params.append(spot)
+    if start_date:
+        clauses.append("date >= ?")
+        params.append(start_date)
+    if end_date:
+        clauses.append("date <= ?")
+        params.append(end_date)
+    if hour is not None:
+        clauses.append("hour = ?")
+        params.append(hour)
+    if min_confidence is not None:
+        clauses.append("confidence >= ?")
+        params.append(min_confidence)
+    return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+
+def query(
+    species: Optional[str] = None,
+    spot: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    hour: Optional[int] = None,
+    min_confidence: Optional[float] = None,
+    limit: int = 1000,
+    offset: int = 0,
+) -> List[dict]:
+    where, params = _filters(species, spot, start_date, end_date, hour, min_confidence)
+    with _lock:
+        rows = _db().execute(
+            f"SELECT * FROM detections {where} ORDER BY detected_at, id LIMIT ? OFFSET ?",
+            (*params, limit, offset),
+        )
+        return [dict(row) for row in rows]
+
+
+def summarize(
+    group_by: str,
+    species: Optional[str] = None,
+    spot: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    hour: Optional[int] = None,
+    min_confidence: Optional[float] = None,
+) -> List[dict]:
+    """Detection counts, mean and max confidence grouped by species, spot, date or hour."""
+    column = GROUP_COLUMNS[group_by]
+    where, params = _filters(species, spot, start_date, end_date, hour, min_confidence)
+    with _lock:
+        rows = _db().execute(
+            f"SELECT {column} AS {group_by}, COUNT(*) AS detections, AVG(confidence) AS mean_confidence, "
+            f"MAX(confidence) AS max_confidence FROM detections {where} GROUP BY {column} "
+            f"ORDER BY {'detections DESC' if group_by in ('species', 'spot') else column}",
+            params,
+        )
+        return [dict(row) for row in rows]
@@ -0,0 +1,345 @@
+# backend/core/embedding_index.py
+import csv
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+import numpy as np
+
+from .audio_info import parse_recording_timestamp
+from .config import DATA_DIR
+from .db import connect
+from .jobs import add_completion_hook, get_job_dir, iter_completed_jobs
+from .recording_catalog import add_archive_listener, locate_source
+
+EMBEDDINGS_DIR = DATA_DIR / "processing" / "embeddings"
+VECTORS_FILE = EMBEDDINGS_DIR / "vectors.f16"
+CENTROIDS_FILE = EMBEDDINGS_DIR / "centroids.npy"
+EMBEDDINGS_DB = EMBEDDINGS_DIR / "windows.sqlite"
+
+EMBEDDING_SCRIPTS = ("birdnet_predict",)
+
+# Below MIN_TRAIN vectors every query is an exact scan. Above it, vectors are
+# grouped into ~sqrt(N) k-means clusters (an IVF index) and a query only scans
+# the NPROBE clusters nearest to it. The clustering is retrained whenever the
+# collection has doubled since the last training; in between, new vectors are
+# assigned to their nearest existing centroid.
+MIN_TRAIN = 4096
+TRAIN_SAMPLE = 50000
+KMEANS_ITERATIONS = 12
+NPROBE = 8
+ASSIGN_BLOCK = 65536
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS windows (
+    id INTEGER PRIMARY KEY,
+    job_id TEXT NOT NULL,
+    spot TEXT,
+    path TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    start_time REAL NOT NULL,
+    end_time REAL NOT NULL,
+    recorded_at TEXT,
+    cluster INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_windows_path ON windows (path, start_time);
+CREATE INDEX IF NOT EXISTS idx_windows_job ON windows (job_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ingested_jobs (
+    job_id TEXT PRIMARY KEY,
+    windows INTEGER NOT NULL,
+    ingested_at TEXT NOT NULL
+);
+"""
+
+_lock = threading.RLock()
+_conn = None
+_dim: Optional[int] = None
+_count = 0
+_vectors: Optional[np.memmap] = None
+_centroids: Optional[np.ndarray] = None
+_trained_count = 0
+# Cluster of every stored vector by row id; -1 marks a removed window.
+_assignments = np.empty(0, dtype=np.int32)
+
+
+def _db():
+    global _conn
+    if _conn is None:
+        EMBEDDINGS_DIR.mkdir(parents=True, exist_ok=True)
+        _conn = connect(EMBEDDINGS_DB)
+        _conn.executescript(SCHEMA)
+        _load(_conn)
+    return _conn
+
+
+def _meta(conn, key: str, default=None):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return json.loads(row["value"]) if row else default
+
+
+def _set_meta(conn, key: str, value):
+    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+
+def _load(conn):
+    """Restores the in-memory view, dropping vectors appended by an ingest that never committed."""
+    global _dim, _count, _centroids, _trained_count, _assignments
+    _dim = _meta(conn, "dim")
+    _trained_count = _meta(conn, "trained_count", 0)
+    _count = (conn.execute("SELECT MAX(id) AS last FROM windows").fetchone()["last"] or -1) + 1
+    _count = max(_count, _meta(conn, "count", 0))
+    if _dim and VECTORS_FILE.exists() and VECTORS_FILE.stat().st_size > _count * _dim * 2:
+        with open(VECTORS_FILE, 'r+b') as f:
+            f.truncate(_count * _dim * 2)
+    _assignments = np.full(_count, -1, dtype=np.int32)
+    for row in conn.execute("SELECT id, cluster FROM windows"):
+        _assignments[row["id"]] = row["cluster"]
+    _centroids = np.load(CENTROIDS_FILE) if _trained_count and CENTROIDS_FILE.exists() else None
+    _remap()
+
+
+def _remap():
+    global _vectors
+    _vectors = np.memmap(VECTORS_FILE, dtype='<f2', mode='r', shape=(_count, _dim)) if _count and _dim else None
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _assign(vectors: np.ndarray) -> np.ndarray:
+    if _centroids is None:
+        return np.zeros(len(vectors), dtype=np.int32)
+    return np.argmax(vectors @ _centroids.T, axis=1).astype(np.int32)
+
+
+def _train(conn):
+    """Spherical k-means on a sample of the live vectors, then reassigns every vector."""
+    global _centroids, _trained_count
+    live = np.flatnonzero(_assignments >= 0)
+    rng = np.random.default_rng(0)
+    sample = np.sort(rng.choice(live, size=min(TRAIN_SAMPLE, len(live)), replace=False))
+    data = _normalize(_vectors[sample])
+    k = max(1, int(np.sqrt(len(live))))
+    centroids = data[rng.choice(len(data), size=k, replace=False)]
+    for _ in range(KMEANS_ITERATIONS):
+        labels = np.argmax(data @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, data)
+        empty = np.bincount(labels, minlength=k) == 0
+        sums[empty] = data[rng.choice(len(data), size=int(empty.sum()), replace=False)]
+        centroids = _normalize(sums)
+
+    _centroids = centroids
+    for start in range(0, _count, ASSIGN_BLOCK):
+        block = slice(start, min(start + ASSIGN_BLOCK, _count))
+        alive = _assignments[block] >= 0
+        _assignments[block][alive] = _assign(_normalize(_vectors[block][alive]))
+    conn.executemany("UPDATE windows SET cluster = ? WHERE id = ?",
+                     [(int(_assignments[i]), int(i)) for i in live])
+    tmp_path = CENTROIDS_FILE.with_suffix(".tmp.npy")
+    np.save(tmp_path, centroids)
+    os.replace(tmp_path, CENTROIDS_FILE)
+    _trained_count = len(live)
+    _set_meta(conn, "trained_count", _trained_count)
+    print(f"Embedding index: trained {k} clusters over {len(live)} windows.")
+
+
+def ingest_job(job_id: str, payload: Optional[dict] = None) -> int:
+    """
+    Appends a completed BirdNET job's window embeddings to the vector file
+    and index. Jobs run without embeddings are recorded with zero windows.
+    """
+    global _dim, _count, _assignments
+    job_dir = get_job_dir(job_id)
+    vectors_path = job_dir / "results_embeddings.npy"
+    rows_path = job_dir / "results_embeddings.csv"
+    if payload is None:
+        with open(job_dir / "payload.json", 'r') as f:
+            payload = json.load(f)
+
+    vectors = np.empty((0, 0), dtype=np.float16)
+    records = []
+    if vectors_path.exists() and rows_path.exists():
+        vectors = np.load(vectors_path)
+        with open(rows_path, 'r', newline='', encoding='utf-8') as f:
+            records = list(csv.DictReader(f))
+    if len(records) != len(vectors):
+        raise ValueError(f"{len(vectors)} embeddings but {len(records)} window rows")
+
+    with _lock:
+        conn = _db()
+        if conn.execute("SELECT 1 FROM ingested_jobs WHERE job_id = ?", (job_id,)).fetchone():
+            return 0
+        if len(vectors):
+            if _dim is None:
+                _dim = int(vectors.shape[1])
+                _set_meta(conn, "dim", _dim)
+            if vectors.shape[1] != _dim:
+                raise ValueError(f"embedding size {vectors.shape[1]} does not match the index ({_dim})")
+
+            normalized = _normalize(vectors)
+            clusters = _assign(normalized)
+            fallback = {os.path.basename(p): p for p in payload.get("input_files", [])}
+            rows = []
+            for i, record in enumerate(records):
+                path, spot = locate_source(record.get("filepath", ""), record["filename"], fallback)
+                path = path or record["filename"]
+                start_time = float(record["start_time"])
+                started = parse_recording_timestamp(record["filename"])
+                recorded_at = (started + timedelta(seconds=start_time)).isoformat() if started else None
+                rows.append((_count + i, job_id, spot, path, record["filename"], start_time,
+                             float(record["end_time"]), recorded_at, int(clusters[i])))
+
+            # Vectors are appended before the rows commit; _load() trims any
+            # tail left behind if the process dies in between.
+            with open(VECTORS_FILE, 'ab') as f:
+                f.write(normalized.astype('<f2').tobytes())
+            conn.executemany(
+                "INSERT INTO windows (id, job_id, spot, path, filename, start_time, end_time, recorded_at, cluster) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows,
+            )
+            _count += len(rows)
+            _set_meta(conn, "count", _count)
+            _assignments = np.concatenate([_assignments, clusters])
+            _remap()
+            live = int(np.count_nonzero(_assignments >= 0))
+            if live >= MIN_TRAIN and live >= 2 * _trained_count:
+                _train(conn)
+        conn.execute(
+            "INSERT INTO ingested_jobs (job_id, windows, ingested_at) VALUES (?, ?, ?)",
+            (job_id, len(records), datetime.now().isoformat()),
+        )
+        conn.commit()
+    return len(records)
+
+
+def remove_job(job_id: str):
+    """Removes a job's windows from search results. Their vectors stay in the file until a rebuild."""
+    with _lock:
+        conn = _db()
+        ids = [row["id"] for row in conn.execute("SELECT id FROM windows WHERE job_id = ?", (job_id,))]
+        _assignments[ids] = -1
+        conn.execute("DELETE FROM windows WHERE job_id = ?", (job_id,))
+        conn.execute("DELETE FROM ingested_jobs WHERE job_id = ?", (job_id,))
+        conn.commit()
+
+
+def _on_job_completed(job_id: str, payload: dict, status_data: dict):
+    if payload.get("script_id") in EMBEDDING_SCRIPTS and payload.get("parameters", {}).get("embeddings"):
+        count = ingest_job(job_id, payload)
+        print(f"Job {job_id}: added {count} window embedding(s) to the similarity index.")
+
+
+def backfill():
+    """Ingests embeddings from completed BirdNET jobs that finished while the server was offline."""
+    with _lock:
+        done = {row["job_id"] for row in _db().execute("SELECT job_id FROM ingested_jobs")}
+    for job_id in sorted(iter_completed_jobs(EMBEDDING_SCRIPTS)):
+        if job_id in done or not (get_job_dir(job_id) / "results_embeddings.npy").exists():
+            continue
+        try:
+            ingest_job(job_id)
+        except Exception as e:
+            print(f"Could not backfill embeddings from job {job_id}: {e}")
+
+
+def _on_archived(original_path: str, path: str):
+    with _lock:
+        conn = _db()
+        conn.execute("UPDATE windows SET path = ? WHERE path = ?", (path, original_path))
+        conn.commit()
+
+
+def start():
+    add_completion_hook(_on_job_completed)
+    add_archive_listener(_on_archived)
+    threading.Thread(target=backfill, name="embedding-backfill", daemon=True).start()
+
+
+def reference_vector(path: str, start_time: float, end_time: Optional[float] = None) -> np.ndarray:
+    """
+    The query vector for a window or clip of an analysed recording: the mean
+    embedding of the stored windows overlapping [start_time, end_time].
+    """
+    end_time = start_time if end_time is None else end_time
+    with _lock:
+        rows = _db().execute(
+            "SELECT id FROM windows WHERE path = ? AND start_time <= ? AND end_time > ? ORDER BY id",
+            (path, end_time, start_time),
+        ).fetchall()
+        if not rows:
+            raise LookupError(f"No embeddings stored for '{path}' at {start_time}s. Run BirdNET with embeddings on it first.")
+        return _normalize(_vectors[[row["id"] for row in rows]].mean(axis=0, dtype=np.float32))
+
+
+def similar(
+    query: np.ndarray,
+    k: int = 20,
+    spot: Optional[str] = None,
+    exclude_path: Optional[str] = None,
+) -> List[dict]:
+    """
+    The k stored windows most similar (cosine) to `query`. Scans only the
+    NPROBE nearest clusters once the index is trained, otherwise every window.
+    """
+    with _lock:
+        conn = _db()
+        if _vectors is None:
+            return []
+        query = _normalize(query)
+        if _centroids is None:
+            candidates = np.flatnonzero(_assignments >= 0)
+        else:
+            probes = np.argsort(_centroids @ query)[::-1][:NPROBE]
+            candidates = np.flatnonzero(np.isin(_assignments, probes))
+        if len(candidates) == 0:
+            return []
+        scores = _vectors[candidates].astype(np.float32) @ query
+
+        # Over-fetch so spot/path filtering still leaves k results, widening
+        # the fetch until it does or the candidates run out.
+        results, seen = [], set()
+        wanted = min(len(candidates), k * 4 if (spot or exclude_path) else k)
+        while True:
+            top = np.argpartition(-scores, wanted - 1)[:wanted] if wanted < len(candidates) else np.arange(wanted)
+            top = [int(i) for i in top[np.argsort(-scores[top])] if int(i) not in seen]
+            seen.update(top)
+            ids = [int(candidates[i]) for i in top]
+            rows = {}
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                rows.update({row["id"]: dict(row) for row in conn.execute(
+                    f"SELECT * FROM windows WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+                )})
+            for i, window_id in zip(top, ids):
+                row = rows.get(window_id)
+                if row is None or (spot and row["spot"] != spot) or (exclude_path and row["path"] == exclude_path):
+                    continue
+                row.pop("cluster")
+                results.append({**row, "similarity": round(float(scores[i]), 4)})
+                if len(results) >= k:
+                    return results
+            if wanted >= len(candidates):
+                return results
+            wanted = min(len(candidates), wanted * 4)
+
+
+def stats() -> dict:
+    with _lock:
+        _db()
+        return {
+            "windows": int(np.count_nonzero(_assignments >= 0)),
+            "stored_vectors": _count,
+            "dimensions": _dim,
+            "clusters": 0 if _centroids is None else len(_centroids),
+            "trained_on": _trained_count,
+        }
@@ -1,14 +1,15 @@
 # backend/core/file_handler.py
-import json
 import re
 import base64
 import os
+import uuid
 from pathlib import Path
 from typing import Optional
-import csv
+import asyncio
 from typing import Dict, Any
 
 from .utils import slugify
+from . import blob_store, image_derivatives, media_store, name_registry, observation_store, recording_catalog, spot_cache, spot_store
 import aiofiles
 from ..core.utils import get_timestamp_filename
 from fastapi import UploadFile; from typing import List; from datetime import datetime;
@@ -17,28 +18,18 @@ from .utils import slugify
 DATA_DIR = Path("data")
 SPOT_DIR = DATA_DIR / "spots"
 
-def init_lookup_file(file_path: Path):
-    if not file_path.exists():
-        with open(file_path, 'w') as f:
-            json.dump([], f)
+async def claim_name(name: str, lookup_file: Path) -> bool:
+    """
+    Adds a name to a lookup file unless it is already taken (case-insensitively).
+    The check and the write happen under one lock, so two devices saving the
+    same new name at once cannot both succeed. Returns False if the name was taken.
+    """
+    return await name_registry.claim(name, lookup_file)
 
 
-async def is_name_unique(name: str, lookup_file: Path) -> bool:
-    async with aiofiles.open(lookup_file, 'r') as f:
-        content = await f.read()
-        existing_names = json.loads(content)
-    return name.lower() not in [n.lower() for n in existing_names]
-
-
-async def add_name_to_lookup(name: str, lookup_file: Path):
-    async with aiofiles.open(lookup_file, 'r+') as f:
-        content = await f.read()
-        existing_names = json.loads(content)
-        if name.lower() not in [n.lower() for n in existing_names]:
-            existing_names.append(name)
-            await f.seek(0)
-            await f.write(json.dumps(existing_names, indent=2))
-            await f.truncate()
+async def release_name(name: str, lookup_file: Path):
+    """Frees a name claimed with claim_name whose spot or route could not be created."""
+    await name_registry.release(name, lookup_file)
 
 
 async def save_media_file_refactored(base64_data: str, spot_name_slug: str) -> Optional[str]:
@@ -76,86 +67,70 @@ async def save_media_file_refactored(base64_data: str, spot_name_slug: str) -> O
         return None
 
 
+async def save_observation_media(media_id: Optional[str], base64_data: Optional[str], spot_name_slug: str) -> Optional[str]:
+    """
+    Stores an observation's image or audio, from an uploaded media id or
+    (older clients) a base64 data URL. Photos get their thumbnails generated
+    in the background.
+    """
+    if media_id:
+        url_path = media_store.attach(media_id, spot_name_slug)
+    else:
+        url_path = await save_media_file_refactored(base64_data, spot_name_slug)
+    if url_path and "/images/" in url_path:
+        image_derivatives.enqueue(url_path)
+    return url_path
+
+
+def import_dir(spot_slug: str, date_str: str) -> Path:
+    return SPOT_DIR / spot_slug / "external_data" / date_str
+
+
+async def record_external_import(spot_slug: str, media: List[dict], notes: str = "Batch import of external media."):
+    """Logs an external_import observation listing the files ({path, sha256}) just placed in a spot's external_data folder."""
+    recording_catalog.index_files([item["path"] for item in media])
+    new_observation = {
+        "observationId": f"ext-{uuid.uuid4().hex}",
+        "timestamp": datetime.now().isoformat(),
+        "type": "external_import",
+        "notes": notes,
+        "media": [
+            {"type": "external", **item} for item in media
+        ]
+    }
+    await spot_store.append_observation(spot_slug, new_observation)
+    data = await asyncio.to_thread(spot_cache.add_observation, spot_slug, new_observation)
+    await record_observation_summary(data, new_observation)
+
+
 async def import_external_files_to_spots(
     files: List[UploadFile],
     spot_names: List[str]
 ) -> dict:
-    base_spots_dir = Path("data/spots")
+    """
+    Streams each uploaded file into the content-addressed blob store once and
+    hard-links it into every selected spot, so content that is already
+    stored (another spot, an earlier import) takes no new space.
+    """
     date_str = datetime.now().strftime("%y%m%d")
-    import_records = {}
-
-    for spot_name in spot_names:
-        spot_slug = slugify(spot_name)
-        spot_dir = base_spots_dir / spot_slug
-        spot_data_file = spot_dir / "_data.json"
-
-        if not spot_data_file.exists():
+    spot_slugs = [slugify(spot_name) for spot_name in spot_names]
+    for spot_name, spot_slug in zip(spot_names, spot_slugs):
+        if not spot_store.spot_exists(spot_slug):
             raise FileNotFoundError(f"Data file for spot '{spot_name}' not found.")
 
-        dest_dir = spot_dir / "external_data" / date_str
-
-        dest_dir.mkdir(parents=True, exist_ok=True)
-
-        imported_file_paths = []
-        for file in files:
-            file_path = dest_dir / file.filename
-            async with aiofiles.open(file_path, 'wb') as out_file:
-                content = await file.read()
-                await out_file.write(content)
-            imported_file_paths.append(str(file_path.as_posix()))
-            await file.seek(0)
-
-        async with aiofiles.open(spot_data_file, mode='r+') as f:
-            content = await f.read()
-            data = json.loads(content)
-            new_observation = {
-                "observationId": f"ext-{int(datetime.now().timestamp())}",
-                "timestamp": datetime.now().isoformat(),
-                "type": "external_import",
-                "notes": "Batch import of external media.",
-                "media": [
-                    {"type": "external", "path": path} for path in imported_file_paths
-                ]
-            }
-            if "observations" not in data:
-                data["observations"] = []
-            data["observations"].append(new_observation)
-            await f.seek(0)
-            await f.truncate()
-            await f.write(json.dumps(data, indent=4))
-
-        await append_to_observations_csv({
-            "observationId": new_observation["observationId"],
-            "spotId": data["spotId"],
-            "spotName": data["name"],
-            "observationTimestamp": new_observation["timestamp"],
-            "latitude": data["latitude"],
-            "longitude": data["longitude"],
-            "observationType": "External Media Import",
-            "description": new_observation.get("notes", ""),
-            "externalMediaPaths": ";".join([media["path"] for media in new_observation["media"]])
-        })
-        import_records[spot_name] = imported_file_paths
-    return import_records
-
-async def append_to_observations_csv(observation_data: Dict[str, Any]):
-    csv_file_path = DATA_DIR / "observations_summary.csv"
-    
-    headers = [
-        "observationId", "spotId", "spotName", "observationTimestamp",
-        "latitude", "longitude", "observationType", "description",
-        "birds", "imagePath", "audioPath", "externalMediaPaths"
-    ]
-
-    row_data = {header: observation_data.get(header, "") for header in headers}
-
-    file_exists = csv_file_path.exists()
-
-    async with aiofiles.open(csv_file_path, mode='a', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=headers)
-        
-        if not file_exists:
-            await f.write(u'\ufeff')
-            await writer.writeheader()
-        
-        await writer.writerow(row_data)
\ No newline at end of file
+    media = {spot_name: [] for spot_name in spot_names}
+    for file in files:
+        staged, sha256 = await asyncio.to_thread(blob_store.write_stream, file.file)
+        await asyncio.to_thread(blob_store.commit, staged, sha256)
+        for spot_name, spot_slug in zip(spot_names, spot_slugs):
+            file_path = import_dir(spot_slug, date_str) / Path(file.filename).name
+            await asyncio.to_thread(blob_store.link, sha256, file_path)
+            media[spot_name].append({"path": str(file_path.as_posix()), "sha256": sha256})
+
+    for spot_name, spot_slug in zip(spot_names, spot_slugs):
+        await record_external_import(spot_slug, media[spot_name])
+    return {spot_name: [item["path"] for item in items] for spot_name, items in media.items()}
+
+async def record_observation_summary(spot_data: Dict[str, Any], observation: Dict[str, Any]):
+    """Indexes a newly saved observation in the observation store (which also backs the CSV export)."""
+    await asyncio.to_thread(observation_store.add, observation_store.summary_row(spot_data, observation))
@@ -0,0 +1,196 @@
+# backend/core/flac_archive.py
+import json
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import soundfile as sf
+
+from . import blob_store, recording_catalog, watch_ingest
+from .config import DATA_DIR, ROOT_DIR
+from .jobs import ACTIVE_JOBS, JOBS_LOCK, STARTING_JOBS
+
+# Archival mode re-encodes imported WAV recordings as lossless FLAC in the
+# background. The FLAC keeps the recording's name apart from the extension,
+# so the recorder timestamp in it still parses, and the catalog maps the old
+# .wav path to the new file for anything that stored it.
+ARCHIVE_CONFIG_FILE = DATA_DIR / "processing" / "archive.json"
+
+# Only recordings untouched for this long are archived, so files that are
+# still being copied or are queued for watch-mode analysis are left alone.
+ARCHIVE_AFTER = 6 * 3600
+SWEEP_INTERVAL = 600
+SWEEP_BATCH = 64
+ARCHIVE_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+BLOCK_FRAMES = 65536
+
+# FLAC stores integer PCM up to 24 bits; float or 32-bit WAVs stay as they are.
+FLAC_SUBTYPES = {"PCM_16": "PCM_16", "PCM_24": "PCM_24", "PCM_S8": "PCM_S8", "PCM_U8": "PCM_S8"}
+
+_lock = threading.RLock()
+_config: Dict[str, object] = {"enabled": False, "archived_files": 0, "original_bytes": 0, "archived_bytes": 0}
+_failed: Dict[str, str] = {}
+_wake = threading.Event()
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+
+def _load_config():
+    if ARCHIVE_CONFIG_FILE.exists():
+        with open(ARCHIVE_CONFIG_FILE, 'r') as f:
+            _config.update(json.load(f))
+
+
+def _save_config():
+    ARCHIVE_CONFIG_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = ARCHIVE_CONFIG_FILE.with_suffix(".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(_config, f, indent=4)
+    os.replace(tmp_path, ARCHIVE_CONFIG_FILE)
+
+
+def transcode(source: str, destination: str) -> str:
+    """
+    Encodes a WAV as FLAC with the same sample format, then decodes both and
+    checks every sample matches before returning the FLAC's SHA-256. Runs in
+    a worker process; memory use is a few blocks regardless of file length.
+    """
+    with sf.SoundFile(source) as wav:
+        subtype = FLAC_SUBTYPES.get(wav.subtype)
+        if subtype is None:
+            raise ValueError(f"{wav.subtype} audio cannot be stored losslessly as FLAC")
+        with sf.SoundFile(destination, 'w', samplerate=wav.samplerate, channels=wav.channels,
+                          format='FLAC', subtype=subtype) as flac:
+            for block in wav.blocks(blocksize=BLOCK_FRAMES, dtype='int32', always_2d=True):
+                flac.write(block)
+
+    with sf.SoundFile(source) as wav, sf.SoundFile(destination) as flac:
+        if wav.frames != flac.frames:
+            raise ValueError("FLAC frame count differs from the WAV")
+        while True:
+            original = wav.read(BLOCK_FRAMES, dtype='int32', always_2d=True)
+            decoded = flac.read(BLOCK_FRAMES, dtype='int32', always_2d=True)
+            if not np.array_equal(original, decoded):
+                raise ValueError("FLAC does not decode to the original samples")
+            if len(original) == 0:
+                break
+    return blob_store.hash_file(Path(destination))
+
+
+def _candidates() -> List[str]:
+    cutoff = time.time() - ARCHIVE_AFTER
+    paths, offset = [], 0
+    while len(paths) < SWEEP_BATCH:
+        page = recording_catalog.archive_candidates(cutoff, SWEEP_BATCH, offset)
+        offset += len(page)
+        paths += [path for path in page if path not in _failed and not watch_ingest.is_pending(path)]
+        if len(page) < SWEEP_BATCH:
+            break
+    return paths[:SWEEP_BATCH]
+
+
+def _install(rel_path: str, staged: Path, sha256: str) -> bool:
+    """
+    Swaps the WAV for its FLAC, stored in the blob store and linked under the
+    same name. Returns False, changing nothing, while a job is starting or
+    running, since it may be reading the WAV.
+    """
+    wav_path = ROOT_DIR / rel_path
+    flac_path = wav_path.with_suffix(".flac")
+    flac_rel = recording_catalog.relative_path(flac_path)
+    original_bytes = wav_path.stat().st_size
+
+    with JOBS_LOCK:
+        if ACTIVE_JOBS or STARTING_JOBS:
+            return False
+        blob_store.commit(staged, sha256)
+        # Carried over first, so watch mode does not treat the FLAC as a new recording.
+        watch_ingest.carry_over(rel_path, flac_rel)
+        blob_store.link(sha256, flac_path)
+        recording_catalog.record_archived(rel_path, flac_rel)
+        blob_store.remove(wav_path)
+    recording_catalog.scan_directory(wav_path.parent)
+
+    with _lock:
+        _config["archived_files"] += 1
+        _config["original_bytes"] += original_bytes
+        _config["archived_bytes"] += flac_path.stat().st_size
+        _save_config()
+    return True
+
+
+def sweep(pool: ProcessPoolExecutor) -> int:
+    """Archives one batch of eligible recordings; returns how many were converted."""
+    paths = _candidates()
+    if not paths:
+        return 0
+    staged = {path: blob_store.staging_path() for path in paths}
+    futures = {path: pool.submit(transcode, str(ROOT_DIR / path), str(staged[path]) + ".flac") for path in paths}
+    converted = 0
+    for path, future in futures.items():
+        staged_flac = Path(str(staged[path]) + ".flac")
+        try:
+            sha256 = future.result()
+            if not _install(path, staged_flac, sha256):
+                # A job started while encoding and may be reading this WAV; retry on a later sweep.
+                staged_flac.unlink(missing_ok=True)
+                continue
+            converted += 1
+        except Exception as e:
+            staged_flac.unlink(missing_ok=True)
+            _failed[path] = str(e)
+            print(f"Archive: could not convert '{path}' to FLAC: {e}")
+    return converted
+
+
+def _run():
+    with ProcessPoolExecutor(max_workers=ARCHIVE_WORKERS) as pool:
+        while not _stop.is_set():
+            _wake.wait(timeout=SWEEP_INTERVAL)
+            _wake.clear()
+            if _stop.is_set() or not _config["enabled"] or ACTIVE_JOBS or STARTING_JOBS:
+                continue
+            try:
+                if sweep(pool):
+                    _wake.set()
+            except Exception as e:
+                print(f"Archive: sweep failed: {e}")
+
+
+def status() -> dict:
+    with _lock:
+        return {**_config, "failed": dict(_failed)}
+
+
+def set_enabled(enabled: bool) -> dict:
+    with _lock:
+        _config["enabled"] = enabled
+        _save_config()
+    if enabled:
+        _wake.set()
+    return status()
+
+
+def run_now():
+    """Starts a sweep straight away instead of waiting for the next interval."""
+    _failed.clear()
+    _wake.set()
+
+
+def start():
+    global _thread
+    _load_config()
+    _stop.clear()
+    _thread = threading.Thread(target=_run, name="flac-archive", daemon=True)
+    _thread.start()
+    if _config["enabled"]:
+        _wake.set()
+
+
+def stop():
+    _stop.set()
+    _wake.set()
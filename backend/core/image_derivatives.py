@@ -0,0 +1,162 @@
+# backend/core/image_derivatives.py
+import hashlib
+import json
+import os
+import queue
+import shutil
+import threading
+from pathlib import Path
+from typing import Optional
+
+from PIL import Image, ImageOps, features
+
+from .config import DATA_DIR
+
+SPOTS_DIR = DATA_DIR / "spots"
+DERIVATIVES_DIR = DATA_DIR / "processing" / "thumbnails"
+
+# Longest edge in pixels for each derivative size.
+SIZES = {"thumb": 256, "preview": 1280}
+if features.check("webp"):
+    FORMAT, MEDIA_TYPE, EXTENSION = "WEBP", "image/webp", "webp"
+    SAVE_OPTIONS = {"quality": 80, "method": 4}
+else:
+    FORMAT, MEDIA_TYPE, EXTENSION = "JPEG", "image/jpeg", "jpg"
+    SAVE_OPTIONS = {"quality": 80, "optimize": True}
+# Derivatives are evicted least-recently-viewed first once the cache exceeds this.
+CACHE_BYTES = 512 * 1024 ** 2
+# The cache size is checked after this many new builds rather than after each one.
+EVICT_EVERY = 50
+
+_queue: "queue.Queue[str]" = queue.Queue()
+_thread: Optional[threading.Thread] = None
+_locks: dict = {}
+_locks_guard = threading.Lock()
+_evict_lock = threading.Lock()
+_builds_since_evict = 0
+
+
+def resolve_image(url_path: str) -> Path:
+    """Maps an observation's imagePath (/data/spots/<spot>/images/<file>) to the file, refusing anything else."""
+    rel = url_path.split("?")[0].lstrip("/")
+    if rel.startswith("data/"):
+        rel = rel[len("data/"):]
+    path = Path(os.path.abspath(DATA_DIR / rel))
+    if not path.is_relative_to(SPOTS_DIR) or path.parent.name != "images" or not path.is_file():
+        raise FileNotFoundError(f"Image '{url_path}' not found.")
+    return path
+
+
+def _cache_dir(source: Path) -> Path:
+    return DERIVATIVES_DIR / hashlib.sha1(source.as_posix().encode("utf-8")).hexdigest()
+
+
+def _lock_for(key: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(key, threading.Lock())
+
+
+def _current(cache_dir: Path, stat: os.stat_result) -> bool:
+    meta_path = cache_dir / "meta.json"
+    if not meta_path.exists():
+        return False
+    with open(meta_path, 'r') as f:
+        meta = json.load(f)
+    return meta["size"] == stat.st_size and meta["mtime"] == stat.st_mtime
+
+
+def _build(source: Path, cache_dir: Path, stat: os.stat_result):
+    """Decodes the photo once and writes every derivative size, each no larger than the original."""
+    tmp_dir = cache_dir.with_name(cache_dir.name + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    with Image.open(source) as image:
+        # JPEG can decode straight at a reduced scale, which avoids a full-size decode.
+        image.draft("RGB", (max(SIZES.values()),) * 2)
+        image = ImageOps.exif_transpose(image)
+        image = image.convert("RGBA" if FORMAT == "WEBP" and "A" in image.getbands() else "RGB")
+        for name, edge in sorted(SIZES.items(), key=lambda item: -item[1]):
+            image.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+            image.save(tmp_dir / f"{name}.{EXTENSION}", FORMAT, **SAVE_OPTIONS)
+    with open(tmp_dir / "meta.json", 'w') as f:
+        json.dump({"source": source.as_posix(), "size": stat.st_size, "mtime": stat.st_mtime}, f)
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.replace(tmp_dir, cache_dir)
+
+
+def ensure(source: Path) -> Path:
+    """The derivative directory for a photo, (re)built if missing or older than the photo."""
+    global _builds_since_evict
+    stat = source.stat()
+    cache_dir = _cache_dir(source)
+    with _lock_for(str(cache_dir)):
+        if _current(cache_dir, stat):
+            return cache_dir
+        _build(source, cache_dir, stat)
+    _builds_since_evict += 1
+    if _builds_since_evict >= EVICT_EVERY:
+        _builds_since_evict = 0
+        evict()
+    return cache_dir
+
+
+def get(url_path: str, size: str) -> Path:
+    """Path of a photo's derivative at `size` ("thumb" or "preview"), generating it if needed."""
+    if size not in SIZES:
+        raise ValueError(f"Unknown size '{size}'.")
+    cache_dir = ensure(resolve_image(url_path))
+    path = cache_dir / f"{size}.{EXTENSION}"
+    os.utime(cache_dir / "meta.json")  # marks the derivatives as recently viewed for eviction
+    return path
+
+
+def enqueue(url_path: Optional[str]):
+    """Schedules derivatives for a newly saved photo; a no-op for anything that is not a spot image."""
+    if url_path:
+        _queue.put(url_path)
+
+
+def evict(max_bytes: int = CACHE_BYTES):
+    """Deletes least-recently-viewed derivatives until the cache fits in `max_bytes`."""
+    with _evict_lock:
+        if not DERIVATIVES_DIR.exists():
+            return
+        entries = []
+        for cache_dir in DERIVATIVES_DIR.iterdir():
+            meta_path = cache_dir / "meta.json"
+            if cache_dir.name.endswith(".tmp") or not meta_path.exists():
+                continue
+            size = sum(f.stat().st_size for f in cache_dir.iterdir())
+            entries.append((meta_path.stat().st_mtime, size, cache_dir))
+        total = sum(size for _, size, _ in entries)
+        for _, size, cache_dir in sorted(entries):
+            if total <= max_bytes:
+                break
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            total -= size
+
+
+def _backfill():
+    """Queues every existing spot photo; ones whose derivatives are current are skipped cheaply."""
+    for path in sorted(SPOTS_DIR.glob("*/images/*")):
+        _queue.put("/data/" + path.relative_to(DATA_DIR).as_posix())
+
+
+def _run():
+    while True:
+        url_path = _queue.get()
+        try:
+            ensure(resolve_image(url_path))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Thumbnails: could not process '{url_path}': {e}")
+
+
+def start():
+    """Starts the background generator and backfills derivatives for photos saved before it existed."""
+    global _thread
+    if _thread is None:
+        _thread = threading.Thread(target=_run, name="image-derivatives", daemon=True)
+        _thread.start()
+        threading.Thread(target=_backfill, name="image-derivatives-backfill", daemon=True).start()
@@ -0,0 +1,286 @@
+# backend/core/index_store.py
+import csv
+import json
+import math
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from .audio_info import parse_recording_timestamp
+from .config import DATA_DIR
+from .db import connect
+from .jobs import add_completion_hook, get_job_dir, iter_completed_jobs
+from .recording_catalog import add_archive_listener, locate_source
+
+INDICES_DB = DATA_DIR / "processing" / "indices.sqlite"
+
+# Scripts whose results.csv holds one row of acoustic indices per segment.
+INDEX_SCRIPTS = ("acoustic_indices",)
+INDEX_NAMES = ("ADI", "ACI", "AEI", "NDSI", "MFC", "CLS")
+
+# Every rollup row keeps count, sum, min and max, so buckets can be merged
+# exactly (a day is the merge of its hours, a diel curve the merge of months).
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS segments (
+    path TEXT NOT NULL,
+    segment INTEGER NOT NULL,
+    job_id TEXT NOT NULL,
+    spot TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    hour_start TEXT NOT NULL,
+    {", ".join(f"{name} REAL" for name in INDEX_NAMES)},
+    PRIMARY KEY (path, segment)
+);
+CREATE INDEX IF NOT EXISTS idx_segments_job ON segments (job_id);
+CREATE INDEX IF NOT EXISTS idx_segments_bucket ON segments (spot, hour_start);
+CREATE TABLE IF NOT EXISTS hourly (
+    spot TEXT NOT NULL, index_name TEXT NOT NULL, bucket TEXT NOT NULL,
+    n INTEGER NOT NULL, total REAL NOT NULL, minimum REAL NOT NULL, maximum REAL NOT NULL,
+    PRIMARY KEY (spot, index_name, bucket)
+);
+CREATE TABLE IF NOT EXISTS daily (
+    spot TEXT NOT NULL, index_name TEXT NOT NULL, bucket TEXT NOT NULL,
+    n INTEGER NOT NULL, total REAL NOT NULL, minimum REAL NOT NULL, maximum REAL NOT NULL,
+    PRIMARY KEY (spot, index_name, bucket)
+);
+CREATE TABLE IF NOT EXISTS diel (
+    spot TEXT NOT NULL, index_name TEXT NOT NULL, month TEXT NOT NULL, hour INTEGER NOT NULL,
+    n INTEGER NOT NULL, total REAL NOT NULL, minimum REAL NOT NULL, maximum REAL NOT NULL,
+    PRIMARY KEY (spot, index_name, month, hour)
+);
+CREATE TABLE IF NOT EXISTS ingested_jobs (
+    job_id TEXT PRIMARY KEY,
+    segments INTEGER NOT NULL,
+    ingested_at TEXT NOT NULL
+);
+"""
+
+MERGE = "n = n + excluded.n, total = total + excluded.total, " \
+        "minimum = MIN(minimum, excluded.minimum), maximum = MAX(maximum, excluded.maximum)"
+
+_lock = threading.RLock()
+_conn = None
+
+
+def _db():
+    global _conn
+    if _conn is None:
+        _conn = connect(INDICES_DB)
+        _conn.executescript(SCHEMA)
+    return _conn
+
+
+def _accumulate(buckets: dict, key: tuple, value: float):
+    stats = buckets.get(key)
+    if stats is None:
+        buckets[key] = [1, value, value, value]
+    else:
+        stats[0] += 1
+        stats[1] += value
+        stats[2] = min(stats[2], value)
+        stats[3] = max(stats[3], value)
+
+
+def _merge_rollups(conn, segments: Iterable[tuple]):
+    """Folds (spot, started_at, values) tuples into the hourly, daily and diel rollups."""
+    hourly, daily, diel = {}, {}, {}
+    for spot, started_at, values in segments:
+        for name, value in values.items():
+            _accumulate(hourly, (spot, name, started_at.strftime("%Y-%m-%dT%H:00")), value)
+            _accumulate(daily, (spot, name, started_at.date().isoformat()), value)
+            _accumulate(diel, (spot, name, started_at.strftime("%Y-%m"), started_at.hour), value)
+
+    for table, buckets, key_columns in (
+        ("hourly", hourly, "spot, index_name, bucket"),
+        ("daily", daily, "spot, index_name, bucket"),
+        ("diel", diel, "spot, index_name, month, hour"),
+    ):
+        placeholders = ", ".join("?" * (len(key_columns.split(",")) + 4))
+        conn.executemany(
+            f"INSERT INTO {table} ({key_columns}, n, total, minimum, maximum) VALUES ({placeholders}) "
+            f"ON CONFLICT ({key_columns}) DO UPDATE SET {MERGE}",
+            [(*key, *stats) for key, stats in buckets.items()],
+        )
+
+
+def _segment_values(record: dict) -> Dict[str, float]:
+    values = {}
+    for name in INDEX_NAMES:
+        try:
+            value = float(record.get(name, ""))
+        except ValueError:
+            continue
+        if math.isfinite(value):
+            values[name] = value
+    return values
+
+
+def ingest_job(job_id: str, payload: Optional[dict] = None) -> int:
+    """
+    Adds a completed acoustic-indices job's segments to the store and its
+    rollups. A segment (file + segment number) already stored by another job
+    is not counted twice; re-ingesting a job is a no-op.
+    """
+    results_csv = get_job_dir(job_id) / "results.csv"
+    if payload is None:
+        with open(get_job_dir(job_id) / "payload.json", 'r') as f:
+            payload = json.load(f)
+
+    with _lock:
+        if _db().execute("SELECT 1 FROM ingested_jobs WHERE job_id = ?", (job_id,)).fetchone():
+            return 0
+
+    parameters = payload.get("parameters", {})
+    stride = float(parameters.get("segment_duration", 120.0)) + float(parameters.get("skip_duration", 60.0))
+    # Results written before the Filepath column existed only carry the file's basename.
+    fallback = {os.path.basename(p): p for p in payload.get("input_files", [])}
+
+    rows = []
+    if results_csv.exists():
+        with open(results_csv, 'r', newline='', encoding='utf-8') as f:
+            for record in csv.DictReader(f):
+                filename = record.get("Filename", "")
+                path, spot = locate_source(record.get("Filepath", ""), filename, fallback)
+                path = path or filename
+                started = parse_recording_timestamp(filename)
+                if spot is None or started is None:
+                    continue
+                segment = int(record.get("Segment") or 1)
+                started_at = started + timedelta(seconds=(segment - 1) * stride)
+                rows.append((path, segment, spot, started_at, _segment_values(record)))
+
+    with _lock:
+        conn = _db()
+        added = []
+        for path, segment, spot, started_at, values in rows:
+            cursor = conn.execute(
+                f"INSERT OR IGNORE INTO segments (path, segment, job_id, spot, started_at, hour_start, "
+                f"{', '.join(INDEX_NAMES)}) VALUES (?, ?, ?, ?, ?, ?, {', '.join('?' * len(INDEX_NAMES))})",
+                (path, segment, job_id, spot, started_at.isoformat(), started_at.strftime("%Y-%m-%dT%H:00"),
+                 *(values.get(name) for name in INDEX_NAMES)),
+            )
+            if cursor.rowcount:
+                added.append((spot, started_at, values))
+        _merge_rollups(conn, added)
+        conn.execute(
+            "INSERT INTO ingested_jobs (job_id, segments, ingested_at) VALUES (?, ?, ?)",
+            (job_id, len(added), datetime.now().isoformat()),
+        )
+        conn.commit()
+    return len(added)
+
+
+def remove_job(job_id: str):
+    """Drops a job's segments and rebuilds just the rollup buckets they fell into."""
+    with _lock:
+        conn = _db()
+        affected = conn.execute(
+            "SELECT DISTINCT spot, substr(hour_start, 1, 7) AS month FROM segments WHERE job_id = ?", (job_id,)
+        ).fetchall()
+        conn.execute("DELETE FROM segments WHERE job_id = ?", (job_id,))
+        conn.execute("DELETE FROM ingested_jobs WHERE job_id = ?", (job_id,))
+        for row in affected:
+            spot, month = row["spot"], row["month"]
+            for table, column in (("hourly", "bucket"), ("daily", "bucket"), ("diel", "month")):
+                conn.execute(f"DELETE FROM {table} WHERE spot = ? AND substr({column}, 1, 7) = ?", (spot, month))
+            remaining = conn.execute(
+                "SELECT * FROM segments WHERE spot = ? AND substr(hour_start, 1, 7) = ?", (spot, month)
+            )
+            _merge_rollups(conn, (
+                (spot, datetime.fromisoformat(r["started_at"]),
+                 {name: r[name] for name in INDEX_NAMES if r[name] is not None})
+                for r in remaining
+            ))
+        conn.commit()
+
+
+def _on_job_completed(job_id: str, payload: dict, status_data: dict):
+    if payload.get("script_id") in INDEX_SCRIPTS:
+        count = ingest_job(job_id, payload)
+        print(f"Job {job_id}: added {count} segment(s) to the acoustic index store.")
+
+
+def backfill():
+    """Ingests completed acoustic-indices jobs that finished before the store existed or while it was offline."""
+    with _lock:
+        done = {row["job_id"] for row in _db().execute("SELECT job_id FROM ingested_jobs")}
+    for job_id in sorted(iter_completed_jobs(INDEX_SCRIPTS)):
+        if job_id in done:
+            continue
+        try:
+            ingest_job(job_id)
+        except Exception as e:
+            print(f"Could not backfill acoustic indices from job {job_id}: {e}")
+
+
+def _on_archived(original_path: str, path: str):
+    with _lock:
+        conn = _db()
+        # A segment already stored under the new path keeps that row; the old one is left as it was.
+        conn.execute("UPDATE OR IGNORE segments SET path = ? WHERE path = ?", (path, original_path))
+        conn.commit()
+
+
+def start():
+    add_completion_hook(_on_job_completed)
+    add_archive_listener(_on_archived)
+    threading.Thread(target=backfill, name="index-backfill", daemon=True).start()
+
+
+def _stats(row) -> dict:
+    return {
+        "count": row["n"], "mean": row["total"] / row["n"],
+        "min": row["minimum"], "max": row["maximum"],
+    }
+
+
+def series(
+    spot: str,
+    index_name: str,
+    resolution: str = "day",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+) -> List[dict]:
+    """
+    Mean/min/max/count of one index per hour, day or month, read straight from
+    the rollups. `start` and `end` are inclusive dates (YYYY-MM-DD).
+    """
+    if resolution == "month":
+        sql = ("SELECT month AS bucket, SUM(n) AS n, SUM(total) AS total, MIN(minimum) AS minimum, "
+               "MAX(maximum) AS maximum FROM diel WHERE spot = ? AND index_name = ? "
+               "AND month >= ? AND month <= ? GROUP BY month ORDER BY month")
+        params = (spot, index_name, (start or "")[:7], (end or "9999-12")[:7])
+    else:
+        table = "hourly" if resolution == "hour" else "daily"
+        sql = (f"SELECT bucket, n, total, minimum, maximum FROM {table} WHERE spot = ? AND index_name = ? "
+               f"AND bucket >= ? AND bucket < ? ORDER BY bucket")
+        params = (spot, index_name, start or "", (end or "9999-12-31") + "~")
+    with _lock:
+        return [{"time": row["bucket"], **_stats(row)} for row in _db().execute(sql, params)]
+
+
+def diel(
+    spot: str,
+    index_name: str,
+    start_month: Optional[str] = None,
+    end_month: Optional[str] = None,
+) -> List[dict]:
+    """The 24-hour profile of one index, merged over an inclusive range of months (YYYY-MM)."""
+    with _lock:
+        rows = _db().execute(
+            "SELECT hour, SUM(n) AS n, SUM(total) AS total, MIN(minimum) AS minimum, MAX(maximum) AS maximum "
+            "FROM diel WHERE spot = ? AND index_name = ? AND month >= ? AND month <= ? GROUP BY hour ORDER BY hour",
+            (spot, index_name, start_month or "", end_month or "9999-12"),
+        )
+        return [{"hour": row["hour"], **_stats(row)} for row in rows]
+
+
+def list_spots() -> List[dict]:
+    """Spots with stored index data and the date range they cover."""
+    with _lock:
+        rows = _db().execute(
+            "SELECT spot, MIN(bucket) AS first_date, MAX(bucket) AS last_date, SUM(n) AS segments "
+            "FROM daily WHERE index_name = ? GROUP BY spot ORDER BY spot", (INDEX_NAMES[0],)
+        )
+        return [dict(row) for row in rows]
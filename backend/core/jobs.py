@@ -0,0 +1,211 @@
+# backend/core/jobs.py
+import os
+import sys
+import json
+import subprocess
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from . import recording_catalog, script_registry
+from .config import BACKEND_DIR, DATA_DIR, ROOT_DIR
+from .prescreen import screen_files
+
+ANALYSIS_DIR = BACKEND_DIR / "analysis"
+JOBS_DIR = DATA_DIR / "processing" / "jobs"
+AUDIO_EXTENSIONS = ('.wav', '.flac')
+
+ACTIVE_JOBS: Dict[str, subprocess.Popen] = {}
+# Jobs whose inputs are being expanded and pre-screened, before their process
+# is in ACTIVE_JOBS. Anything that renames recordings on disk checks both
+# while holding JOBS_LOCK, so no job can pick up a file mid-swap.
+STARTING_JOBS: Set[str] = set()
+JOBS_LOCK = threading.Lock()
+
+# Called as hook(job_id, payload, status_data) after a job completes successfully.
+COMPLETION_HOOKS: List[Callable[[str, dict, dict], None]] = []
+
+
+def add_completion_hook(hook: Callable[[str, dict, dict], None]):
+    COMPLETION_HOOKS.append(hook)
+
+
+def get_job_dir(job_id: str) -> Path:
+    JOBS_DIR.mkdir(parents=True, exist_ok=True)
+    return JOBS_DIR / job_id
+
+
+def create_job(
+    script_id: str,
+    input_files: List[str],
+    parameters: Dict[str, Any],
+    prescreen: Optional[dict] = None,
+    **extra
+) -> Tuple[str, dict]:
+    """
+    Creates the job directory with a 'queued' status file and returns
+    (job_id, payload). `parameters` must already be validated by the script
+    registry, which also turns them into the wrapper's command-line
+    `arguments`; `prescreen` holds PrescreenSettings for skipping junk recordings;
+    `extra` is stored on both the payload and the status (e.g. the trigger
+    and spot of a watch-folder run).
+    """
+    job_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.urandom(4).hex()}"
+    job_dir = get_job_dir(job_id)
+    job_dir.mkdir(parents=True, exist_ok=True)
+
+    payload = {
+        "script_id": script_id, "input_files": input_files, "parameters": parameters,
+        "arguments": script_registry.command_arguments(script_id, parameters), **extra,
+    }
+    if prescreen is not None:
+        payload['prescreen'] = prescreen
+    payload['job_id'] = job_id
+    payload['submitted_at'] = datetime.now().isoformat()
+
+    initial_status = {
+        "job_id": job_id, "script_id": script_id,
+        "submitted_at": payload['submitted_at'], "status": "queued", **extra
+    }
+    with open(job_dir / "results.json", 'w') as f:
+        json.dump(initial_status, f, indent=4)
+    return job_id, payload
+
+
+def iter_completed_jobs(script_ids) -> List[str]:
+    """IDs of completed jobs for the given scripts, read from their status files."""
+    job_ids = []
+    if not JOBS_DIR.exists():
+        return job_ids
+    for job_dir in JOBS_DIR.iterdir():
+        try:
+            with open(job_dir / "results.json", 'r') as f:
+                status = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        if status.get("script_id") in script_ids and status.get("status") == "completed":
+            job_ids.append(job_dir.name)
+    return job_ids
+
+
+def _glob_recordings(directory: str) -> List[str]:
+    """Recordings under a directory found by walking it, in the same relative or absolute form as `directory`."""
+    found = []
+    for extension in AUDIO_EXTENSIONS:
+        for path in (ROOT_DIR / directory).rglob(f"*{extension}"):
+            found.append((Path(directory) / path.relative_to(ROOT_DIR / directory)).as_posix())
+    return found
+
+
+def expand_input_sources(sources: List[str]) -> List[str]:
+    """
+    Expands selected directories to the recordings inside them. A directory
+    under data/spots is rescanned first (only subdirectories whose mtime
+    changed are listed again), so files that arrived since the last poll, or
+    before the startup sync reached them, are included; its recordings are
+    then read from the catalog. Other directories are walked.
+    """
+    files = []
+    for source in sources:
+        source = Path(source).as_posix()
+        directory = Path(os.path.abspath(ROOT_DIR / source))
+        if directory.is_dir():
+            if directory.is_relative_to(recording_catalog.SPOTS_DIR):
+                recording_catalog.scan_directory(directory)
+                files.extend(recording_catalog.list_paths_under(recording_catalog.relative_path(directory)))
+            else:
+                files.extend(sorted(set(_glob_recordings(source))))
+        elif not directory.exists():
+            files.append(recording_catalog.resolve(source))
+        else:
+            files.append(source)
+    return files
+
+
+def _prescreen_inputs(job_dir: Path, payload: dict) -> List[dict]:
+    """Drops silent, clipped and corrupt recordings from the payload before the wrapper is spawned."""
+    input_files = expand_input_sources(payload['input_files'])
+    kept, skipped = screen_files(input_files, payload['prescreen'])
+    payload['input_files'] = kept
+    if skipped:
+        with open(job_dir / "prescreen_skipped.json", 'w') as f:
+            json.dump(skipped, f, indent=4)
+        print(f"Job {job_dir.name}: pre-screen skipped {len(skipped)} of {len(input_files)} file(s).")
+    return skipped
+
+
+def run_job_process(job_id: str, payload: dict) -> dict:
+    """This function runs in the background and executes the correct wrapper script."""
+    job_dir = get_job_dir(job_id)
+    payload_path = job_dir / "payload.json"
+    results_path = job_dir / "results.json"
+    stdout_path = job_dir / "stdout.log"
+    stderr_path = job_dir / "stderr.log"
+
+    script_id = payload.get("script_id")
+    script_dir = ANALYSIS_DIR / script_id
+    wrapper_path = script_dir / "wrapper.py"
+
+    output_file_path = job_dir / "results.csv"
+    payload['output_file'] = str(output_file_path)
+
+    with JOBS_LOCK:
+        STARTING_JOBS.add(job_id)
+    try:
+        skipped = []
+        if payload.get('prescreen', {}).get('enabled'):
+            skipped = _prescreen_inputs(job_dir, payload)
+
+        with open(payload_path, 'w') as f:
+            json.dump(payload, f, indent=4)
+
+        with open(results_path, 'r+') as f:
+            status_data = json.load(f)
+            if skipped:
+                status_data['skipped_files'] = len(skipped)
+            if payload.get('prescreen', {}).get('enabled') and not payload['input_files']:
+                status_data['status'] = 'failed'
+                status_data['message'] = "No input files left to analyse after the pre-screen (silent, clipped, too short or unreadable)."
+            else:
+                status_data['status'] = 'running'
+            f.seek(0)
+            f.truncate()
+            json.dump(status_data, f, indent=4)
+        if status_data['status'] == 'failed':
+            return status_data
+
+        command = [sys.executable, str(wrapper_path), str(payload_path)]
+
+        with open(stdout_path, 'w') as stdout_file, open(stderr_path, 'w') as stderr_file:
+            process = subprocess.Popen(command, stdout=stdout_file, stderr=stderr_file, text=True)
+            with JOBS_LOCK:
+                ACTIVE_JOBS[job_id] = process
+                STARTING_JOBS.discard(job_id)
+            process.wait()
+    finally:
+        with JOBS_LOCK:
+            STARTING_JOBS.discard(job_id)
+
+    if job_id in ACTIVE_JOBS:
+        del ACTIVE_JOBS[job_id]
+
+    with open(results_path, 'r+') as f:
+        status_data = json.load(f)
+        if process.returncode == 0:
+            status_data['status'] = 'completed'
+            status_data['output_file'] = str(output_file_path) # Add output file path on success
+        else:
+            status_data['status'] = 'failed'
+            status_data['message'] = f"Process exited with code {process.returncode}"
+        f.seek(0)
+        f.truncate()
+        json.dump(status_data, f, indent=4)
+
+    if status_data['status'] == 'completed':
+        for hook in COMPLETION_HOOKS:
+            try:
+                hook(job_id, payload, status_data)
+            except Exception as e:
+                print(f"Job {job_id}: completion hook {hook.__module__}.{hook.__name__} failed: {e}")
+    return status_data
@@ -0,0 +1,113 @@
+# backend/core/media_store.py
+import os
+import re
+import time
+import uuid
+from typing import Optional
+
+import aiofiles
+from fastapi import UploadFile
+
+from .config import DATA_DIR
+from .utils import get_timestamp_filename
+
+UPLOADS_DIR = DATA_DIR / "uploads"
+SPOTS_DIR = DATA_DIR / "spots"
+
+# Uploads are copied in chunks of this size, so memory use stays flat
+# however long the recording is.
+CHUNK_SIZE = 1024 * 1024
+MAX_MEDIA_BYTES = 1024 * 1024 * 1024
+# Uploaded media that no observation has claimed after this long is removed.
+STALE_AFTER = 24 * 3600
+
+_MEDIA_ID = re.compile(r"^(image|audio)-[0-9a-f]{32}$")
+
+
+class MediaTooLarge(ValueError):
+    pass
+
+
+def _extension(content_type: str) -> str:
+    subtype = content_type.split('/')[-1].split(';')[0].split('+')[0]
+    return re.sub(r"[^a-z0-9]", "", subtype.lower()) or "bin"
+
+
+def _staged(media_id: str):
+    if not _MEDIA_ID.match(media_id or ""):
+        raise LookupError(f"Unknown media id '{media_id}'.")
+    for path in UPLOADS_DIR.glob(f"{media_id}.*"):
+        if path.suffix != ".part":
+            return path
+    raise LookupError(f"Unknown media id '{media_id}'.")
+
+
+async def save_upload(upload: UploadFile) -> dict:
+    """
+    Streams an uploaded image or audio file into the staging area and returns
+    its media id. An observation then claims it with `attach`.
+    """
+    content_type = upload.content_type or ""
+    kind = content_type.split('/')[0]
+    if kind not in ("image", "audio"):
+        raise ValueError("Only image and audio files can be uploaded.")
+
+    UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
+    media_id = f"{kind}-{uuid.uuid4().hex}"
+    final_path = UPLOADS_DIR / f"{media_id}.{_extension(content_type)}"
+    part_path = final_path.with_name(final_path.name + ".part")
+    size = 0
+    try:
+        async with aiofiles.open(part_path, 'wb') as out_file:
+            while chunk := await upload.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_MEDIA_BYTES:
+                    raise MediaTooLarge(f"Media files are limited to {MAX_MEDIA_BYTES // (1024 * 1024)} MB.")
+                await out_file.write(chunk)
+        os.replace(part_path, final_path)
+    except BaseException:
+        part_path.unlink(missing_ok=True)
+        raise
+    return {"mediaId": media_id, "type": kind, "contentType": content_type, "size": size}
+
+
+def attach(media_id: Optional[str], spot_slug: str) -> Optional[str]:
+    """
+    Moves staged media into a spot's images/ or audio/ folder and returns its
+    /data URL. Raises LookupError for an unknown or already attached id.
+    """
+    if not media_id:
+        return None
+    staged = _staged(media_id)
+    kind = media_id.split('-')[0]
+    media_dir = SPOTS_DIR / spot_slug / ("images" if kind == "image" else "audio")
+    media_dir.mkdir(parents=True, exist_ok=True)
+    file_path = media_dir / f"{get_timestamp_filename()}-{media_id[-8:]}{staged.suffix}"
+    os.replace(staged, file_path)
+    return "/data/" + file_path.relative_to(DATA_DIR).as_posix()
+
+
+def detach(media_id: str, url_path: str):
+    """Moves attached media back into the staging area under its id, undoing `attach`."""
+    file_path = DATA_DIR / url_path[len("/data/"):]
+    os.replace(file_path, UPLOADS_DIR / f"{media_id}{file_path.suffix}")
+
+
+def check(media_id: Optional[str]):
+    """Raises LookupError unless `media_id` is empty or refers to staged media."""
+    if media_id:
+        _staged(media_id)
+
+
+def prune_uploads():
+    """Removes staged uploads (and interrupted partial ones) older than STALE_AFTER."""
+    if not UPLOADS_DIR.exists():
+        return
+    cutoff = time.time() - STALE_AFTER
+    removed = 0
+    for path in UPLOADS_DIR.iterdir():
+        if _MEDIA_ID.match(path.name.split('.')[0]) and path.stat().st_mtime < cutoff:
+            path.unlink(missing_ok=True)
+            removed += 1
+    if removed:
+        print(f"Removed {removed} unclaimed media upload(s).")
@@ -1,5 +1,6 @@
 # backend/core/models.py
-from pydantic import BaseModel
+from datetime import datetime
+from pydantic import BaseModel, Field
 from typing import List, Optional
 
 class SpotObservation(BaseModel):
@@ -11,11 +12,50 @@ class SpotObservation(BaseModel):
     description: Optional[str] = None
     image_data_url: Optional[str] = None
     audio_data_url: Optional[str] = None
+    # Ids returned by POST /api/media; preferred over the base64 data URLs above.
+    image_media_id: Optional[str] = None
+    audio_media_id: Optional[str] = None
+
+
+class SyncObservation(SpotObservation):
+    # Generated once on the device when the observation is queued and reused
+    # on every retry, so a replayed upload is recognised instead of saved twice.
+    idempotencyKey: str = Field(..., min_length=8, max_length=128)
+    createdAt: Optional[datetime] = None
+
+
+class ObservationBatch(BaseModel):
+    observations: List[SyncObservation] = Field(..., min_length=1, max_length=500)
+
+
+class RoutePoint(BaseModel):
+    lat: float = Field(..., ge=-90, le=90)
+    lng: float = Field(..., ge=-180, le=180)
+    # Milliseconds since the epoch, as reported with the GPS fix.
+    time: Optional[int] = None
 
 
 class RouteData(BaseModel):
     name: Optional[str] = None
-    points: List[dict]
+    points: List[RoutePoint]
+
+
+class RoutePointBatch(BaseModel):
+    # Index of the batch's first point within the route; lets the server skip
+    # points it already has when a batch is resent.
+    offset: int = Field(..., ge=0)
+    points: List[RoutePoint] = Field(..., max_length=5000)
+
+
+class RouteSessionClose(BaseModel):
+    name: Optional[str] = None
+
+
+class PrescreenSettings(BaseModel):
+    enabled: bool = True
+    min_duration: float = Field(1.0, ge=0)
+    min_rms_dbfs: float = -90.0
+    max_clip_ratio: float = Field(0.05, ge=0, le=1)
 
 
 class AnalysisScript(BaseModel):
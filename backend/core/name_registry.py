@@ -0,0 +1,92 @@
+# backend/core/name_registry.py
+import asyncio
+import json
+from pathlib import Path
+from typing import Dict, List, Set
+
+from . import write_path
+
+# Claimed names are appended to a journal next to the lookup file; every
+# SNAPSHOT_EVERY claims the full list is written back to the lookup file
+# (spot_names.json / route_names.json) and the journal is emptied.
+SNAPSHOT_EVERY = 500
+
+_names: Dict[str, List[str]] = {}
+_folded: Dict[str, Set[str]] = {}
+_journal_lengths: Dict[str, int] = {}
+
+
+def journal_path(lookup_file: Path) -> Path:
+    return lookup_file.with_suffix(".journal")
+
+
+def _load(lookup_file: Path):
+    key = str(lookup_file)
+    names = []
+    if lookup_file.exists():
+        with open(lookup_file, 'r', encoding='utf-8') as f:
+            names = json.load(f)
+    journal_length, torn = 0, False
+    journal = journal_path(lookup_file)
+    if journal.exists():
+        with open(journal, 'rb') as f:
+            data = f.read()
+        torn = bool(data) and not data.endswith(b"\n")
+        for line in data.splitlines():
+            try:
+                names.append(json.loads(line))
+                journal_length += 1
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                torn = True  # torn line from an interrupted append
+    folded = set()
+    _names[key] = [n for n in names if not (n.casefold() in folded or folded.add(n.casefold()))]
+    _folded[key] = folded
+    _journal_lengths[key] = journal_length
+    if torn:
+        # Rewritten now, or the next append would land on the torn line and be unreadable too.
+        _snapshot(lookup_file)
+
+
+def _ensure_loaded(lookup_file: Path) -> str:
+    key = str(lookup_file)
+    if key not in _folded:
+        _load(lookup_file)
+    return key
+
+
+def _snapshot(lookup_file: Path):
+    key = str(lookup_file)
+    write_path.write_atomic(lookup_file, json.dumps(_names[key], indent=2))
+    write_path.write_atomic(journal_path(lookup_file), "")
+    _journal_lengths[key] = 0
+
+
+async def claim(name: str, lookup_file: Path) -> bool:
+    """
+    Registers a name unless a case-insensitive match exists; O(1) apart from
+    the periodic snapshot. Returns False if the name was already taken.
+    """
+    async with write_path.lock_for(str(lookup_file)):
+        key = await asyncio.to_thread(_ensure_loaded, lookup_file)
+        folded = name.casefold()
+        if folded in _folded[key]:
+            return False
+        await write_path.append(journal_path(lookup_file), json.dumps(name) + "\n")
+        _folded[key].add(folded)
+        _names[key].append(name)
+        _journal_lengths[key] += 1
+        if _journal_lengths[key] >= SNAPSHOT_EVERY:
+            await asyncio.to_thread(_snapshot, lookup_file)
+        return True
+
+
+async def release(name: str, lookup_file: Path):
+    """Gives a claimed name back, e.g. when creating the spot or route it was claimed for failed."""
+    async with write_path.lock_for(str(lookup_file)):
+        key = await asyncio.to_thread(_ensure_loaded, lookup_file)
+        folded = name.casefold()
+        if folded not in _folded[key]:
+            return
+        _folded[key].discard(folded)
+        _names[key] = [n for n in _names[key] if n.casefold() != folded]
+        await asyncio.to_thread(_snapshot, lookup_file)
@@ -0,0 +1,242 @@
+# backend/core/observation_store.py
+import csv
+import io
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from .config import DATA_DIR
+from .db import connect
+
+OBSERVATIONS_DB = DATA_DIR / "observations.sqlite"
+
+# Column order of the observations_summary.csv export (unchanged from the
+# file the server used to append to).
+EXPORT_HEADERS = [
+    "observationId", "spotId", "spotName", "observationTimestamp",
+    "latitude", "longitude", "observationType", "description",
+    "birds", "imagePath", "audioPath", "externalMediaPaths"
+]
+COLUMNS = {
+    "observationId": "observation_id", "spotId": "spot_id", "spotName": "spot_name",
+    "observationTimestamp": "observed_at", "latitude": "latitude", "longitude": "longitude",
+    "observationType": "observation_type", "description": "description", "birds": "birds",
+    "imagePath": "image_path", "audioPath": "audio_path", "externalMediaPaths": "external_media_paths",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    observation_id TEXT NOT NULL,
+    spot_id TEXT NOT NULL,
+    spot_name TEXT,
+    observed_at TEXT,
+    latitude REAL,
+    longitude REAL,
+    observation_type TEXT,
+    description TEXT,
+    birds TEXT,
+    image_path TEXT,
+    audio_path TEXT,
+    external_media_paths TEXT,
+    PRIMARY KEY (spot_id, observation_id)
+);
+CREATE INDEX IF NOT EXISTS idx_observations_spot ON observations (spot_id, observed_at);
+CREATE INDEX IF NOT EXISTS idx_observations_time ON observations (observed_at);
+CREATE INDEX IF NOT EXISTS idx_observations_type ON observations (observation_type, observed_at);
+CREATE TABLE IF NOT EXISTS sync_keys (
+    idempotency_key TEXT PRIMARY KEY,
+    spot_id TEXT NOT NULL,
+    observation_id TEXT NOT NULL,
+    synced_at TEXT NOT NULL
+);
+"""
+
+GROUP_COLUMNS = {"spot": "spot_id", "type": "observation_type", "date": "substr(observed_at, 1, 10)"}
+EXPORT_BATCH = 1000
+
+_lock = threading.RLock()
+_conn = None
+
+
+def _db():
+    global _conn
+    if _conn is None:
+        _conn = connect(OBSERVATIONS_DB)
+        _conn.executescript(SCHEMA)
+    return _conn
+
+
+def _row(observation_data: Dict[str, Any]) -> tuple:
+    return tuple(observation_data.get(header) or None for header in EXPORT_HEADERS)
+
+
+def _insert(conn, rows: List[tuple]):
+    columns = ", ".join(COLUMNS[h] for h in EXPORT_HEADERS)
+    conn.executemany(
+        f"INSERT OR REPLACE INTO observations ({columns}) VALUES ({', '.join('?' * len(EXPORT_HEADERS))})", rows
+    )
+
+
+def add(observation_data: Dict[str, Any]):
+    """Records one observation's summary row (keyed like the CSV export) in its own transaction."""
+    with _lock:
+        conn = _db()
+        with conn:
+            _insert(conn, [_row(observation_data)])
+
+
+def lookup_sync_keys(keys: List[str]) -> Dict[str, dict]:
+    """Idempotency keys that were already synced, mapped to the spot and observation they created."""
+    found = {}
+    with _lock:
+        conn = _db()
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            for row in conn.execute(
+                f"SELECT * FROM sync_keys WHERE idempotency_key IN ({', '.join('?' * len(chunk))})", chunk
+            ):
+                found[row["idempotency_key"]] = {"spotId": row["spot_id"], "observationId": row["observation_id"]}
+    return found
+
+
+def add_synced(observation_rows: List[Dict[str, Any]], idempotency_keys: List[str]):
+    """Records a spot's synced observations and their idempotency keys in one transaction."""
+    now = datetime.now().isoformat()
+    with _lock:
+        conn = _db()
+        with conn:
+            _insert(conn, [_row(data) for data in observation_rows])
+            conn.executemany(
+                "INSERT OR REPLACE INTO sync_keys (idempotency_key, spot_id, observation_id, synced_at) "
+                "VALUES (?, ?, ?, ?)",
+                [(key, data["spotId"], data["observationId"], now)
+                 for key, data in zip(idempotency_keys, observation_rows)],
+            )
+
+
+def summary_row(spot: dict, observation: dict) -> Dict[str, Any]:
+    """The summary fields for an observation as stored in a spot's log."""
+    is_import = observation.get("type") == "external_import"
+    return {
+        "observationId": observation.get("observationId"),
+        "spotId": spot["spotId"],
+        "spotName": spot["name"],
+        "observationTimestamp": observation.get("createdAt") or observation.get("timestamp"),
+        "latitude": spot["latitude"],
+        "longitude": spot["longitude"],
+        "observationType": "External Media Import" if is_import else "Field Observation",
+        "description": observation.get("notes" if is_import else "description", ""),
+        "birds": observation.get("birds", ""),
+        "imagePath": observation.get("imagePath", ""),
+        "audioPath": observation.get("audioPath", ""),
+        "externalMediaPaths": ";".join(m["path"] for m in observation.get("media", [])),
+    }
+
+
+def sync_from_spots(spots: List[dict]):
+    """
+    Re-indexes any spot whose observation count in the store differs from its
+    log, e.g. on first start or after a crash between a log append and the
+    database write.
+    """
+    with _lock:
+        conn = _db()
+        counts = {row["spot_id"]: row["n"] for row in
+                  conn.execute("SELECT spot_id, COUNT(*) AS n FROM observations GROUP BY spot_id")}
+        stale = [spot for spot in spots if counts.get(spot["spotId"], 0) != len(spot.get("observations", []))]
+        with conn:
+            for spot in stale:
+                conn.execute("DELETE FROM observations WHERE spot_id = ?", (spot["spotId"],))
+                _insert(conn, [_row(summary_row(spot, obs)) for obs in spot.get("observations", [])])
+    if stale:
+        print(f"Observation store re-indexed {len(stale)} spot(s).")
+
+
+def _filters(spot, observation_type, start_date, end_date):
+    clauses, params = [], []
+    if spot:
+        clauses.append("spot_id = ?")
+        params.append(spot)
+    if observation_type:
+        clauses.append("observation_type = ?")
+        params.append(observation_type)
+    if start_date:
+        clauses.append("observed_at >= ?")
+        params.append(start_date)
+    if end_date:
+        clauses.append("observed_at < ?")
+        params.append(end_date + "~")
+    return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+
+def _select_columns() -> str:
+    return ", ".join(f"{COLUMNS[h]} AS {h}" for h in EXPORT_HEADERS)
+
+
+def query(
+    spot: Optional[str] = None,
+    observation_type: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    limit: int = 1000,
+    offset: int = 0,
+) -> List[dict]:
+    where, params = _filters(spot, observation_type, start_date, end_date)
+    with _lock:
+        rows = _db().execute(
+            f"SELECT {_select_columns()} FROM observations {where} "
+            f"ORDER BY observed_at, spot_id LIMIT ? OFFSET ?", (*params, limit, offset)
+        )
+        return [dict(row) for row in rows]
+
+
+def summarize(
+    group_by: str,
+    spot: Optional[str] = None,
+    observation_type: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+) -> List[dict]:
+    """Observation counts and first/last timestamps grouped by spot, type or date."""
+    column = GROUP_COLUMNS[group_by]
+    where, params = _filters(spot, observation_type, start_date, end_date)
+    with _lock:
+        rows = _db().execute(
+            f"SELECT {column} AS {group_by}, COUNT(*) AS observations, MIN(observed_at) AS first_observed, "
+            f"MAX(observed_at) AS last_observed FROM observations {where} GROUP BY {column} ORDER BY {column}",
+            params,
+        )
+        return [dict(row) for row in rows]
+
+
+def export_csv(
+    spot: Optional[str] = None,
+    observation_type: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+) -> Iterator[str]:
+    """
+    Yields observations_summary.csv in chunks, in the order observations were
+    recorded, reading the store in batches rather than all at once.
+    """
+    where, params = _filters(spot, observation_type, start_date, end_date)
+    where = f"{where} AND rowid > ?" if where else "WHERE rowid > ?"
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write(u'\ufeff')
+    writer.writerow(EXPORT_HEADERS)
+    last_rowid = 0
+    while True:
+        with _lock:
+            rows = _db().execute(
+                f"SELECT rowid, {_select_columns()} FROM observations {where} ORDER BY rowid LIMIT ?",
+                (*params, last_rowid, EXPORT_BATCH),
+            ).fetchall()
+        for row in rows:
+            writer.writerow(["" if row[h] is None else row[h] for h in EXPORT_HEADERS])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        if len(rows) < EXPORT_BATCH:
+            return
+        last_rowid = rows[-1]["rowid"]
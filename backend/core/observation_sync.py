@@ -0,0 +1,185 @@
+# backend/core/observation_sync.py
+import asyncio
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List
+
+from fastapi import HTTPException
+
+from . import media_store, observation_store, spot_cache, spot_store
+from .config import DATA_DIR
+from .file_handler import claim_name, release_name, save_observation_media
+from .models import SyncObservation
+from .utils import slugify, validate_name
+from .write_path import lock_for
+
+SPOT_NAMES_FILE = DATA_DIR / "spot_names.json"
+
+# Observation ids are derived from the device's idempotency key, so a retry
+# whose key was never recorded (e.g. the server stopped between writing the
+# log and the key) is still recognised from the spot's own log.
+_ID_NAMESPACE = uuid.UUID("0b9a3c52-6f4e-4d8a-9a57-1c2e5f7d8b30")
+
+
+def observation_id_for(idempotency_key: str) -> str:
+    return str(uuid.uuid5(_ID_NAMESPACE, idempotency_key))
+
+
+def _result(item: SyncObservation, status: str, spot_id=None, observation_id=None, detail=None) -> dict:
+    return {
+        "idempotencyKey": item.idempotencyKey, "status": status,
+        "spotId": spot_id, "observationId": observation_id, "detail": detail,
+    }
+
+
+async def _resolve_spots(pending: Dict[int, SyncObservation], results: List[dict]) -> Dict[int, str]:
+    """
+    Maps each pending item to the slug of the spot it belongs to, creating
+    new spots as needed. Items without a spotId that share a name (ignoring
+    case) become one new spot. Items that cannot be placed get an error result.
+    """
+    targets, new_spots = {}, defaultdict(list)
+    for i, item in pending.items():
+        if item.spotId:
+            if spot_store.spot_exists(item.spotId):
+                targets[i] = item.spotId
+            else:
+                results[i] = _result(item, "error", detail="Spot not found.")
+            continue
+        try:
+            validate_name(item.name)
+        except HTTPException as e:
+            results[i] = _result(item, "error", detail=e.detail)
+            continue
+        new_spots[item.name.strip().casefold()].append(i)
+
+    for indices in new_spots.values():
+        first = pending[indices[0]]
+        slug = slugify(first.name)
+        if await claim_name(first.name, SPOT_NAMES_FILE):
+            try:
+                header = await asyncio.to_thread(spot_store.create_spot, slug, first.name, first.latitude, first.longitude)
+            except OSError as e:
+                await release_name(first.name, SPOT_NAMES_FILE)
+                for i in indices:
+                    results[i] = _result(pending[i], "error", detail=f"Could not create the spot: {e}")
+                continue
+            await asyncio.to_thread(spot_cache.put, {**header, "observations": []})
+        else:
+            # Only a retry of a batch that already created this spot may
+            # reuse the name; anything else is a genuine clash. A spot with no
+            # observations was left by a sync whose log append failed.
+            existing = spot_cache.get(slug)
+            known = {obs.get("observationId") for obs in (existing or {}).get("observations", [])}
+            abandoned = existing is not None and not known
+            if not abandoned and not any(observation_id_for(pending[i].idempotencyKey) in known for i in indices):
+                for i in indices:
+                    results[i] = _result(pending[i], "error", detail="A spot with this name already exists.")
+                continue
+        for i in indices:
+            targets[i] = slug
+    return targets
+
+
+async def _discard_media(item: SyncObservation, observation: dict):
+    """Undoes an observation's media placement after its log append failed, so a retry can attach it again."""
+    for media_id, url_path in ((item.image_media_id, observation["imagePath"]),
+                               (item.audio_media_id, observation["audioPath"])):
+        if not url_path:
+            continue
+        try:
+            if media_id:
+                await asyncio.to_thread(media_store.detach, media_id, url_path)
+            else:
+                (DATA_DIR / url_path[len("/data/"):]).unlink(missing_ok=True)
+        except OSError as e:
+            print(f"Could not clean up media '{url_path}': {e}")
+
+
+async def _sync_spot(slug: str, indices: List[int], items: List[SyncObservation], results: List[dict]):
+    """Appends one spot's new observations with a single log write and indexes them with their keys."""
+    known = {obs.get("observationId") for obs in (spot_cache.get(slug) or {}).get("observations", [])}
+    new_observations, new_items = [], []
+    for i in indices:
+        item = items[i]
+        observation_id = observation_id_for(item.idempotencyKey)
+        if observation_id in known:
+            results[i] = _result(item, "duplicate", slug, observation_id)
+            continue
+        try:
+            media_store.check(item.image_media_id)
+            media_store.check(item.audio_media_id)
+        except LookupError as e:
+            results[i] = _result(item, "error", slug, detail=str(e))
+            continue
+        new_observations.append({
+            "observationId": observation_id,
+            "createdAt": (item.createdAt or datetime.now()).isoformat(),
+            "birds": item.birds,
+            "description": item.description,
+            "imagePath": await save_observation_media(item.image_media_id, item.image_data_url, slug),
+            "audioPath": await save_observation_media(item.audio_media_id, item.audio_data_url, slug),
+        })
+        new_items.append(item)
+        results[i] = _result(item, "created", slug, observation_id)
+    if not new_observations:
+        return
+
+    try:
+        await spot_store.append_observations(slug, new_observations)
+    except OSError as e:
+        print(f"Error appending synced observations to spot '{slug}': {e}")
+        for item, observation in zip(new_items, new_observations):
+            await _discard_media(item, observation)
+        for i in indices:
+            if results[i]["status"] == "created":
+                results[i] = _result(items[i], "error", slug, detail="Could not save observation.")
+        return
+
+    for observation in new_observations:
+        spot_data = await asyncio.to_thread(spot_cache.add_observation, slug, observation)
+    rows = [observation_store.summary_row(spot_data, observation) for observation in new_observations]
+    await asyncio.to_thread(observation_store.add_synced, rows, [item.idempotencyKey for item in new_items])
+
+
+async def sync_batch(items: List[SyncObservation]) -> List[dict]:
+    """
+    Saves a batch of observations queued on an offline device and returns
+    one result per item, in order: "created", "duplicate" (already saved by
+    an earlier attempt or earlier in this batch) or "error".
+    Each spot's new observations are written with a single log append and
+    indexed, together with their idempotency keys, in one transaction.
+    """
+    results: List[dict] = [None] * len(items)
+    synced = await asyncio.to_thread(observation_store.lookup_sync_keys, list({item.idempotencyKey for item in items}))
+    pending, first_with_key = {}, {}
+    for i, item in enumerate(items):
+        if item.idempotencyKey in synced:
+            previous = synced[item.idempotencyKey]
+            results[i] = _result(item, "duplicate", previous["spotId"], previous["observationId"])
+        elif item.idempotencyKey in first_with_key:
+            continue
+        else:
+            first_with_key[item.idempotencyKey] = i
+            pending[i] = item
+
+    # Only creating new spots is serialised across batches; appends take a
+    # per-spot lock, so batches for different spots don't wait on each other.
+    async with lock_for("observation-sync:new-spots"):
+        targets = await _resolve_spots(pending, results)
+
+    by_spot = defaultdict(list)
+    for i, slug in targets.items():
+        by_spot[slug].append(i)
+
+    for slug, indices in by_spot.items():
+        async with lock_for(f"spot:{slug}"):
+            await _sync_spot(slug, indices, items, results)
+
+    for i, item in enumerate(items):
+        if results[i] is None:
+            first = results[first_with_key[item.idempotencyKey]]
+            results[i] = _result(item, "duplicate" if first["status"] != "error" else "error",
+                                 first["spotId"], first["observationId"], first["detail"])
+    return results
@@ -0,0 +1,195 @@
+# backend/core/prescreen.py
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+
+from .audio_info import WAVE_FORMAT_IEEE_FLOAT, WAVE_FORMAT_PCM, read_wav_info
+from .config import DATA_DIR, ROOT_DIR
+from .db import connect
+
+PRESCREEN_DB = DATA_DIR / "processing" / "prescreen.sqlite"
+
+# A file is sampled as SAMPLE_BLOCKS evenly spaced runs of BLOCK_FRAMES frames,
+# i.e. a few hundred KB per file regardless of its length.
+SAMPLE_BLOCKS = 32
+BLOCK_FRAMES = 2048
+CLIP_LEVEL = 0.999
+SCREEN_WORKERS = 8
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS prescreen (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    duration REAL,
+    rms_dbfs REAL,
+    clip_ratio REAL,
+    truncated INTEGER,
+    error TEXT
+);
+"""
+
+_lock = threading.Lock()
+_conn = None
+
+
+def _db():
+    global _conn
+    if _conn is None:
+        _conn = connect(PRESCREEN_DB)
+        _conn.executescript(SCHEMA)
+    return _conn
+
+
+def _decode(raw: bytes, format_tag: int, bits: int) -> np.ndarray:
+    """Converts raw interleaved sample bytes to floats in [-1, 1]."""
+    if format_tag == WAVE_FORMAT_IEEE_FLOAT and bits in (32, 64):
+        return np.frombuffer(raw, dtype='<f4' if bits == 32 else '<f8').astype(np.float64)
+    if format_tag != WAVE_FORMAT_PCM:
+        raise ValueError(f"unsupported WAV format tag {format_tag:#x}")
+    if bits == 8:
+        return (np.frombuffer(raw, dtype=np.uint8).astype(np.float64) - 128) / 128
+    if bits == 16:
+        return np.frombuffer(raw, dtype='<i2') / 32768.0
+    if bits == 24:
+        b = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        values = b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)
+        values = np.where(values & 0x800000, values - (1 << 24), values)
+        return values / float(1 << 23)
+    if bits == 32:
+        return np.frombuffer(raw, dtype='<i4') / float(1 << 31)
+    raise ValueError(f"unsupported PCM bit depth {bits}")
+
+
+def _sample_starts(total_frames: int) -> Tuple[int, np.ndarray]:
+    """The frames per block and the start frame of each evenly spaced block."""
+    frames_per_block = min(BLOCK_FRAMES, total_frames)
+    blocks = min(SAMPLE_BLOCKS, max(total_frames // frames_per_block, 1))
+    return frames_per_block, np.linspace(0, total_frames - frames_per_block, blocks).astype(np.int64)
+
+
+def _sample_wav(path: Path, result: dict) -> List[np.ndarray]:
+    info = read_wav_info(path)
+    result["duration"] = info["duration"]
+    result["truncated"] = info["truncated"]
+    block_align = info["block_align"]
+    total_frames = info["data_bytes"] // block_align
+    if total_frames == 0:
+        return []
+    frames_per_block, starts = _sample_starts(total_frames)
+    chunks = []
+    with open(path, 'rb') as f:
+        for start in starts:
+            f.seek(info["data_offset"] + int(start) * block_align)
+            raw = f.read(frames_per_block * block_align)
+            raw = raw[:len(raw) - len(raw) % (block_align // info["channels"])]
+            chunks.append(_decode(raw, info["format_tag"], info["bits_per_sample"]))
+    return chunks
+
+
+def _sample_flac(path: Path, result: dict) -> List[np.ndarray]:
+    # FLAC is seekable by frame, so the same strided sample costs a few
+    # decoded blocks; a damaged stream raises and is reported as unreadable.
+    try:
+        with sf.SoundFile(path) as flac:
+            result["duration"] = flac.frames / flac.samplerate if flac.samplerate else None
+            if flac.frames == 0:
+                return []
+            frames_per_block, starts = _sample_starts(flac.frames)
+            chunks = []
+            for start in starts:
+                flac.seek(int(start))
+                chunks.append(flac.read(frames_per_block, dtype='float64').ravel())
+            return chunks
+    except RuntimeError as e:
+        # libsndfile errors (LibsndfileError is a RuntimeError) mean a damaged file.
+        raise ValueError(str(e))
+
+
+def measure(path: Path) -> dict:
+    """
+    Reads a WAV header (or FLAC stream info) and a strided sample of frames to
+    estimate duration, RMS level (dBFS) and the fraction of clipped samples,
+    without decoding or resampling the whole file.
+    """
+    result = {"duration": None, "rms_dbfs": None, "clip_ratio": None, "truncated": False, "error": None}
+    try:
+        sample = _sample_flac if path.suffix.lower() == '.flac' else _sample_wav
+        chunks = sample(path, result)
+        samples = np.concatenate(chunks) if chunks else np.empty(0)
+        if samples.size == 0:
+            result["error"] = "no audio data"
+            return result
+
+        rms = float(np.sqrt(np.mean(samples ** 2)))
+        result["rms_dbfs"] = 20 * math.log10(max(rms, 1e-10))
+        result["clip_ratio"] = float(np.mean(np.abs(samples) >= CLIP_LEVEL))
+    except (OSError, ValueError) as e:
+        result["error"] = str(e)
+    return result
+
+
+def _cached_measure(rel_path: str) -> dict:
+    path = ROOT_DIR / rel_path
+    try:
+        stat = path.stat()
+    except OSError as e:
+        return {"duration": None, "rms_dbfs": None, "clip_ratio": None, "truncated": False, "error": str(e)}
+
+    with _lock:
+        row = _db().execute("SELECT * FROM prescreen WHERE path = ?", (rel_path,)).fetchone()
+    if row and row["size"] == stat.st_size and row["mtime"] == stat.st_mtime:
+        result = dict(row)
+        result["truncated"] = bool(result["truncated"])
+        return result
+
+    result = measure(path)
+    with _lock:
+        conn = _db()
+        conn.execute(
+            "INSERT OR REPLACE INTO prescreen (path, size, mtime, duration, rms_dbfs, clip_ratio, truncated, error) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (rel_path, stat.st_size, stat.st_mtime, result["duration"], result["rms_dbfs"],
+             result["clip_ratio"], int(result["truncated"]), result["error"]),
+        )
+        conn.commit()
+    return result
+
+
+def rejection_reason(result: dict, settings: dict) -> Optional[str]:
+    if result["error"]:
+        return f"unreadable ({result['error']})"
+    if result["truncated"]:
+        return "truncated (the recording stops before the length its header declares)"
+    if result["duration"] is not None and result["duration"] < settings["min_duration"]:
+        return f"too short ({result['duration']:.1f}s)"
+    if result["rms_dbfs"] is not None and result["rms_dbfs"] < settings["min_rms_dbfs"]:
+        return f"silent ({result['rms_dbfs']:.1f} dBFS)"
+    if result["clip_ratio"] is not None and result["clip_ratio"] > settings["max_clip_ratio"]:
+        return f"clipped ({result['clip_ratio']:.1%} of samples)"
+    return None
+
+
+def screen_files(paths: List[str], settings: dict) -> Tuple[List[str], List[Dict[str, str]]]:
+    """
+    Splits project-relative paths into (kept, skipped). WAV and FLAC files
+    are screened; anything else is passed through for the script to handle.
+    Measurements are cached per file and reused until its size or mtime changes.
+    """
+    audio_paths = [p for p in paths if p.lower().endswith(('.wav', '.flac'))]
+    with ThreadPoolExecutor(max_workers=SCREEN_WORKERS) as pool:
+        results = dict(zip(audio_paths, pool.map(_cached_measure, audio_paths)))
+
+    kept, skipped = [], []
+    for path in paths:
+        reason = rejection_reason(results[path], settings) if path in results else None
+        if reason:
+            skipped.append({"path": path, "reason": reason})
+        else:
+            kept.append(path)
+    return kept, skipped
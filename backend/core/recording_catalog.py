@@ -0,0 +1,435 @@
+# backend/core/recording_catalog.py
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .audio_info import parse_recording_timestamp, read_audio_info
+from .config import DATA_DIR, ROOT_DIR
+from .db import connect
+from .watcher import PollingWatcher
+
+CATALOG_DB = DATA_DIR / "processing" / "catalog.sqlite"
+SPOTS_DIR = DATA_DIR / "spots"
+AUDIO_EXTENSIONS = {".wav", ".flac"}
+
+# Files modified more recently than this are re-checked on every poll, so a
+# recording that is still being copied ends up catalogued with its final size.
+SETTLE_SECONDS = 10.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recordings (
+    path TEXT PRIMARY KEY,
+    spot TEXT NOT NULL,
+    directory TEXT NOT NULL,
+    source TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    recorded_at TEXT,
+    recorded_date TEXT,
+    minute_of_day INTEGER,
+    duration REAL,
+    sample_rate INTEGER,
+    channels INTEGER,
+    bits_per_sample INTEGER,
+    header_error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_recordings_spot_time ON recordings (spot, recorded_at);
+CREATE INDEX IF NOT EXISTS idx_recordings_date_minute ON recordings (recorded_date, minute_of_day);
+CREATE INDEX IF NOT EXISTS idx_recordings_directory ON recordings (directory);
+CREATE TABLE IF NOT EXISTS directories (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS archived (
+    original_path TEXT PRIMARY KEY,
+    path TEXT NOT NULL
+);
+"""
+
+_lock = threading.RLock()
+_conn = None
+_known_dirs: Dict[str, float] = {}
+_settling: Dict[str, float] = {}
+_watcher: Optional[PollingWatcher] = None
+_listeners: List[Callable[[List[dict]], None]] = []
+_archive_listeners: List[Callable[[str, str], None]] = []
+
+
+def _db():
+    global _conn
+    if _conn is None:
+        _conn = connect(CATALOG_DB)
+        _conn.executescript(SCHEMA)
+        _known_dirs.update({row["path"]: row["mtime"] for row in _conn.execute("SELECT path, mtime FROM directories")})
+    return _conn
+
+
+def relative_path(path: Path) -> str:
+    """Catalog keys are project-relative POSIX paths, matching what the analysis UI submits."""
+    return Path(os.path.abspath(path)).relative_to(ROOT_DIR).as_posix()
+
+
+def locate_source(filepath: str, filename: str, fallback: Dict[str, str]) -> tuple:
+    """
+    Returns (project-relative path, spot slug) for the recording an analysis
+    result row came from: the row's own path, else the job input with that
+    file name, followed through archival renames so a recording keeps one
+    key. The path is None when neither is known.
+    """
+    path = filepath or fallback.get(filename) or ""
+    if path:
+        absolute = Path(os.path.abspath(path))
+        if absolute.is_relative_to(ROOT_DIR):
+            path = resolve(absolute.relative_to(ROOT_DIR).as_posix())
+    parts = Path(path).parts
+    spot = parts[parts.index("spots") + 1] if "spots" in parts[:-1] else None
+    return path or None, spot
+
+
+def _describe(path: Path, stat: os.stat_result) -> dict:
+    rel = relative_path(path)
+    parts = rel.split("/")
+    recorded_at = parse_recording_timestamp(path.name)
+    record = {
+        "path": rel,
+        "spot": parts[2],
+        "directory": "/".join(parts[:-1]),
+        "source": "external" if len(parts) > 4 and parts[3] == "external_data" else "spot",
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "recorded_at": recorded_at.isoformat() if recorded_at else None,
+        "recorded_date": recorded_at.date().isoformat() if recorded_at else None,
+        "minute_of_day": recorded_at.hour * 60 + recorded_at.minute if recorded_at else None,
+        "duration": None, "sample_rate": None, "channels": None, "bits_per_sample": None,
+        "header_error": None,
+    }
+    try:
+        info = read_audio_info(path)
+        record.update({key: info[key] for key in ("duration", "sample_rate", "channels", "bits_per_sample")})
+    except (OSError, ValueError) as e:
+        record["header_error"] = str(e)
+    return record
+
+
+def _upsert(records: List[dict]):
+    if not records:
+        return
+    columns = list(records[0])
+    placeholders = ", ".join(f":{c}" for c in columns)
+    with _lock:
+        conn = _db()
+        conn.executemany(f"INSERT OR REPLACE INTO recordings ({', '.join(columns)}) VALUES ({placeholders})", records)
+        conn.commit()
+    for listener in _listeners:
+        try:
+            listener(records)
+        except Exception as e:
+            print(f"Recording catalog listener failed: {e}")
+
+
+def add_listener(listener: Callable[[List[dict]], None]):
+    """Registers a callback that receives every batch of added or updated recordings."""
+    _listeners.append(listener)
+
+
+def _forget_directory(directory: str):
+    rel = relative_path(Path(directory))
+    with _lock:
+        conn = _db()
+        conn.execute("DELETE FROM recordings WHERE directory = ? OR directory LIKE ?", (rel, rel + "/%"))
+        conn.execute("DELETE FROM directories WHERE path = ? OR path LIKE ?", (directory, directory + os.sep + "%"))
+        conn.commit()
+        for known in [d for d in _known_dirs if d == directory or d.startswith(directory + os.sep)]:
+            del _known_dirs[known]
+
+
+def scan_directory(directory: Path, force: bool = False, visited: Optional[Set[Tuple[int, int]]] = None) -> int:
+    """
+    Brings the catalog in line with one directory, recursing into
+    subdirectories that are new or whose mtime changed. Only files whose size
+    or mtime differ from the catalog have their headers read. Symlinked
+    directories (e.g. external_data on a mounted drive) are followed;
+    `visited` holds the (device, inode) of each directory already scanned in
+    this pass, so a link cycle is not followed round.
+    Returns the number of recordings added, updated or removed.
+    """
+    key = str(directory)
+    try:
+        dir_stat = directory.stat()
+    except OSError:
+        _forget_directory(key)
+        return 0
+    visited = set() if visited is None else visited
+    if (dir_stat.st_dev, dir_stat.st_ino) in visited:
+        return 0
+    visited.add((dir_stat.st_dev, dir_stat.st_ino))
+    dir_mtime = dir_stat.st_mtime
+
+    with _lock:
+        rel_dir = relative_path(directory) if directory != SPOTS_DIR else None
+        existing = {}
+        if rel_dir is not None:
+            existing = {row["path"]: (row["size"], row["mtime"]) for row in
+                        _db().execute("SELECT path, size, mtime FROM recordings WHERE directory = ?", (rel_dir,))}
+
+    changed, seen, subdirs = [], set(), []
+    now = time.time()
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                subdirs.append(Path(entry.path))
+                continue
+            if directory == SPOTS_DIR or os.path.splitext(entry.name)[1].lower() not in AUDIO_EXTENSIONS:
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                # Removed since the directory was listed.
+                continue
+            path = Path(entry.path)
+            rel = relative_path(path)
+            seen.add(rel)
+            if now - stat.st_mtime < SETTLE_SECONDS:
+                _settling[entry.path] = stat.st_mtime
+            if existing.get(rel) != (stat.st_size, stat.st_mtime):
+                changed.append(_describe(path, stat))
+
+    removed = [path for path in existing if path not in seen]
+    _upsert(changed)
+    with _lock:
+        conn = _db()
+        if removed:
+            conn.executemany("DELETE FROM recordings WHERE path = ?", [(p,) for p in removed])
+        conn.execute("INSERT OR REPLACE INTO directories (path, mtime) VALUES (?, ?)", (key, dir_mtime))
+        conn.commit()
+        _known_dirs[key] = dir_mtime
+        children = {str(d) for d in subdirs}
+        gone = [d for d in _known_dirs if os.path.dirname(d) == key and d not in children]
+
+    for child in gone:
+        _forget_directory(child)
+
+    count = len(changed) + len(removed)
+    for subdir in subdirs:
+        try:
+            subdir_mtime = subdir.stat().st_mtime
+        except OSError:
+            # Removed since the directory was listed.
+            _forget_directory(str(subdir))
+            continue
+        if force or _known_dirs.get(str(subdir)) != subdir_mtime:
+            count += scan_directory(subdir, force, visited)
+        else:
+            count += _scan_unchanged_children(subdir, force, visited)
+    return count
+
+
+def _scan_unchanged_children(directory: Path, force: bool, visited: Set[Tuple[int, int]]) -> int:
+    """Descends through an unchanged directory using the catalog's record of its subdirectories."""
+    key = str(directory)
+    try:
+        dir_stat = directory.stat()
+    except OSError:
+        return 0
+    if (dir_stat.st_dev, dir_stat.st_ino) in visited:
+        return 0
+    visited.add((dir_stat.st_dev, dir_stat.st_ino))
+    count = 0
+    for child in [d for d in list(_known_dirs) if os.path.dirname(d) == key]:
+        child_path = Path(child)
+        try:
+            mtime = child_path.stat().st_mtime
+        except OSError:
+            _forget_directory(child)
+            continue
+        if _known_dirs.get(child) != mtime:
+            count += scan_directory(child_path, force, visited)
+        else:
+            count += _scan_unchanged_children(child_path, force, visited)
+    return count
+
+
+def rescan(force: bool = False) -> int:
+    """Re-syncs the whole catalog. `force` re-lists every directory even if its mtime is unchanged."""
+    SPOTS_DIR.mkdir(parents=True, exist_ok=True)
+    with _lock:
+        _db()
+    return scan_directory(SPOTS_DIR, force=force)
+
+
+def index_files(paths: Iterable[str]):
+    """Catalogs specific files right away, e.g. straight after an import."""
+    records = []
+    for path_str in paths:
+        path = Path(path_str)
+        if not path.is_absolute():
+            path = ROOT_DIR / path
+        if path.suffix.lower() not in AUDIO_EXTENSIONS:
+            continue
+        try:
+            records.append(_describe(path, path.stat()))
+        except (OSError, ValueError, IndexError) as e:
+            print(f"Could not catalog '{path}': {e}")
+    _upsert(records)
+
+
+def add_archive_listener(listener: Callable[[str, str], None]):
+    """Registers a callback that receives (original path, new path) whenever a recording is archived."""
+    _archive_listeners.append(listener)
+
+
+def record_archived(original_path: str, path: str):
+    """
+    Remembers that a recording was archived under a new name, so its original
+    path still resolves, and lets stores keyed by path move their rows over.
+    """
+    with _lock:
+        conn = _db()
+        conn.execute("INSERT OR REPLACE INTO archived (original_path, path) VALUES (?, ?)", (original_path, path))
+        conn.commit()
+    for listener in _archive_listeners:
+        try:
+            listener(original_path, path)
+        except Exception as e:
+            print(f"Recording catalog archive listener failed: {e}")
+
+
+def resolve(rel_path: str) -> str:
+    """The current path of a recording, following archival renames (e.g. .wav to .flac)."""
+    with _lock:
+        row = _db().execute("SELECT path FROM archived WHERE original_path = ?", (rel_path,)).fetchone()
+    return row["path"] if row else rel_path
+
+
+def _snapshot():
+    snapshot = {}
+    for path in list(_known_dirs) + list(_settling):
+        try:
+            snapshot[path] = os.stat(path).st_mtime
+        except OSError:
+            continue
+    return snapshot
+
+
+def _on_change(changed):
+    now = time.time()
+    for path in sorted(changed):
+        if path in _known_dirs:
+            scan_directory(Path(path))
+        elif path in _settling and os.path.exists(path):
+            index_files([path])
+    for path, mtime in list(_settling.items()):
+        try:
+            current = os.stat(path).st_mtime
+        except OSError:
+            current = None
+        if current is None or now - current >= SETTLE_SECONDS:
+            _settling.pop(path, None)
+            if current is not None and current != mtime:
+                index_files([path])
+
+
+def start_watching(interval: float = 5.0):
+    """Syncs the catalog in the background, then keeps it current by polling directory mtimes."""
+    global _watcher
+
+    def run():
+        started = time.time()
+        try:
+            count = rescan()
+            print(f"Recording catalog synced ({count} change(s)) in {time.time() - started:.1f}s.")
+        except Exception as e:
+            print(f"Recording catalog sync failed: {e}")
+        if _watcher is not None:
+            _watcher.start()
+
+    if _watcher is None:
+        _watcher = PollingWatcher("recording-catalog", _snapshot, _on_change, interval)
+    threading.Thread(target=run, name="recording-catalog-sync", daemon=True).start()
+
+
+def stop_watching():
+    if _watcher is not None:
+        _watcher.stop()
+
+
+def _rows(sql: str, params=()) -> List[dict]:
+    with _lock:
+        return [dict(row) for row in _db().execute(sql, params)]
+
+
+def list_paths(source: Optional[str] = None, spot: Optional[str] = None) -> List[str]:
+    clauses, params = [], []
+    if source:
+        clauses.append("source = ?")
+        params.append(source)
+    if spot:
+        clauses.append("spot = ?")
+        params.append(spot)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return [row["path"] for row in _rows(f"SELECT path FROM recordings {where} ORDER BY path", params)]
+
+
+def archive_candidates(modified_before: float, limit: int, offset: int = 0) -> List[str]:
+    """External .wav recordings not modified since `modified_before` and not archived yet, oldest path first."""
+    return [row["path"] for row in _rows(
+        "SELECT path FROM recordings WHERE source = 'external' AND path LIKE '%.wav' AND mtime <= ? "
+        "AND path NOT IN (SELECT original_path FROM archived) ORDER BY path LIMIT ? OFFSET ?",
+        (modified_before, limit, offset),
+    )]
+
+
+def list_paths_under(directory: str) -> List[str]:
+    """Recordings in a project-relative directory and all of its subdirectories."""
+    directory = directory.rstrip("/")
+    return [row["path"] for row in _rows(
+        "SELECT path FROM recordings WHERE directory = ? OR directory LIKE ? ORDER BY path",
+        (directory, directory + "/%"),
+    )]
+
+
+def list_directories() -> List[str]:
+    return [row["directory"] for row in _rows("SELECT DISTINCT directory FROM recordings ORDER BY directory")]
+
+
+def query_recordings(
+    spot: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    start_minute: Optional[int] = None,
+    end_minute: Optional[int] = None,
+    limit: int = 1000,
+    offset: int = 0,
+) -> List[dict]:
+    """
+    Filters recordings by spot, inclusive date range (YYYY-MM-DD) and time of
+    day in minutes since midnight. A time window whose start is after its end
+    wraps past midnight (e.g. 18:00-06:00).
+    """
+    clauses, params = [], []
+    if spot:
+        clauses.append("spot = ?")
+        params.append(spot)
+    if start_date:
+        clauses.append("recorded_date >= ?")
+        params.append(start_date)
+    if end_date:
+        clauses.append("recorded_date <= ?")
+        params.append(end_date)
+    if start_minute is not None and end_minute is not None and start_minute > end_minute:
+        clauses.append("(minute_of_day >= ? OR minute_of_day <= ?)")
+        params.extend([start_minute, end_minute])
+    else:
+        if start_minute is not None:
+            clauses.append("minute_of_day >= ?")
+            params.append(start_minute)
+        if end_minute is not None:
+            clauses.append("minute_of_day <= ?")
+            params.append(end_minute)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return _rows(
+        f"SELECT * FROM recordings {where} ORDER BY spot, recorded_at, path LIMIT ? OFFSET ?",
+        (*params, limit, offset),
+    )
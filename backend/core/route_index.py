@@ -0,0 +1,128 @@
+# backend/core/route_index.py
+import threading
+from typing import Dict, List, Optional
+
+from .config import DATA_DIR
+from .db import connect
+
+ROUTES_DB = DATA_DIR / "routes.sqlite"
+
+# One row per route with the metrics computed when it was saved, so listing,
+# filtering and sorting routes never opens a route file. `mtime` is the route
+# file's modification time when it was indexed, used to spot stale rows.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS routes (
+    route_id TEXT PRIMARY KEY,
+    name TEXT,
+    created_at TEXT,
+    point_count INTEGER NOT NULL,
+    distance_m REAL NOT NULL,
+    duration_s REAL,
+    started_at TEXT,
+    ended_at TEXT,
+    avg_speed REAL,
+    max_speed REAL,
+    min_lat REAL,
+    min_lon REAL,
+    max_lat REAL,
+    max_lon REAL,
+    mtime REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_routes_created ON routes (created_at);
+CREATE INDEX IF NOT EXISTS idx_routes_distance ON routes (distance_m);
+CREATE INDEX IF NOT EXISTS idx_routes_duration ON routes (duration_s);
+CREATE INDEX IF NOT EXISTS idx_routes_lat ON routes (min_lat, max_lat);
+"""
+
+COLUMNS = {
+    "routeId": "route_id", "name": "name", "createdAt": "created_at", "pointCount": "point_count",
+    "distanceMeters": "distance_m", "durationSeconds": "duration_s", "startedAt": "started_at",
+    "endedAt": "ended_at", "avgSpeed": "avg_speed", "maxSpeed": "max_speed",
+}
+SORT_COLUMNS = {"createdAt": "created_at", "distance": "distance_m", "duration": "duration_s", "name": "name"}
+
+_lock = threading.RLock()
+_conn = None
+
+
+def _db():
+    global _conn
+    if _conn is None:
+        _conn = connect(ROUTES_DB)
+        _conn.executescript(SCHEMA)
+    return _conn
+
+
+def put(summary: dict, mtime: float):
+    """Adds or replaces a route's row."""
+    bbox = summary.get("bbox") or [None] * 4
+    values = [summary.get(key) for key in COLUMNS] + bbox + [mtime]
+    columns = list(COLUMNS.values()) + ["min_lat", "min_lon", "max_lat", "max_lon", "mtime"]
+    with _lock:
+        conn = _db()
+        with conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO routes ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                values,
+            )
+
+
+def remove(route_ids: List[str]):
+    if not route_ids:
+        return
+    with _lock:
+        conn = _db()
+        with conn:
+            conn.executemany("DELETE FROM routes WHERE route_id = ?", [(route_id,) for route_id in route_ids])
+
+
+def mtimes() -> Dict[str, float]:
+    with _lock:
+        return {row["route_id"]: row["mtime"] for row in _db().execute("SELECT route_id, mtime FROM routes")}
+
+
+def _summary(row) -> dict:
+    summary = {key: row[column] for key, column in COLUMNS.items()}
+    has_bbox = row["min_lat"] is not None
+    summary["bbox"] = [row["min_lat"], row["min_lon"], row["max_lat"], row["max_lon"]] if has_bbox else None
+    return summary
+
+
+def query(
+    min_distance: Optional[float] = None,
+    max_distance: Optional[float] = None,
+    min_duration: Optional[float] = None,
+    max_duration: Optional[float] = None,
+    bbox: Optional[List[float]] = None,
+    sort: str = "createdAt",
+    descending: bool = False,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> List[dict]:
+    """
+    Route summaries matching the filters. `bbox` is [south, west, north, east]
+    and matches routes whose bounding box overlaps it. No `limit` returns
+    every match.
+    """
+    if sort not in SORT_COLUMNS:
+        raise ValueError(f"Unknown sort '{sort}'. Use one of: {', '.join(SORT_COLUMNS)}.")
+    clauses, params = [], []
+    for column, operator, value in (
+        ("distance_m", ">=", min_distance), ("distance_m", "<=", max_distance),
+        ("duration_s", ">=", min_duration), ("duration_s", "<=", max_duration),
+    ):
+        if value is not None:
+            clauses.append(f"{column} {operator} ?")
+            params.append(value)
+    if bbox is not None:
+        south, west, north, east = bbox
+        clauses.append("max_lat >= ? AND min_lat <= ? AND max_lon >= ? AND min_lon <= ?")
+        params += [south, north, west, east]
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    direction = "DESC" if descending else "ASC"
+    with _lock:
+        rows = _db().execute(
+            f"SELECT * FROM routes {where} ORDER BY {SORT_COLUMNS[sort]} {direction}, route_id "
+            f"LIMIT ? OFFSET ?", (*params, -1 if limit is None else limit, offset)
+        )
+        return [_summary(row) for row in rows]
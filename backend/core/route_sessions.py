@@ -0,0 +1,180 @@
+# backend/core/route_sessions.py
+import json
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+
+from . import route_store
+from .config import DATA_DIR
+from .write_path import lock_for, write_atomic
+
+# A route being recorded is a session directory holding session.json and
+# points.bin, an append-only log of fixed-size point records. Appending a
+# batch is one write at the end of the file, and the point count is the file
+# size divided by the record size, so neither grows more expensive as the
+# track gets longer. Each batch carries the offset of its first point, which
+# makes a resent batch harmless: points the server already has are skipped.
+# Closing the session encodes the log into a normal route file and leaves
+# session.json behind with the route's id, so a client whose close response
+# was lost can close again and learn where its route went.
+SESSIONS_DIR = DATA_DIR / "routes" / "recording"
+SESSION_FILE = "session.json"
+POINTS_FILE = "points.bin"
+
+# Latitude/longitude in 1e-7 degrees, as route files store them, and
+# milliseconds since the epoch (NO_TIME when the device gave none).
+RECORD = np.dtype([("lat", "<i4"), ("lon", "<i4"), ("time", "<i8")])
+NO_TIME = -1
+
+# Closed sessions are kept this long for clients retrying their close.
+CLOSED_KEEP = 7 * 24 * 3600
+
+_SESSION_ID_LENGTH = 32
+
+
+class OffsetGap(ValueError):
+    """A batch starts past the end of the log, so points in between were never received."""
+
+    def __init__(self, expected: int):
+        super().__init__(f"Points are missing before this batch; resend from offset {expected}.")
+        self.expected = expected
+
+
+def _session_dir(session_id: str) -> Path:
+    if len(session_id) != _SESSION_ID_LENGTH or not session_id.isalnum():
+        raise LookupError("Route session not found.")
+    path = SESSIONS_DIR / session_id
+    if not (path / SESSION_FILE).exists():
+        raise LookupError("Route session not found.")
+    return path
+
+
+def _load(session_id: str) -> dict:
+    with open(_session_dir(session_id) / SESSION_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _point_count(points_path: Path) -> int:
+    return points_path.stat().st_size // RECORD.itemsize if points_path.exists() else 0
+
+
+def open_session(name: Optional[str] = None) -> dict:
+    session_id = uuid.uuid4().hex
+    session_dir = SESSIONS_DIR / session_id
+    session_dir.mkdir(parents=True)
+    (session_dir / POINTS_FILE).touch()
+    session = {"sessionId": session_id, "name": name, "createdAt": datetime.now().isoformat()}
+    write_atomic(session_dir / SESSION_FILE, json.dumps(session, indent=2))
+    return status(session_id)
+
+
+def status(session_id: str) -> dict:
+    """The session with its point count; a closed session also carries the `routeId` it was saved as."""
+    session = _load(session_id)
+    if "routeId" in session:
+        return session
+    return {**session, "pointCount": _point_count(_session_dir(session_id) / POINTS_FILE)}
+
+
+def session_lock(session_id: str):
+    """Held while a session is appended to, closed or discarded."""
+    return lock_for(f"route-session:{session_id}")
+
+
+def list_sessions() -> List[dict]:
+    """Sessions that were never closed, e.g. because the phone died while recording."""
+    sessions = []
+    if SESSIONS_DIR.exists():
+        for path in sorted(SESSIONS_DIR.iterdir()):
+            try:
+                session = status(path.name)
+            except (LookupError, OSError, ValueError):
+                continue
+            if "routeId" not in session:
+                sessions.append(session)
+    return sessions
+
+
+def prune_closed():
+    """Removes closed sessions older than CLOSED_KEEP."""
+    if not SESSIONS_DIR.exists():
+        return
+    cutoff = time.time() - CLOSED_KEEP
+    for path in SESSIONS_DIR.iterdir():
+        try:
+            closed = "routeId" in _load(path.name)
+            if closed and (path / SESSION_FILE).stat().st_mtime < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+        except (LookupError, OSError, ValueError):
+            continue
+
+
+def _append(session_id: str, offset: int, points: List[dict]) -> int:
+    points_path = _session_dir(session_id) / POINTS_FILE
+    with open(points_path, 'r+b') as f:
+        size = f.seek(0, os.SEEK_END)
+        if size % RECORD.itemsize:
+            # A write torn by a crash; drop the partial record and let the client resend it.
+            size = f.truncate(size - size % RECORD.itemsize)
+            f.seek(size)
+        count = size // RECORD.itemsize
+        if offset > count:
+            raise OffsetGap(count)
+        new_points = points[count - offset:]
+        if not new_points:
+            return count
+        records = np.empty(len(new_points), dtype=RECORD)
+        records["lat"] = np.round(np.array([p["lat"] for p in new_points]) * route_store.COORD_SCALE)
+        records["lon"] = np.round(np.array([p["lng"] for p in new_points]) * route_store.COORD_SCALE)
+        records["time"] = [NO_TIME if p.get("time") is None else p["time"] for p in new_points]
+        f.write(records.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+        return count + len(new_points)
+
+
+async def append_points(session_id: str, offset: int, points: List[dict]) -> dict:
+    """
+    Appends a batch whose first point is point number `offset` of the route.
+    Points before the end of the log are already stored and are skipped;
+    raises OffsetGap if the batch would leave a hole.
+    """
+    _session_dir(session_id)
+    async with session_lock(session_id):
+        if "routeId" in await run_in_threadpool(_load, session_id):
+            raise ValueError("This route session has already been closed.")
+        count = await run_in_threadpool(_append, session_id, offset, points)
+    return {"sessionId": session_id, "pointCount": count}
+
+
+def finalize(session_id: str, route_id: str, name: Optional[str]) -> dict:
+    """
+    Encodes the recorded points as route `route_id` and marks the session
+    closed; returns the route summary. Call it holding session_lock().
+    """
+    session_dir = _session_dir(session_id)
+    session = _load(session_id)
+    records = np.fromfile(session_dir / POINTS_FILE, dtype=RECORD)
+    times = records["time"] if len(records) and (records["time"] != NO_TIME).all() else None
+    summary = route_store.save_columns(
+        route_id, name or session.get("name"),
+        records["lat"] / route_store.COORD_SCALE, records["lon"] / route_store.COORD_SCALE,
+        times, session["createdAt"],
+    )
+    closed = {**session, "routeId": route_id, "pointCount": len(records), "closedAt": datetime.now().isoformat()}
+    write_atomic(session_dir / SESSION_FILE, json.dumps(closed, indent=2))
+    (session_dir / POINTS_FILE).unlink(missing_ok=True)
+    return summary
+
+
+async def discard_session(session_id: str):
+    session_dir = _session_dir(session_id)
+    async with session_lock(session_id):
+        shutil.rmtree(session_dir, ignore_errors=True)
@@ -0,0 +1,288 @@
+# backend/core/route_store.py
+import io
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from . import route_index
+from .config import DATA_DIR
+
+ROUTES_DIR = DATA_DIR / "routes"
+
+# A route is one .npz file of delta-encoded integer columns: latitude and
+# longitude in 1e-7 degrees (about 1 cm), and time in milliseconds where the
+# device recorded it. Douglas-Peucker levels are stored as delta-encoded
+# point indices, one per tolerance, so the map can draw a route at a detail
+# that matches the zoom instead of downloading every fix.
+COORD_SCALE = 10_000_000
+# Longitude deltas are stored modulo a full turn, so a step across the
+# antimeridian (179.9 to -179.9) stays a small int32 instead of overflowing.
+FULL_TURN = 360 * COORD_SCALE
+TOLERANCES_M = (1.0, 4.0, 16.0, 64.0, 256.0)
+EARTH_RADIUS_M = 6_371_008.8
+CACHE_ROUTES = 64
+
+_lock = threading.Lock()
+# route_id -> (file mtime, decoded route) for the most recently used routes.
+_cache: "OrderedDict[str, tuple]" = OrderedDict()
+
+
+def route_path(route_id: str) -> Path:
+    return ROUTES_DIR / f"{route_id}.npz"
+
+
+def _delta(values: np.ndarray) -> np.ndarray:
+    return np.diff(values, prepend=values[:1] * 0) if len(values) else values
+
+
+def _undelta(values: np.ndarray) -> np.ndarray:
+    return np.cumsum(values, dtype=np.int64)
+
+
+def _wrap(values: np.ndarray) -> np.ndarray:
+    """Brings longitude units into [-180, 180) degrees."""
+    return (values + FULL_TURN // 2) % FULL_TURN - FULL_TURN // 2
+
+
+def _local_xy(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Equirectangular metres around the route's mean latitude; accurate enough for simplification."""
+    lat0 = math.radians(float(np.mean(lat))) if len(lat) else 0.0
+    x = np.radians(np.unwrap(lon, period=360)) * math.cos(lat0) * EARTH_RADIUS_M
+    y = np.radians(lat) * EARTH_RADIUS_M
+    return np.column_stack([x, y])
+
+
+def importance(xy: np.ndarray) -> np.ndarray:
+    """
+    For each point, the largest Douglas-Peucker tolerance at which it would
+    still be kept (endpoints are infinite). One pass serves every level:
+    level(tol) is simply the points whose importance exceeds tol. Each
+    segment's deviations are computed with one vectorised NumPy expression.
+    """
+    n = len(xy)
+    result = np.zeros(n)
+    if n == 0:
+        return result
+    result[[0, -1]] = np.inf
+    stack = [(0, n - 1, np.inf)]
+    while stack:
+        start, end, ceiling = stack.pop()
+        if end - start < 2:
+            continue
+        a, b = xy[start], xy[end]
+        inner = xy[start + 1:end]
+        ab = b - a
+        length = math.hypot(*ab)
+        if length == 0:
+            deviation = np.hypot(*(inner - a).T)
+        else:
+            deviation = np.abs(ab[0] * (inner[:, 1] - a[1]) - ab[1] * (inner[:, 0] - a[0])) / length
+        offset = int(np.argmax(deviation))
+        split = start + 1 + offset
+        # A point can't outlive the segment it splits, or levels would not nest.
+        value = min(float(deviation[offset]), ceiling)
+        result[split] = value
+        stack.append((start, split, value))
+        stack.append((split, end, value))
+    return result
+
+
+def encode(lat: np.ndarray, lon: np.ndarray, times: Optional[np.ndarray] = None) -> dict:
+    """Columns and simplification levels for float lat/lon arrays and optional millisecond times."""
+    arrays = {
+        "lat": _delta(np.round(lat * COORD_SCALE).astype(np.int64)).astype(np.int32),
+        "lon": _wrap(_delta(np.round(lon * COORD_SCALE).astype(np.int64))).astype(np.int32),
+    }
+    if times is not None and len(times):
+        arrays["time"] = _delta(times.astype(np.int64))
+    weights = importance(_local_xy(lat, lon))
+    for i, tolerance in enumerate(TOLERANCES_M):
+        kept = np.flatnonzero(weights > tolerance).astype(np.int64)
+        arrays[f"level{i}"] = _delta(kept).astype(np.uint32)
+    return arrays
+
+
+def haversine(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Great-circle length in metres of each segment between consecutive points."""
+    phi, lam = np.radians(lat), np.radians(lon)
+    a = np.sin(np.diff(phi) / 2) ** 2 + np.cos(phi[:-1]) * np.cos(phi[1:]) * np.sin(np.diff(lam) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def metrics(lat: np.ndarray, lon: np.ndarray, times: Optional[np.ndarray] = None) -> dict:
+    """Distance, bounding box and, when the points carry times, duration and speeds (m/s)."""
+    segments = haversine(lat, lon)
+    result = {
+        "pointCount": int(len(lat)),
+        "distanceMeters": round(float(segments.sum()), 1),
+        "bbox": [float(lat.min()), float(lon.min()), float(lat.max()), float(lon.max())] if len(lat) else None,
+        "startedAt": None, "endedAt": None, "durationSeconds": None,
+        "avgSpeed": None, "maxSpeed": None,
+    }
+    if times is not None and len(times):
+        duration = (int(times[-1]) - int(times[0])) / 1000
+        elapsed = np.diff(times) / 1000
+        moving = elapsed > 0
+        result.update({
+            "startedAt": datetime.fromtimestamp(int(times[0]) / 1000).isoformat(),
+            "endedAt": datetime.fromtimestamp(int(times[-1]) / 1000).isoformat(),
+            "durationSeconds": duration,
+            "avgSpeed": round(result["distanceMeters"] / duration, 3) if duration > 0 else None,
+            "maxSpeed": round(float((segments[moving] / elapsed[moving]).max()), 3) if moving.any() else None,
+        })
+    return result
+
+
+def _summary(route_id: str, meta: dict, lat: np.ndarray, lon: np.ndarray, times: Optional[np.ndarray]) -> dict:
+    # Routes written before metrics were stored get them computed on load.
+    route_metrics = meta.get("metrics") or metrics(lat, lon, times)
+    return {"routeId": route_id, "name": meta.get("name"), "createdAt": meta.get("createdAt"), **route_metrics}
+
+
+def save(route_id: str, name: Optional[str], points: List[dict], created_at: Optional[str] = None) -> dict:
+    """Writes a route given as {lat, lng, time?} points and returns its summary."""
+    lat = np.array([p["lat"] for p in points], dtype=np.float64)
+    lon = np.array([p["lng"] for p in points], dtype=np.float64)
+    times = [p.get("time") for p in points]
+    times = np.array(times, dtype=np.int64) if points and all(t is not None for t in times) else None
+    return save_columns(route_id, name, lat, lon, times, created_at)
+
+
+def save_columns(route_id: str, name: Optional[str], lat: np.ndarray, lon: np.ndarray,
+                 times: Optional[np.ndarray] = None, created_at: Optional[str] = None) -> dict:
+    """Writes a route's compact file, indexes its summary and returns it."""
+    meta = {
+        "name": name, "createdAt": created_at or datetime.now().isoformat(),
+        "metrics": metrics(lat, lon, times),
+    }
+    arrays = encode(lat, lon, times)
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, meta=np.array(json.dumps(meta)), **arrays)
+    ROUTES_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = route_path(route_id).with_suffix(".tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(buffer.getvalue())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, route_path(route_id))
+    with _lock:
+        _cache.pop(route_id, None)
+    summary = _read(route_id)["summary"]
+    route_index.put(summary, route_path(route_id).stat().st_mtime)
+    return summary
+
+
+def _read(route_id: str) -> dict:
+    with np.load(route_path(route_id)) as data:
+        meta = json.loads(str(data["meta"]))
+        lat = _undelta(data["lat"]) / COORD_SCALE
+        lon = _wrap(_undelta(data["lon"])) / COORD_SCALE
+        times = _undelta(data["time"]) if "time" in data else None
+        levels = [_undelta(data[f"level{i}"]) for i in range(len(TOLERANCES_M))]
+    return {"summary": _summary(route_id, meta, lat, lon, times), "lat": lat, "lon": lon, "time": times, "levels": levels}
+
+
+def load(route_id: str) -> dict:
+    """The decoded route: summary, float lat/lon columns, times (or None) and level indices."""
+    mtime = route_path(route_id).stat().st_mtime
+    with _lock:
+        cached = _cache.get(route_id)
+        if cached and cached[0] == mtime:
+            _cache.move_to_end(route_id)
+            return cached[1]
+    route = _read(route_id)
+    with _lock:
+        _cache[route_id] = (mtime, route)
+        _cache.move_to_end(route_id)
+        while len(_cache) > CACHE_ROUTES:
+            _cache.popitem(last=False)
+    return route
+
+
+def tolerance_for_zoom(zoom: int, latitude: float = 0.0) -> float:
+    """Half a screen pixel in metres at a Web Mercator zoom level."""
+    return 156543.03392 * math.cos(math.radians(latitude)) / (2 ** zoom) / 2
+
+
+def level_for_zoom(route: dict, zoom: int) -> Optional[int]:
+    """The coarsest level whose error stays under half a pixel at `zoom`; None when only every point will do."""
+    bbox = route["summary"]["bbox"]
+    if not bbox:
+        return None
+    tolerance = tolerance_for_zoom(zoom, (bbox[0] + bbox[2]) / 2)
+    fitting = [i for i, level_tolerance in enumerate(TOLERANCES_M) if level_tolerance <= tolerance]
+    return fitting[-1] if fitting else None
+
+
+def geometry(route: dict, level: Optional[int] = None) -> dict:
+    """The route's points at a simplification level (every point, with times, when None) as [lat, lng] pairs."""
+    indices = route["levels"][level] if level is not None else np.arange(len(route["lat"]))
+    result = {
+        "level": level,
+        "tolerance": TOLERANCES_M[level] if level is not None else 0.0,
+        "path": np.round(np.column_stack([route["lat"][indices], route["lon"][indices]]), 6).tolist(),
+    }
+    if level is None and route["time"] is not None:
+        result["times"] = route["time"].tolist()
+    return result
+
+
+def _feed_record(route: dict) -> dict:
+    return {**route["summary"], "path": geometry(route, 0)["path"]}
+
+
+def feed_record(route_id: str) -> dict:
+    """What the change feed carries for a route: its summary and the finest simplified path."""
+    return _feed_record(load(route_id))
+
+
+def read_feed_record(route_id: str) -> dict:
+    """feed_record without filling the cache, for reconciling the feed at startup."""
+    return _feed_record(_read(route_id))
+
+
+def route_mtimes() -> Dict[str, float]:
+    return {path.stem: path.stat().st_mtime for path in ROUTES_DIR.glob("*.npz")}
+
+
+def route_ids() -> List[str]:
+    return sorted(path.stem for path in ROUTES_DIR.glob("*.npz"))
+
+
+def sync_index():
+    """
+    Brings the route index in line with the files on disk: routes saved before
+    the index existed, or changed or deleted behind its back, are re-read.
+    """
+    indexed = route_index.mtimes()
+    on_disk = {route_id: route_path(route_id).stat().st_mtime for route_id in route_ids()}
+    stale = [route_id for route_id, mtime in on_disk.items() if indexed.get(route_id) != mtime]
+    for route_id in stale:
+        try:
+            route_index.put(_read(route_id)["summary"], on_disk[route_id])
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Could not index route '{route_id}': {e}")
+    route_index.remove([route_id for route_id in indexed if route_id not in on_disk])
+    if stale:
+        print(f"Route index updated {len(stale)} route(s).")
+
+
+def migrate():
+    """Converts routes saved as JSON point lists to the compact format, keeping the JSON as a .bak."""
+    for json_path in sorted(ROUTES_DIR.glob("*.json")):
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            created_at = datetime.fromtimestamp(json_path.stat().st_mtime).isoformat()
+            save(json_path.stem, data.get("name") or json_path.stem, data.get("points", []),
+                 data.get("createdAt") or created_at)
+            os.replace(json_path, json_path.with_suffix(".json.bak"))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Could not convert route '{json_path.name}': {e}")
@@ -0,0 +1,193 @@
+# backend/core/script_registry.py
+import json
+import math
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .config import BACKEND_DIR
+from .watcher import PollingWatcher, snapshot_mtimes
+
+ANALYSIS_DIR = BACKEND_DIR / "analysis"
+
+PARAMETER_TYPES = {"number", "text", "boolean"}
+
+
+class ParameterError(ValueError):
+    """Raised when a job payload does not match the script's parameter schema."""
+
+
+_lock = threading.Lock()
+_scripts: Dict[str, dict] = {}
+_listing: List[dict] = []
+_watcher: Optional[PollingWatcher] = None
+
+
+def _coerce(param: dict, value: Any) -> Any:
+    """Converts a submitted value (the UI sends strings) to the declared type."""
+    name = param["name"]
+    kind = param.get("type", "text")
+
+    if kind == "number":
+        if isinstance(value, bool):
+            raise ParameterError(f"Parameter '{name}' must be a number.")
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            raise ParameterError(f"Parameter '{name}' must be a number.")
+        if not math.isfinite(number):
+            raise ParameterError(f"Parameter '{name}' must be a finite number.")
+        if param.get("integer"):
+            if not number.is_integer():
+                raise ParameterError(f"Parameter '{name}' must be a whole number.")
+            number = int(number)
+        if "min" in param and number < param["min"]:
+            raise ParameterError(f"Parameter '{name}' must be at least {param['min']}.")
+        if "max" in param and number > param["max"]:
+            raise ParameterError(f"Parameter '{name}' must be at most {param['max']}.")
+        return number
+
+    if kind == "boolean":
+        if isinstance(value, bool):
+            return value
+        if str(value).lower() in ("true", "1", "yes", "on"):
+            return True
+        if str(value).lower() in ("false", "0", "no", "off"):
+            return False
+        raise ParameterError(f"Parameter '{name}' must be true or false.")
+
+    value = str(value)
+    if "choices" in param and value not in param["choices"]:
+        raise ParameterError(f"Parameter '{name}' must be one of: {', '.join(param['choices'])}.")
+    return value
+
+
+def load_manifest(script_dir: Path) -> dict:
+    """Reads and validates one script's manifest. Raises ValueError if it is malformed."""
+    with open(script_dir / "manifest.json", 'r') as f:
+        manifest = json.load(f)
+
+    for key in ("name", "description"):
+        if not isinstance(manifest.get(key), str):
+            raise ValueError(f"manifest is missing '{key}'")
+    if not (script_dir / "wrapper.py").exists():
+        raise ValueError("wrapper.py not found")
+
+    parameters = manifest.get("parameters", [])
+    if not isinstance(parameters, list):
+        raise ValueError("'parameters' must be a list")
+    seen = set()
+    for param in parameters:
+        if not isinstance(param, dict) or not isinstance(param.get("name"), str):
+            raise ValueError("every parameter needs a 'name'")
+        if param["name"] in seen:
+            raise ValueError(f"duplicate parameter '{param['name']}'")
+        seen.add(param["name"])
+        if param.get("type", "text") not in PARAMETER_TYPES:
+            raise ValueError(f"parameter '{param['name']}' has unknown type '{param.get('type')}'")
+        if not str(param.get("argument", "--")).startswith("--"):
+            raise ValueError(f"parameter '{param['name']}' has an argument that does not start with '--'")
+        if param.get("default") is not None:
+            try:
+                _coerce(param, param["default"])
+            except ParameterError as e:
+                raise ValueError(f"invalid default: {e}")
+
+    manifest["parameters"] = parameters
+    manifest["id"] = script_dir.name  # Use directory name as the unique ID
+    return manifest
+
+
+def reload():
+    """Rebuilds the registry from every manifest under the analysis directory."""
+    scripts = {}
+    if ANALYSIS_DIR.exists():
+        for script_dir in sorted(ANALYSIS_DIR.iterdir()):
+            if not (script_dir / "manifest.json").exists():
+                continue
+            try:
+                scripts[script_dir.name] = load_manifest(script_dir)
+            except Exception as e:
+                print(f"Skipping analysis script '{script_dir.name}': {e}")
+
+    global _scripts, _listing
+    with _lock:
+        _scripts = scripts
+        _listing = list(scripts.values())
+    print(f"Analysis script registry loaded {len(scripts)} script(s).")
+
+
+def list_scripts() -> List[dict]:
+    return list(_listing)
+
+
+def get_script(script_id: str) -> Optional[dict]:
+    return _scripts.get(script_id)
+
+
+def validate_parameters(script_id: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Checks a job's parameters against the script's manifest and returns them
+    typed, with defaults filled in. Raises ParameterError on the first problem.
+    """
+    script = get_script(script_id)
+    if script is None:
+        raise ParameterError(f"Unknown analysis script '{script_id}'.")
+
+    declared = {param["name"]: param for param in script["parameters"]}
+    unknown = sorted(set(parameters) - set(declared))
+    if unknown:
+        raise ParameterError(f"Unknown parameter(s): {', '.join(unknown)}.")
+
+    cleaned = {}
+    for name, param in declared.items():
+        value = parameters.get(name)
+        if value is None or (isinstance(value, str) and value.strip() == ""):
+            if param.get("required") and param.get("default") is None:
+                raise ParameterError(f"Parameter '{name}' is required.")
+            value = param.get("default")
+        cleaned[name] = None if value is None else _coerce(param, value)
+    return cleaned
+
+
+def command_arguments(script_id: str, parameters: Dict[str, Any]) -> Dict[str, List[str]]:
+    """
+    The command-line arguments for validated parameters, grouped by the
+    parameter's `stage` ("main" unless the manifest says otherwise, for
+    scripts that run more than one program). Each parameter becomes its
+    `argument` (by default --name-in-kebab-case) followed by its value; a
+    boolean is the bare flag when true and left out when false.
+    """
+    script = get_script(script_id)
+    if script is None:
+        raise ParameterError(f"Unknown analysis script '{script_id}'.")
+    arguments: Dict[str, List[str]] = {}
+    for param in script["parameters"]:
+        value = parameters.get(param["name"])
+        stage = arguments.setdefault(param.get("stage", "main"), [])
+        if value is None or value is False:
+            continue
+        flag = param.get("argument", "--" + param["name"].replace("_", "-"))
+        stage.extend([flag] if value is True else [flag, str(value)])
+    return arguments
+
+
+def _manifest_snapshot():
+    paths = [ANALYSIS_DIR]
+    if ANALYSIS_DIR.exists():
+        for script_dir in ANALYSIS_DIR.iterdir():
+            if script_dir.is_dir():
+                paths.extend([script_dir, script_dir / "manifest.json"])
+    return snapshot_mtimes(paths)
+
+
+def start_watching(interval: float = 2.0):
+    global _watcher
+    if _watcher is None:
+        _watcher = PollingWatcher("script-registry", _manifest_snapshot, lambda changed: reload(), interval)
+    _watcher.start()
+
+
+def stop_watching():
+    if _watcher is not None:
+        _watcher.stop()
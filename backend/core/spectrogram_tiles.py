@@ -0,0 +1,205 @@
+# backend/core/spectrogram_tiles.py
+import hashlib
+import json
+import os
+import shutil
+import struct
+import threading
+import zlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+import soundfile as sf
+
+from . import recording_catalog
+from .config import DATA_DIR, ROOT_DIR
+
+TILES_DIR = DATA_DIR / "processing" / "spectrograms"
+SPOTS_DIR = DATA_DIR / "spots"
+
+# Same STFT as compute_acoustic_indices, so the tiles show what the indices measured.
+NPERSEG = 1024
+HOP = 512
+FREQ_ROWS = 256          # 513 rfft bins pooled in pairs (Nyquist bin dropped)
+TILE_WIDTH = 512         # STFT columns per tile
+DB_MIN, DB_MAX = -120.0, 0.0
+READ_FRAMES = 2048       # STFT columns computed per block read from disk
+POOL_ROWS = 65536        # columns downsampled per step when building coarser levels
+
+# Pyramids are evicted least-recently-viewed first once the cache exceeds this.
+CACHE_BYTES = 2 * 1024 ** 3
+
+_build_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+_evict_lock = threading.Lock()
+
+
+def resolve_recording(rel_path: str) -> Path:
+    """Maps a project-relative recording path to a file under data/spots, refusing anything outside it."""
+    path = Path(os.path.abspath(ROOT_DIR / rel_path))
+    if not path.exists():
+        path = Path(os.path.abspath(ROOT_DIR / recording_catalog.resolve(rel_path)))
+    if not path.is_relative_to(SPOTS_DIR) or not path.is_file():
+        raise FileNotFoundError(f"Recording '{rel_path}' not found.")
+    return path
+
+
+def _cache_dir(rel_path: str) -> Path:
+    return TILES_DIR / hashlib.sha1(rel_path.encode("utf-8")).hexdigest()
+
+
+def _lock_for(key: str) -> threading.Lock:
+    with _locks_guard:
+        return _build_locks.setdefault(key, threading.Lock())
+
+
+def _to_uint8(power: np.ndarray) -> np.ndarray:
+    db = 10 * np.log10(power + 1e-20)
+    return np.round((np.clip(db, DB_MIN, DB_MAX) - DB_MIN) * (255 / (DB_MAX - DB_MIN))).astype(np.uint8)
+
+
+def _stft_blocks(path: Path):
+    """Yields uint8 spectrogram columns (n, FREQ_ROWS) for a file, reading it in bounded blocks."""
+    window = np.hanning(NPERSEG).astype(np.float32)
+    scale = 1.0 / float(window.sum()) ** 2
+    blocksize = HOP * READ_FRAMES + (NPERSEG - HOP)
+    for block in sf.blocks(str(path), blocksize=blocksize, overlap=NPERSEG - HOP, dtype='float32', always_2d=True):
+        mono = block.mean(axis=1)
+        if len(mono) < NPERSEG:
+            break
+        frames = np.lib.stride_tricks.sliding_window_view(mono, NPERSEG)[::HOP]
+        power = np.abs(np.fft.rfft(frames * window, axis=1)) ** 2 * scale
+        pooled = power[:, :FREQ_ROWS * 2].reshape(len(frames), FREQ_ROWS, 2).mean(axis=2)
+        yield _to_uint8(pooled)
+
+
+def _build(source: Path, cache_dir: Path, stat: os.stat_result) -> dict:
+    """
+    Writes every zoom level into one uint8 memmap. Level 0 is the full STFT
+    resolution; each coarser level max-pools pairs of columns, so brief calls
+    stay visible when zoomed out. Levels are stored finest first.
+    """
+    info = sf.info(str(source))
+    columns = max((info.frames - NPERSEG) // HOP + 1, 1)
+    widths = [columns]
+    while widths[-1] > TILE_WIDTH:
+        widths.append((widths[-1] + 1) // 2)
+    offsets = np.concatenate([[0], np.cumsum(widths)]).astype(int).tolist()
+
+    tmp_dir = cache_dir.with_name(cache_dir.name + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    pyramid = np.lib.format.open_memmap(tmp_dir / "pyramid.npy", mode='w+', dtype=np.uint8,
+                                        shape=(offsets[-1], FREQ_ROWS))
+    position = 0
+    for block in _stft_blocks(source):
+        block = block[:columns - position]
+        pyramid[position:position + len(block)] = block
+        position += len(block)
+
+    for level in range(1, len(widths)):
+        src_start, dst_start = offsets[level - 1], offsets[level]
+        for start in range(0, widths[level - 1], POOL_ROWS):
+            chunk = np.asarray(pyramid[src_start + start:src_start + min(start + POOL_ROWS, widths[level - 1])])
+            if len(chunk) % 2:
+                chunk = np.concatenate([chunk, chunk[-1:]])
+            pooled = chunk.reshape(-1, 2, FREQ_ROWS).max(axis=1)
+            pyramid[dst_start + start // 2:dst_start + start // 2 + len(pooled)] = pooled
+    pyramid.flush()
+    del pyramid
+
+    meta = {
+        "size": stat.st_size, "mtime": stat.st_mtime,
+        "sample_rate": info.samplerate, "duration": info.frames / info.samplerate,
+        "nperseg": NPERSEG, "hop": HOP, "freq_rows": FREQ_ROWS,
+        "max_frequency": info.samplerate / 2,
+        "tile_width": TILE_WIDTH, "db_range": [DB_MIN, DB_MAX],
+        # Zoom 0 is the coarsest level (the whole file in one tile).
+        "zoom_levels": [
+            {"zoom": zoom, "columns": widths[level], "tiles": -(-widths[level] // TILE_WIDTH),
+             "seconds_per_column": HOP * 2 ** level / info.samplerate, "offset": offsets[level]}
+            for zoom, level in enumerate(reversed(range(len(widths))))
+        ],
+    }
+    with open(tmp_dir / "meta.json", 'w') as f:
+        json.dump(meta, f, indent=4)
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.replace(tmp_dir, cache_dir)
+    return meta
+
+
+def get_pyramid(rel_path: str) -> dict:
+    """Metadata for a recording's tile pyramid, building it first if it is missing or stale."""
+    source = resolve_recording(rel_path)
+    stat = source.stat()
+    cache_dir = _cache_dir(rel_path)
+    meta_path = cache_dir / "meta.json"
+    with _lock_for(rel_path):
+        meta = None
+        if meta_path.exists():
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            if meta["size"] != stat.st_size or meta["mtime"] != stat.st_mtime:
+                meta = None
+        if meta is None:
+            meta = _build(source, cache_dir, stat)
+            evict()
+        else:
+            os.utime(meta_path)  # marks the pyramid as recently viewed for eviction
+    return meta
+
+
+def _png(gray: np.ndarray) -> bytes:
+    """Encodes an 8-bit grayscale image as PNG with the standard library's zlib."""
+    height, width = gray.shape
+    raw = np.hstack([np.zeros((height, 1), dtype=np.uint8), gray]).tobytes()  # filter byte 0 per row
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw, 6))
+            + chunk(b"IEND", b""))
+
+
+@lru_cache(maxsize=1024)
+def _render_tile(cache_dir: str, mtime: float, offset: int, columns: int, x: int) -> bytes:
+    pyramid = np.load(Path(cache_dir) / "pyramid.npy", mmap_mode='r')
+    start = offset + x * TILE_WIDTH
+    tile = np.zeros((TILE_WIDTH, FREQ_ROWS), dtype=np.uint8)
+    width = min(TILE_WIDTH, columns - x * TILE_WIDTH)
+    tile[:width] = pyramid[start:start + width]
+    return _png(np.ascontiguousarray(tile.T[::-1]))  # time left to right, high frequencies on top
+
+
+def get_tile(rel_path: str, zoom: int, x: int) -> bytes:
+    """One PNG tile (TILE_WIDTH columns x FREQ_ROWS rows) of a recording's spectrogram at a zoom level."""
+    meta = get_pyramid(rel_path)
+    levels = meta["zoom_levels"]
+    if not 0 <= zoom < len(levels) or not 0 <= x < levels[zoom]["tiles"]:
+        raise IndexError(f"No tile {x} at zoom {zoom}.")
+    level = levels[zoom]
+    return _render_tile(str(_cache_dir(rel_path)), meta["mtime"], level["offset"], level["columns"], x)
+
+
+def evict(max_bytes: int = CACHE_BYTES):
+    """Deletes least-recently-viewed pyramids until the cache fits in `max_bytes`."""
+    with _evict_lock:
+        if not TILES_DIR.exists():
+            return
+        entries = []
+        for cache_dir in TILES_DIR.iterdir():
+            meta_path = cache_dir / "meta.json"
+            if cache_dir.name.endswith(".tmp") or not meta_path.exists():
+                continue
+            size = sum(f.stat().st_size for f in cache_dir.iterdir())
+            entries.append((meta_path.stat().st_mtime, size, cache_dir))
+        total = sum(size for _, size, _ in entries)
+        for _, size, cache_dir in sorted(entries):
+            if total <= max_bytes:
+                break
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            total -= size
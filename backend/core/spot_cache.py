@@ -0,0 +1,85 @@
+# backend/core/spot_cache.py
+import hashlib
+import json
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from . import change_feed, spot_index, spot_store
+from .config import DATA_DIR
+
+SPOTS_DIR = DATA_DIR / "spots"
+
+_lock = threading.Lock()
+_spots: Dict[str, dict] = {}
+# Serialised /get-spots body and its ETag, rebuilt on the first read after a change.
+_payload: Optional[Tuple[str, bytes]] = None
+
+
+def load():
+    """Reads every spot's header and observation log once; afterwards the write paths keep the cache current."""
+    global _payload
+    spots = {}
+    if SPOTS_DIR.exists():
+        for spot_file in SPOTS_DIR.glob(f"*/{spot_store.HEADER_FILE}"):
+            try:
+                spots[spot_file.parent.name] = spot_store.load_spot(spot_file.parent.name)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"Could not load spot '{spot_file.parent.name}': {e}")
+    with _lock:
+        _spots.clear()
+        _spots.update(spots)
+        _payload = None
+    spot_index.rebuild(list(spots.values()))
+    print(f"Spot cache loaded {len(spots)} spot(s).")
+
+
+def put(spot_data: dict):
+    """Write-through update, called after a spot has been created or rewritten on disk."""
+    global _payload
+    with _lock:
+        _spots[spot_data["spotId"]] = spot_data
+        _payload = None
+    spot_index.update(spot_data)
+    change_feed.record_spot(spot_data)
+    for observation in spot_data.get("observations", []):
+        change_feed.record_observation(spot_data["spotId"], observation)
+
+
+def add_observation(spot_id: str, observation: dict) -> dict:
+    """Write-through update after an observation is appended to a spot's log; returns the full spot."""
+    global _payload
+    with _lock:
+        spot = _spots.get(spot_id)
+        is_new = spot is None
+        if is_new:
+            # Created outside this process since startup; the log already holds the new line.
+            spot = _spots[spot_id] = spot_store.load_spot(spot_id)
+            spot_index.update(spot)
+        else:
+            spot["observations"].append(observation)
+            spot_index.add_observation(spot_id, observation)
+        _payload = None
+    if is_new:
+        change_feed.record_spot(spot)
+    change_feed.record_observation(spot_id, observation)
+    return spot
+
+
+def get(spot_id: str) -> Optional[dict]:
+    with _lock:
+        return _spots.get(spot_id)
+
+
+def all_spots() -> List[dict]:
+    with _lock:
+        return [_spots[slug] for slug in sorted(_spots)]
+
+
+def payload() -> Tuple[str, bytes]:
+    """(ETag, JSON body) for the full spot list; unchanged between writes."""
+    global _payload
+    with _lock:
+        if _payload is None:
+            body = json.dumps([_spots[slug] for slug in sorted(_spots)], separators=(',', ':')).encode("utf-8")
+            _payload = (f'"{hashlib.sha1(body).hexdigest()}"', body)
+        return _payload
@@ -0,0 +1,131 @@
+# backend/core/spot_index.py
+import math
+import threading
+from typing import Dict, List, Set, Tuple
+
+# Spots are bucketed into a fixed grid of CELL_DEGREES squares, so a viewport
+# query only touches the cells it overlaps (or, for very large viewports,
+# only the cells that actually hold spots).
+CELL_DEGREES = 0.1
+
+# Spots closer than CLUSTER_PIXELS on screen are merged into one cluster
+# marker, up to CLUSTER_MAX_ZOOM; beyond it every spot is drawn.
+CLUSTER_PIXELS = 60
+CLUSTER_MAX_ZOOM = 16
+TILE_SIZE = 256
+
+_lock = threading.Lock()
+_cells: Dict[Tuple[int, int], Set[str]] = {}
+_summaries: Dict[str, dict] = {}
+
+
+def _cell(lat: float, lng: float) -> Tuple[int, int]:
+    return math.floor(lat / CELL_DEGREES), math.floor(lng / CELL_DEGREES)
+
+
+def summarize(spot: dict) -> dict:
+    """The lightweight per-spot record the map needs; observations are fetched per spot on demand."""
+    observations = spot.get("observations", [])
+    timestamps = [obs.get("createdAt") or obs.get("timestamp") or "" for obs in observations]
+    return {
+        "spotId": spot["spotId"], "name": spot["name"],
+        "latitude": float(spot["latitude"]), "longitude": float(spot["longitude"]),
+        "observationCount": len(observations),
+        "hasExternalData": any(obs.get("type") == "external_import" for obs in observations),
+        "lastObservedAt": max(timestamps, default="") or None,
+    }
+
+
+def _remove(spot_id: str):
+    previous = _summaries.pop(spot_id, None)
+    if previous:
+        cell = _cell(previous["latitude"], previous["longitude"])
+        _cells[cell].discard(spot_id)
+        if not _cells[cell]:
+            del _cells[cell]
+
+
+def update(spot: dict):
+    summary = summarize(spot)
+    with _lock:
+        _remove(summary["spotId"])
+        _summaries[summary["spotId"]] = summary
+        _cells.setdefault(_cell(summary["latitude"], summary["longitude"]), set()).add(summary["spotId"])
+
+
+def add_observation(spot_id: str, observation: dict):
+    """Updates a spot's summary for one new observation without rescanning its history."""
+    with _lock:
+        summary = _summaries.get(spot_id)
+        if summary is None:
+            return
+        summary["observationCount"] += 1
+        summary["hasExternalData"] |= observation.get("type") == "external_import"
+        timestamp = observation.get("createdAt") or observation.get("timestamp") or ""
+        summary["lastObservedAt"] = max(summary["lastObservedAt"] or "", timestamp) or None
+
+
+def rebuild(spots: List[dict]):
+    with _lock:
+        _cells.clear()
+        _summaries.clear()
+    for spot in spots:
+        update(spot)
+
+
+def _in_box(south: float, west: float, north: float, east: float) -> List[dict]:
+    lat_range = range(math.floor(south / CELL_DEGREES), math.floor(north / CELL_DEGREES) + 1)
+    lng_range = range(math.floor(west / CELL_DEGREES), math.floor(east / CELL_DEGREES) + 1)
+    if len(lat_range) * len(lng_range) > len(_cells):
+        cells = [cell for cell in _cells if cell[0] in lat_range and cell[1] in lng_range]
+    else:
+        cells = [(i, j) for i in lat_range for j in lng_range if (i, j) in _cells]
+    found = []
+    for cell in cells:
+        for spot_id in _cells[cell]:
+            summary = _summaries[spot_id]
+            if south <= summary["latitude"] <= north and west <= summary["longitude"] <= east:
+                found.append(summary)
+    return found
+
+
+def query_box(south: float, west: float, north: float, east: float) -> List[dict]:
+    """Spot summaries inside a bounding box. A box with west > east crosses the antimeridian."""
+    with _lock:
+        if west > east:
+            return _in_box(south, west, north, 180.0) + _in_box(south, -180.0, north, east)
+        return _in_box(south, west, north, east)
+
+
+def _pixel(lat: float, lng: float, zoom: int) -> Tuple[float, float]:
+    """Web Mercator pixel coordinates at a zoom level, as used by the map tiles."""
+    scale = TILE_SIZE * 2 ** zoom
+    siny = min(max(math.sin(math.radians(lat)), -0.9999), 0.9999)
+    return (lng + 180) / 360 * scale, (0.5 - math.log((1 + siny) / (1 - siny)) / (4 * math.pi)) * scale
+
+
+def cluster(spots: List[dict], zoom: int) -> dict:
+    """
+    Groups spots that would overlap on screen at `zoom` into clusters
+    ({latitude, longitude, count, bounds}); isolated spots are returned as-is.
+    """
+    if zoom >= CLUSTER_MAX_ZOOM:
+        return {"clusters": [], "spots": spots}
+    groups: Dict[Tuple[int, int], List[dict]] = {}
+    for spot in spots:
+        x, y = _pixel(spot["latitude"], spot["longitude"], zoom)
+        groups.setdefault((int(x // CLUSTER_PIXELS), int(y // CLUSTER_PIXELS)), []).append(spot)
+
+    clusters, singles = [], []
+    for members in groups.values():
+        if len(members) == 1:
+            singles.append(members[0])
+            continue
+        lats = [m["latitude"] for m in members]
+        lngs = [m["longitude"] for m in members]
+        clusters.append({
+            "latitude": sum(lats) / len(lats), "longitude": sum(lngs) / len(lngs),
+            "count": len(members),
+            "bounds": [[min(lats), min(lngs)], [max(lats), max(lngs)]],
+        })
+    return {"clusters": clusters, "spots": singles}
@@ -0,0 +1,136 @@
+# backend/core/spot_store.py
+import json
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from .config import DATA_DIR
+from .write_path import append, write_atomic
+
+SPOTS_DIR = DATA_DIR / "spots"
+
+# A spot is a small header file (_data.json: spotId, name, latitude,
+# longitude) plus an append-only log with one observation per line, so a
+# save costs one appended line however long the spot's history is.
+HEADER_FILE = "_data.json"
+LOG_FILE = "observations.jsonl"
+
+
+def header_path(spot_slug: str) -> Path:
+    return SPOTS_DIR / spot_slug / HEADER_FILE
+
+
+def log_path(spot_slug: str) -> Path:
+    return SPOTS_DIR / spot_slug / LOG_FILE
+
+
+def spot_exists(spot_slug: str) -> bool:
+    return header_path(spot_slug).exists()
+
+
+def _encode(observation: dict) -> str:
+    return json.dumps(observation, separators=(',', ':')) + "\n"
+
+
+def _read_log(spot_slug: str) -> Tuple[List[dict], bool]:
+    """Returns (observations, clean). A torn or corrupt line makes the log unclean and is skipped."""
+    path = log_path(spot_slug)
+    if not path.exists():
+        return [], True
+    observations, clean = [], True
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data and not data.endswith(b"\n"):
+        clean = False
+    for line in data.splitlines():
+        if not line.strip():
+            continue
+        try:
+            observations.append(json.loads(line))
+        except json.JSONDecodeError:
+            clean = False
+    return observations, clean
+
+
+def compact(spot_slug: str, observations: Optional[List[dict]] = None):
+    """Rewrites a spot's log from its readable records, dropping torn or corrupt lines."""
+    if observations is None:
+        observations, _ = _read_log(spot_slug)
+    write_atomic(log_path(spot_slug), "".join(_encode(obs) for obs in observations))
+
+
+def _migrate(spot_slug: str, header: dict):
+    """
+    Moves observations out of a legacy all-in-one _data.json into the log.
+    The log is written before the header, so a crash in between is repeated
+    on the next load; observations already in the log are not added again.
+    """
+    observations = header.pop("observations", [])
+    existing, _ = _read_log(spot_slug)
+    logged = {obs.get("observationId") or _encode(obs) for obs in existing}
+    missing = [obs for obs in observations if (obs.get("observationId") or _encode(obs)) not in logged]
+    compact(spot_slug, existing + missing)
+    write_atomic(header_path(spot_slug), json.dumps(header, indent=2))
+
+
+def _dedupe_ids(observations: List[dict]) -> bool:
+    """
+    Gives repeated observation ids a suffix. External imports used to be
+    named by the second they happened, so two in one second shared an id.
+    Returns whether anything was renamed.
+    """
+    seen, renamed = set(), False
+    for observation in observations:
+        observation_id = observation.get("observationId")
+        if observation_id is None:
+            continue
+        unique, n = observation_id, 1
+        while unique in seen:
+            n += 1
+            unique = f"{observation_id}-{n}"
+        if unique != observation_id:
+            observation["observationId"] = unique
+            renamed = True
+        seen.add(unique)
+    return renamed
+
+
+def load_spot(spot_slug: str) -> dict:
+    """The full spot record ({spotId, name, latitude, longitude, observations}) from header and log."""
+    with open(header_path(spot_slug), 'r', encoding='utf-8') as f:
+        header = json.load(f)
+    if "observations" in header:
+        _migrate(spot_slug, header)
+    observations, clean = _read_log(spot_slug)
+    if not clean:
+        print(f"Spot '{spot_slug}': compacting observation log with a torn or corrupt line.")
+        compact(spot_slug, observations)
+    if _dedupe_ids(observations):
+        print(f"Spot '{spot_slug}': renaming observations that shared an id.")
+        compact(spot_slug, observations)
+    return {**header, "observations": observations}
+
+
+def create_spot(spot_slug: str, name: str, latitude: float, longitude: float) -> dict:
+    header = {"spotId": spot_slug, "name": name, "latitude": latitude, "longitude": longitude}
+    (SPOTS_DIR / spot_slug).mkdir(parents=True, exist_ok=True)
+    log_path(spot_slug).touch()
+    write_atomic(header_path(spot_slug), json.dumps(header, indent=2))
+    return header
+
+
+async def append_observation(spot_slug: str, observation: dict):
+    """Appends through the group-commit writer; returns once the line is on disk."""
+    await append(log_path(spot_slug), _encode(observation))
+
+
+async def append_observations(spot_slug: str, observations: List[dict]):
+    """Appends several observations as one write (and one fsync)."""
+    await append(log_path(spot_slug), "".join(_encode(obs) for obs in observations))
+
+
+def page(observations: List[dict], offset: int, limit: int, newest_first: bool = True) -> List[dict]:
+    """A page of a spot's observations in log (insertion) order or newest first."""
+    if not newest_first:
+        return observations[offset:offset + limit]
+    end = len(observations) - offset
+    return observations[max(end - limit, 0):max(end, 0)][::-1]
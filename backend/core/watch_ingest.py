@@ -0,0 +1,296 @@
+# backend/core/watch_ingest.py
+import csv
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from . import recording_catalog, script_registry
+from .config import DATA_DIR, ROOT_DIR
+from .db import connect
+from .jobs import create_job, get_job_dir, run_job_process
+
+WATCH_CONFIG_FILE = DATA_DIR / "processing" / "watch.json"
+INGEST_DB = DATA_DIR / "processing" / "ingest.sqlite"
+SPOTS_DIR = DATA_DIR / "spots"
+
+# Scripts whose results.csv rows can be appended to a running per-spot output.
+WATCHABLE_SCRIPTS = ("acoustic_indices", "birdnet_predict")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingested (
+    path TEXT NOT NULL,
+    script_id TEXT NOT NULL,
+    job_id TEXT,
+    status TEXT NOT NULL,
+    ingested_at TEXT NOT NULL,
+    PRIMARY KEY (path, script_id)
+);
+"""
+
+_lock = threading.RLock()
+_conn = None
+_config: Dict[str, dict] = {}
+_pending: Dict[str, Dict[str, float]] = {}
+_last_arrival: Dict[str, float] = {}
+_wake = threading.Event()
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+
+def _db():
+    global _conn
+    if _conn is None:
+        _conn = connect(INGEST_DB)
+        _conn.executescript(SCHEMA)
+    return _conn
+
+
+def running_output_path(spot: str, script_id: str) -> Path:
+    return SPOTS_DIR / spot / "analysis" / f"{script_id}_running.csv"
+
+
+def _load_config():
+    global _config
+    if WATCH_CONFIG_FILE.exists():
+        with open(WATCH_CONFIG_FILE, 'r') as f:
+            _config = json.load(f)
+
+
+def _save_config():
+    WATCH_CONFIG_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = WATCH_CONFIG_FILE.with_suffix(".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(_config, f, indent=4)
+    os.replace(tmp_path, WATCH_CONFIG_FILE)
+
+
+def _mark_ingested(paths: List[str], script_id: str, job_id: Optional[str], status: str):
+    now = time.strftime("%Y-%m-%dT%H:%M:%S")
+    with _lock:
+        conn = _db()
+        conn.executemany(
+            "INSERT OR REPLACE INTO ingested (path, script_id, job_id, status, ingested_at) VALUES (?, ?, ?, ?, ?)",
+            [(path, script_id, job_id, status, now) for path in paths],
+        )
+        conn.commit()
+
+
+def _not_ingested(paths: List[str], script_id: str) -> List[str]:
+    done = set()
+    with _lock:
+        conn = _db()
+        for i in range(0, len(paths), 500):
+            chunk = paths[i:i + 500]
+            rows = conn.execute(
+                f"SELECT path FROM ingested WHERE script_id = ? AND path IN ({', '.join('?' * len(chunk))})",
+                (script_id, *chunk),
+            )
+            done.update(row["path"] for row in rows)
+    return [path for path in paths if path not in done]
+
+
+def is_pending(path: str) -> bool:
+    """Whether a recording is queued for a watch-mode batch that has not run yet."""
+    with _lock:
+        return any(path in pending for pending in _pending.values())
+
+
+def carry_over(original_path: str, new_path: str):
+    """Marks a recording's new path (e.g. after archival to FLAC) as analysed by the same scripts as the old one."""
+    now = time.strftime("%Y-%m-%dT%H:%M:%S")
+    with _lock:
+        conn = _db()
+        conn.execute(
+            "INSERT OR REPLACE INTO ingested (path, script_id, job_id, status, ingested_at) "
+            "SELECT ?, script_id, job_id, status, ? FROM ingested WHERE path = ?",
+            (new_path, now, original_path),
+        )
+        conn.commit()
+
+
+def get_watches() -> Dict[str, dict]:
+    with _lock:
+        return {
+            spot: {**config, "pending_files": len(_pending.get(spot, {}))}
+            for spot, config in _config.items()
+        }
+
+
+def set_watch(
+    spot: str,
+    scripts: Dict[str, Dict[str, Any]],
+    debounce_seconds: float,
+    max_batch: int,
+    backfill: bool,
+    prescreen: Optional[dict] = None
+) -> dict:
+    """
+    Enables (or updates) the watch on a spot's external_data directory.
+    Parameters are validated against each script's manifest up front. Unless
+    `backfill` is set, recordings already on disk are treated as processed and
+    only files arriving from now on are analysed.
+    """
+    if not (SPOTS_DIR / spot / "_data.json").exists():
+        raise FileNotFoundError(f"Spot '{spot}' not found.")
+    if not scripts:
+        raise ValueError("Select at least one script to run on new recordings.")
+
+    validated = {}
+    for script_id, parameters in scripts.items():
+        if script_id not in WATCHABLE_SCRIPTS:
+            raise ValueError(f"Script '{script_id}' cannot be run in watch mode.")
+        validated[script_id] = script_registry.validate_parameters(script_id, parameters or {})
+
+    with _lock:
+        previous = _config.get(spot, {}).get("scripts", {})
+        existing = recording_catalog.list_paths(source="external", spot=spot)
+        for script_id in validated:
+            if script_id in previous:
+                continue
+            if backfill:
+                _pending.setdefault(spot, {}).update({path: 0.0 for path in _not_ingested(existing, script_id)})
+            else:
+                _mark_ingested(_not_ingested(existing, script_id), script_id, None, "baseline")
+        _config[spot] = {
+            "scripts": validated, "debounce_seconds": debounce_seconds,
+            "max_batch": max_batch, "prescreen": prescreen
+        }
+        _last_arrival[spot] = time.time()
+        _save_config()
+    _wake.set()
+    return _config[spot]
+
+
+def remove_watch(spot: str):
+    with _lock:
+        if spot not in _config:
+            raise FileNotFoundError(f"Spot '{spot}' is not being watched.")
+        del _config[spot]
+        _pending.pop(spot, None)
+        _save_config()
+
+
+def _on_catalog_update(records: List[dict]):
+    now = time.time()
+    with _lock:
+        for record in records:
+            spot = record["spot"]
+            if record["source"] != "external" or spot not in _config:
+                continue
+            _pending.setdefault(spot, {})[record["path"]] = record["mtime"]
+            _last_arrival[spot] = now
+    _wake.set()
+
+
+def _reconcile():
+    """Queues watched recordings that were catalogued but never analysed, e.g. while the server was down."""
+    with _lock:
+        for spot, config in _config.items():
+            paths = recording_catalog.list_paths(source="external", spot=spot)
+            for script_id in config["scripts"]:
+                _pending.setdefault(spot, {}).update({path: 0.0 for path in _not_ingested(paths, script_id)})
+            _last_arrival[spot] = time.time()
+
+
+def _append_running_output(spot: str, script_id: str, results_csv: Path):
+    running_path = running_output_path(spot, script_id)
+    running_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(results_csv, 'r', newline='', encoding='utf-8') as src:
+        reader = csv.DictReader(src)
+        if running_path.exists() and running_path.stat().st_size > 0:
+            with open(running_path, 'r', newline='', encoding='utf-8') as existing:
+                fieldnames = next(csv.reader(existing), reader.fieldnames)
+            write_header = False
+        else:
+            fieldnames = reader.fieldnames
+            write_header = True
+        with open(running_path, 'a', newline='', encoding='utf-8') as out:
+            writer = csv.DictWriter(out, fieldnames=fieldnames, extrasaction='ignore')
+            if write_header:
+                writer.writeheader()
+            writer.writerows(reader)
+
+
+def _ready_batch(spot: str) -> List[str]:
+    """The oldest settled files for a spot, once no new file has arrived for the debounce period."""
+    config = _config.get(spot)
+    pending = _pending.get(spot)
+    if not config or not pending:
+        return []
+    debounce = config["debounce_seconds"]
+    now = time.time()
+    if now - _last_arrival.get(spot, 0) < debounce:
+        return []
+    batch = []
+    for path in sorted(pending):
+        try:
+            mtime = (ROOT_DIR / path).stat().st_mtime
+        except OSError:
+            pending.pop(path, None)
+            continue
+        if now - mtime >= debounce:
+            batch.append(path)
+        if len(batch) >= config["max_batch"]:
+            break
+    return batch
+
+
+def _process_batch(spot: str, batch: List[str]):
+    config = _config.get(spot, {})
+    for script_id, parameters in config.get("scripts", {}).items():
+        todo = _not_ingested(batch, script_id)
+        if not todo:
+            continue
+        job_id, payload = create_job(
+            script_id, todo, parameters, prescreen=config.get("prescreen"), trigger="watch", spot_names=[spot]
+        )
+        print(f"Watch: running {script_id} on {len(todo)} new recording(s) from '{spot}' as job {job_id}.")
+        status = run_job_process(job_id, payload)
+        results_csv = get_job_dir(job_id) / "results.csv"
+        if status["status"] == "completed" and results_csv.exists():
+            _append_running_output(spot, script_id, results_csv)
+        # Failed batches are recorded too, so a corrupt file isn't retried forever;
+        # it can still be re-run by hand from the analysis panel.
+        _mark_ingested(todo, script_id, job_id, status["status"])
+
+
+def _run():
+    while not _stop.is_set():
+        _wake.wait(timeout=1)
+        _wake.clear()
+        for spot in list(_config):
+            with _lock:
+                batch = _ready_batch(spot)
+            if not batch:
+                continue
+            try:
+                _process_batch(spot, batch)
+            except Exception as e:
+                # The files stay pending and are retried after the spot's debounce period.
+                print(f"Watch: processing new recordings for '{spot}' failed: {e}")
+                with _lock:
+                    _last_arrival[spot] = time.time()
+                continue
+            with _lock:
+                for path in batch:
+                    _pending.get(spot, {}).pop(path, None)
+            _wake.set()
+
+
+def start():
+    """Loads watch settings, subscribes to catalog updates and starts the ingestion worker."""
+    global _thread
+    _load_config()
+    recording_catalog.add_listener(_on_catalog_update)
+    _reconcile()
+    _stop.clear()
+    _thread = threading.Thread(target=_run, name="watch-ingest", daemon=True)
+    _thread.start()
+
+
+def stop():
+    _stop.set()
+    _wake.set()
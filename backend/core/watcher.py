@@ -0,0 +1,76 @@
+# backend/core/watcher.py
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Set
+
+
+Snapshot = Dict[str, float]
+
+
+def snapshot_mtimes(paths: Iterable[Path]) -> Snapshot:
+    """Returns {path: mtime} for every path that currently exists."""
+    snapshot = {}
+    for path in paths:
+        try:
+            snapshot[str(path)] = path.stat().st_mtime
+        except OSError:
+            continue
+    return snapshot
+
+
+def diff_snapshots(old: Snapshot, new: Snapshot) -> Set[str]:
+    """Keys that were added, removed or whose value changed between two snapshots."""
+    changed = {key for key, value in new.items() if old.get(key) != value}
+    changed.update(key for key in old if key not in new)
+    return changed
+
+
+class PollingWatcher:
+    """
+    Calls `snapshot` every `interval` seconds on a daemon thread and passes the
+    keys that changed since the previous poll to `on_change`.
+
+    Polling keeps this dependency-free and behaves the same on the FAT/exFAT
+    USB drives recordings usually live on, where inotify is unreliable.
+    Snapshots should stay cheap (directory or manifest mtimes, not file walks).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        snapshot: Callable[[], Snapshot],
+        on_change: Callable[[Set[str]], None],
+        interval: float = 2.0,
+    ):
+        self.name = name
+        self.snapshot = snapshot
+        self.on_change = on_change
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last: Snapshot = {}
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._last = self.snapshot()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"watcher-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                current = self.snapshot()
+                changed = diff_snapshots(self._last, current)
+                self._last = current
+                if changed:
+                    self.on_change(changed)
+            except Exception as e:
+                print(f"Watcher '{self.name}' error: {e}")
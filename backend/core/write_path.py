@@ -0,0 +1,95 @@
+# backend/core/write_path.py
+import asyncio
+import os
+import weakref
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# An append waits this long for others to join its batch, so a burst of
+# saves from several devices shares one write and one fsync per file.
+COMMIT_WINDOW = 0.005
+
+# Only held weakly: a lock lives while someone holds or waits for it, so one
+# per import or route session doesn't accumulate for the life of the process.
+_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+_queue: Optional[asyncio.Queue] = None
+_worker: Optional[asyncio.Task] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def lock_for(resource: str) -> asyncio.Lock:
+    """
+    One asyncio lock per named resource (a lookup file, a spot), for
+    read-modify-write sections. Keep the returned lock referenced (e.g. with
+    `async with lock_for(...)`) for as long as it must stay the same lock.
+    """
+    lock = _locks.get(resource)
+    if lock is None:
+        lock = _locks[resource] = asyncio.Lock()
+    return lock
+
+
+def write_atomic(path: Path, text: str):
+    """Replaces a file's contents so readers see either the old or the new version, never a torn one."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _commit(batch: List[Tuple[Path, str, str, asyncio.Future]]) -> Dict[Path, Exception]:
+    """Writes a batch grouped by file, in arrival order: one write and one fsync per file."""
+    by_path = defaultdict(list)
+    for path, text, header, _ in batch:
+        by_path[path].append((text, header))
+    errors = {}
+    for path, items in by_path.items():
+        try:
+            with open(path, 'a', encoding='utf-8', newline='') as f:
+                header = items[0][1]
+                if header and f.tell() == 0:
+                    f.write(header)
+                f.write("".join(text for text, _ in items))
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            errors[path] = e
+    return errors
+
+
+async def _run():
+    while True:
+        batch = [await _queue.get()]
+        await asyncio.sleep(COMMIT_WINDOW)
+        while not _queue.empty():
+            batch.append(_queue.get_nowait())
+        try:
+            errors = await asyncio.to_thread(_commit, batch)
+        except Exception as e:
+            errors = {path: e for path, _, _, _ in batch}
+        for path, _, _, future in batch:
+            if future.done():
+                continue
+            if path in errors:
+                future.set_exception(errors[path])
+            else:
+                future.set_result(None)
+
+
+async def append(path: Path, text: str, header: str = ""):
+    """
+    Durably appends `text` to `path` through the group-commit writer and
+    returns once it has been fsynced. `header` is written first if the file
+    is new or empty.
+    """
+    global _queue, _worker, _loop
+    loop = asyncio.get_running_loop()
+    if _loop is not loop or _worker is None or _worker.done():
+        _loop, _queue = loop, asyncio.Queue()
+        _worker = loop.create_task(_run())
+    future = loop.create_future()
+    await _queue.put((Path(path), text, header, future))
+    await future
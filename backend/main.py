@@ -1,12 +1,67 @@
+from contextlib import asynccontextmanager
+from pathlib import Path
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.staticfiles import StaticFiles
+from starlette.exceptions import HTTPException
+
+from .api import sites, spots, routes, importer, analysis, detections, indices, similarity, spectrograms, observations, changes
+from .core import blob_store, bulk_import, change_feed, detection_store, embedding_index, flac_archive, image_derivatives, index_store, media_store, observation_store, recording_catalog, route_sessions, route_store, script_registry, spot_cache, watch_ingest
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    spot_cache.load()
+    observation_store.sync_from_spots(spot_cache.all_spots())
+    route_store.migrate()
+    route_store.sync_index()
+    change_feed.reconcile(spot_cache.all_spots(), route_store.route_mtimes(), route_store.read_feed_record)
+    media_store.prune_uploads()
+    bulk_import.prune_sessions()
+    route_sessions.prune_closed()
+    blob_store.prune_orphans()
+    script_registry.reload()
+    script_registry.start_watching()
+    detection_store.start()
+    index_store.start()
+    embedding_index.start()
+    watch_ingest.start()
+    flac_archive.start()
+    image_derivatives.start()
+    recording_catalog.start_watching()
+    yield
+    recording_catalog.stop_watching()
+    flac_archive.stop()
+    watch_ingest.stop()
+    script_registry.stop_watching()
+
+
+class DataFiles(StaticFiles):
+    """
+    Serves /data. A recording archived to FLAC is still found under the .wav
+    path that observations and exported links recorded for it.
+    """
+
+    async def get_response(self, path: str, scope):
+        try:
+            return await super().get_response(path, scope)
+        except HTTPException as e:
+            if e.status_code != 404:
+                raise
+            original = f"data/{Path(path).as_posix()}"
+            current = await run_in_threadpool(recording_catalog.resolve, original)
+            if current == original:
+                raise
+            return await super().get_response(current[len("data/"):], scope)
+
 
-from .api import sites, spots, routes, importer, analysis
 # Create the main FastAPI application
 app = FastAPI(
     title="Field Data Collector API",
     description="API for managing sites, spots, and routes.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.include_router(sites.router, prefix="/api")
@@ -14,9 +69,15 @@ app.include_router(spots.router, prefix="/api")
 app.include_router(routes.router, prefix="/api")
 app.include_router(importer.router, prefix="/api")
 app.include_router(analysis.router, prefix="/api")
+app.include_router(detections.router, prefix="/api")
+app.include_router(indices.router, prefix="/api")
+app.include_router(similarity.router, prefix="/api")
+app.include_router(spectrograms.router, prefix="/api")
+app.include_router(observations.router, prefix="/api")
+app.include_router(changes.router, prefix="/api")
 
 
-app.mount("/data", StaticFiles(directory="data"), name="data")
+app.mount("/data", DataFiles(directory="data"), name="data")
 app.mount("/", StaticFiles(directory="public", html=True), name="public")
 
 @app.get("/health", tags=["Health Check"])
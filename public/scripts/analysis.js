@@ -54,15 +54,21 @@ scriptSelect.addEventListener("change", () => {
         label.textContent = param.label;
 
         const input = document.createElement("input");
-        input.type = param.type || "text"; // e.g., 'number'
+        input.type = param.type === "boolean" ? "checkbox" : param.type || "text"; // e.g., 'number'
         if (input.type === "number") {
-          input.step = "any"; // Allows any decimal value
+          input.step = param.integer ? "1" : "any"; // "any" allows decimal values
+          if (param.min !== undefined) input.min = param.min;
+          if (param.max !== undefined) input.max = param.max;
         }
         input.id = `param-${param.name}`;
         input.name = param.name;
         input.placeholder = param.placeholder || "";
-        input.value = param.default || "";
-        input.required = param.required || false;
+        if (input.type === "checkbox") {
+          input.checked = Boolean(param.default);
+        } else {
+          input.value = param.default || "";
+          input.required = param.required || false;
+        }
 
         paramWrapper.appendChild(label);
         paramWrapper.appendChild(input);
@@ -94,7 +100,8 @@ analysisForm.addEventListener("submit", async (e) => {
   const parameters = {};
   const paramInputs = dynamicParamsContainer.querySelectorAll("input");
   paramInputs.forEach((input) => {
-    parameters[input.name] = input.value;
+    parameters[input.name] =
+      input.type === "checkbox" ? input.checked : input.value;
   });
   const jobRequest = {
     script_id: scriptSelect.value,
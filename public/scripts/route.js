@@ -1,16 +1,75 @@
+// Points are streamed to a route session while recording, so a long route
+// is never one huge upload and survives the phone dying mid-route. The whole
+// recording is kept here until the session is closed; routeSentCount is how
+// many of its points the server has acknowledged.
+const ROUTE_BATCH_SIZE = 20;
+const ROUTE_FLUSH_INTERVAL_MS = 15000;
+const ROUTE_SESSION_KEY = 'routeSessionId';
+
 let routePoints = [];
+let routeSessionId = localStorage.getItem(ROUTE_SESSION_KEY);
+let routeSentCount = 0;
+let routeFlushing = null;
+let lastRoutePoint = null;
 let routePolyline = null;
 let isTracking = false;
 
-function startTracking() {
+async function startTracking() {
   isTracking = true;
   routePoints = [];
+  routeSentCount = 0;
+  lastRoutePoint = null;
+  // Points are only flushed once the new session exists, never into an older one.
+  routeSessionId = null;
+  localStorage.removeItem(ROUTE_SESSION_KEY);
   if (routePolyline) {
     map.removeLayer(routePolyline);
     routePolyline = null;
   }
+  try {
+    const response = await fetch('/api/route-sessions', { method: 'POST' });
+    if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
+    routeSessionId = (await response.json()).sessionId;
+    localStorage.setItem(ROUTE_SESSION_KEY, routeSessionId);
+  } catch (error) {
+    console.error("Could not start a route session:", error);
+  }
+}
+
+async function flushRoutePoints() {
+  if (routeFlushing) return routeFlushing;
+  if (!routeSessionId || routeSentCount >= routePoints.length) return;
+  const offset = routeSentCount;
+  const batch = routePoints.slice(offset, offset + 500);
+  routeFlushing = (async () => {
+    try {
+      const response = await fetch(`/api/route-sessions/${routeSessionId}/points`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ offset, points: batch }),
+      });
+      const result = await response.json();
+      if (response.status === 409 && typeof result.detail === 'object') {
+        // The server lost points it had acknowledged; resend from what it holds.
+        routeSentCount = result.detail.pointCount;
+        return;
+      }
+      if (!response.ok) throw new Error(result.detail || `HTTP error! status: ${response.status}`);
+      routeSentCount = result.pointCount;
+    } catch (error) {
+      // Offline or the server is unreachable; the points stay queued for the next attempt.
+      console.warn("Route points not sent yet:", error);
+    } finally {
+      routeFlushing = null;
+    }
+  })();
+  return routeFlushing;
 }
 
+setInterval(() => {
+  if (isTracking) flushRoutePoints();
+}, ROUTE_FLUSH_INTERVAL_MS);
+
 const latlon_label = document.querySelector("#latlon label");
 
 map.locate({ watch: true, enableHighAccuracy: true });
@@ -52,12 +111,12 @@ map.on("locationfound", (e) => {
 
   const newPoint = {
     lat: e.latlng.lat,
-    lng: e.latlng.lng
+    lng: e.latlng.lng,
+    time: e.timestamp || Date.now()
   };
 
-  if (routePoints.length > 0) {
-    const lastPoint = routePoints[routePoints.length - 1];
-    const lastLatLng = L.latLng(lastPoint.lat, lastPoint.lng);
+  if (lastRoutePoint) {
+    const lastLatLng = L.latLng(lastRoutePoint.lat, lastRoutePoint.lng);
     const newLatLng = L.latLng(newPoint.lat, newPoint.lng);
     const distance = lastLatLng.distanceTo(newLatLng);
 
@@ -65,10 +124,12 @@ map.on("locationfound", (e) => {
   }
 
   routePoints.push(newPoint);
+  lastRoutePoint = newPoint;
+  if (routePoints.length - routeSentCount >= ROUTE_BATCH_SIZE) flushRoutePoints();
   
   if (!routePolyline) {
     routePolyline = L.polyline(
-      routePoints.map(p => [p.lat, p.lng]),
+      [[newPoint.lat, newPoint.lng]],
       { 
         color: "#3498db", 
         weight: 6, 
@@ -109,7 +170,7 @@ const closeButton = document.querySelector('#save-route-dialog .close');
 function stopTracking() {
   isTracking = false;
   
-  if (routePoints.length > 0) {
+  if (lastRoutePoint) {
     saveRouteDialog.style.display = 'block';
   }
 }
@@ -124,28 +185,37 @@ window.onclick = function(event) {
   }
 }
 
+async function closeRouteSession(routeName) {
+  while (routeSentCount < routePoints.length) {
+    const sent = routeSentCount;
+    await flushRoutePoints();
+    if (routeSentCount === sent) {
+      throw new Error("Could not upload the last route points. Check the connection and try again.");
+    }
+  }
+  return fetch(`/api/route-sessions/${routeSessionId}/close`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ name: routeName || null }),
+  });
+}
+
 routeForm.onsubmit = async function (e) {
   e.preventDefault();
 
   const routeName = document.getElementById("route-name").value.trim();
   
-  const routeData = {
-      name: routeName || null,
-      createdAt: new Date().toISOString(),
-      points: routePoints,
-      pointCount: routePoints.length,
-  };
-
   try {
-    const response = await fetch('/api/save-route', {
+    const response = routeSessionId ? await closeRouteSession(routeName) : await fetch('/api/save-route', {
+        // No session could be opened (e.g. the server was unreachable when recording started).
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify(routeData),
+        body: JSON.stringify({ name: routeName || null, points: routePoints }),
     });
 
     if (!response.ok) {
         const errorInfo = await response.json();
-        throw new Error(errorInfo.message || `HTTP error! status: ${response.status}`);
+        throw new Error(errorInfo.detail || errorInfo.message || `HTTP error! status: ${response.status}`);
     }
 
     const result = await response.json();
@@ -159,6 +229,10 @@ routeForm.onsubmit = async function (e) {
         routePolyline = null;
     }
     routePoints = [];
+    routeSentCount = 0;
+    lastRoutePoint = null;
+    routeSessionId = null;
+    localStorage.removeItem(ROUTE_SESSION_KEY);
 
     if (document.getElementById('show-routes-toggle').checked) {
         fetchAndDisplayRoutes();
@@ -176,6 +250,31 @@ document.querySelector('#route-form .cancel-btn').onclick = function() {
   routeForm.reset();
 };
 
+// A recording left open by a closed tab or a dead battery is still on the
+// server; offer to save it.
+(async function resumeRouteSession() {
+  const sessionId = routeSessionId;
+  if (!sessionId) return;
+  try {
+    const response = await fetch(`/api/route-sessions/${sessionId}`);
+    // Recording started meanwhile; the old session is left for GET /api/route-sessions.
+    if (isTracking || routeSessionId !== sessionId) return;
+    const session = response.ok ? await response.json() : null;
+    if (!session || session.routeId) {
+      // Gone, or saved already and only the response to the close was lost.
+      localStorage.removeItem(ROUTE_SESSION_KEY);
+      routeSessionId = null;
+      return;
+    }
+    if (session.pointCount > 0) {
+      routeSentCount = session.pointCount;
+      saveRouteDialog.style.display = 'block';
+    }
+  } catch (error) {
+    console.warn("Could not check for an unfinished route:", error);
+  }
+})();
+
 let allRoutes = [];
 let routeLayers = [];
 
@@ -187,11 +286,27 @@ document.getElementById('show-routes-toggle').addEventListener('change', async f
   }
 });
 
+map.on('moveend', () => {
+  if (document.getElementById('show-routes-toggle').checked) {
+    fetchAndDisplayRoutes();
+  }
+});
+
 async function fetchAndDisplayRoutes() {
   try {
     hideAllRoutes();
 
-    const response = await fetch('/api/get-routes');
+    // Only routes overlapping the visible area are sent, each path simplified
+    // to what is visible at this zoom.
+    const bounds = map.getBounds().pad(0.25);
+    const params = new URLSearchParams({
+      zoom: Math.round(map.getZoom()),
+      south: Math.max(bounds.getSouth(), -90),
+      west: Math.max(bounds.getWest(), -180),
+      north: Math.min(bounds.getNorth(), 90),
+      east: Math.min(bounds.getEast(), 180),
+    });
+    const response = await fetch(`/api/get-routes?${params}`);
     if (!response.ok) {
         throw new Error('Failed to fetch routes from server.');
     }
@@ -199,9 +314,7 @@ async function fetchAndDisplayRoutes() {
     allRoutes = routes;
 
     routes.forEach((routeData) => {
-      const latLngs = routeData.points.map((pt) => [pt.lat, pt.lng]);
-
-      const polyline = L.polyline(latLngs, {
+      const polyline = L.polyline(routeData.path, {
         color: "#ff0000",
         weight: 4,
         opacity: 0.8,
@@ -214,6 +327,8 @@ async function fetchAndDisplayRoutes() {
       polyline.bindPopup(`
         <strong>${routeData.name || "Unnamed Route"}</strong><br>
         Points: ${routeData.pointCount}<br>
+        Distance: ${(routeData.distanceMeters / 1000).toFixed(2)} km<br>
+        ${routeData.durationSeconds != null ? `Duration: ${Math.round(routeData.durationSeconds / 60)} min<br>` : ""}
         Date: ${dateStr}
       `);
 
@@ -33,17 +33,26 @@ audioToggle.addEventListener("click", async () => {
   }
 });
 
-function fileToBase64(file) {
-  return new Promise((resolve, reject) => {
-    if (!file) {
-      resolve(null);
-      return;
-    }
-    const reader = new FileReader();
-    reader.readAsDataURL(file);
-    reader.onload = () => resolve(reader.result);
-    reader.onerror = (error) => reject(error);
+// Uploads a photo or recording as multipart form data, so it is streamed to
+// disk instead of travelling as base64 inside the JSON body. Resolves to
+// the media id the observation refers to.
+async function uploadMedia(file, filename) {
+  if (!file) {
+    return null;
+  }
+  const formData = new FormData();
+  formData.append("file", file, filename || file.name);
+  const response = await fetch("/api/media", {
+    method: "POST",
+    body: formData,
   });
+  if (!response.ok) {
+    const errorInfo = await response.json();
+    throw new Error(
+      errorInfo.detail || `Media upload failed with status ${response.status}`
+    );
+  }
+  return (await response.json()).mediaId;
 }
 
 document.getElementById("spot-form").onsubmit = async function (e) {
@@ -66,9 +75,9 @@ document.getElementById("spot-form").onsubmit = async function (e) {
   try {
     document.getElementById("status").textContent = "Processing and saving...";
 
-    const [imageBase64, audioBase64] = await Promise.all([
-      fileToBase64(imageFile),
-      fileToBase64(audioBlob),
+    const [imageMediaId, audioMediaId] = await Promise.all([
+      uploadMedia(imageFile),
+      uploadMedia(audioBlob, "recording.webm"),
     ]);
 
     const payload = {
@@ -78,8 +87,8 @@ document.getElementById("spot-form").onsubmit = async function (e) {
       longitude: currLng,
       birds,
       description: desc,
-      image_data_url: imageBase64,
-      audio_data_url: audioBase64,
+      image_media_id: imageMediaId,
+      audio_media_id: audioMediaId,
     };
 
     const response = await fetch("/api/save-spot", {
@@ -109,8 +118,7 @@ document.getElementById("spot-form").onsubmit = async function (e) {
 
     displaySpots();
     if (spotId) {
-      const updatedSpot = allSpots.find((s) => s.spotId === spotId);
-      if (updatedSpot) showSpotDetails(updatedSpot);
+      openSpotDetails(spotId);
     }
   } catch (error) {
     console.error("Error adding observation:", error);
@@ -119,25 +127,62 @@ document.getElementById("spot-form").onsubmit = async function (e) {
   }
 };
 
-let allSpots = [];
 spotsLayer = null;
+let spotsRequest = null;
 
+// Fetches only the spots inside the current viewport; the server merges
+// nearby spots into clusters at lower zoom levels.
 async function displaySpots() {
+  const bounds = map.getBounds();
+  const west = bounds.getWest();
+  const east = bounds.getEast();
+  const wrapsWorld = east - west >= 360;
+  const params = new URLSearchParams({
+    south: Math.max(bounds.getSouth(), -90),
+    north: Math.min(bounds.getNorth(), 90),
+    west: wrapsWorld ? -180 : L.Util.wrapNum(west, [-180, 180], true),
+    east: wrapsWorld ? 180 : L.Util.wrapNum(east, [-180, 180], true),
+    zoom: map.getZoom(),
+  });
+
+  if (spotsRequest) spotsRequest.abort();
+  spotsRequest = new AbortController();
+
   try {
+    const response = await fetch(`/api/spots/in-view?${params}`, {
+      signal: spotsRequest.signal,
+    });
+    if (!response.ok) throw new Error("Failed to fetch spots.");
+    const view = await response.json();
+
     if (spotsLayer) {
       map.removeLayer(spotsLayer);
     }
-
-    const response = await fetch("/api/get-spots");
-    if (!response.ok) throw new Error("Failed to fetch spots.");
-
-    allSpots = await response.json();
-
+    if (!document.getElementById("display-spots").checked) return;
     spotsLayer = L.layerGroup().addTo(map);
     const isMobile = window.innerWidth <= 768;
     let radius = isMobile ? 16 : 10;
 
-    allSpots.forEach((spot) => {
+    view.clusters.forEach((cluster) => {
+      const marker = L.circleMarker([cluster.latitude, cluster.longitude], {
+        radius: radius + Math.min(Math.log2(cluster.count) * 3, 20),
+        fillColor: "#3388ff",
+        color: "#000",
+        weight: 1,
+        opacity: 1,
+        fillOpacity: 0.6,
+      }).addTo(spotsLayer);
+      marker.bindTooltip(`${cluster.count}`, {
+        permanent: true,
+        direction: "center",
+        className: "spot-cluster-label",
+      });
+      marker.on("click", () =>
+        map.fitBounds(cluster.bounds, { padding: [40, 40], maxZoom: 18 })
+      );
+    });
+
+    view.spots.forEach((spot) => {
       const circle = L.circleMarker([spot.latitude, spot.longitude], {
         radius: radius,
         fillColor: "#3388ff",
@@ -147,7 +192,7 @@ async function displaySpots() {
         fillOpacity: 0.8,
       }).addTo(spotsLayer);
 
-      circle.on("click", () => showSpotDetails(spot));
+      circle.on("click", () => openSpotDetails(spot.spotId));
       circle.on("mouseover", () =>
         circle.setStyle({ fillOpacity: 1, weight: 2 })
       );
@@ -156,11 +201,27 @@ async function displaySpots() {
       );
     });
   } catch (error) {
+    if (error.name === "AbortError") return;
     console.error("Error fetching spots: ", error);
     alert(error.message);
   }
 }
 
+async function openSpotDetails(spotId) {
+  try {
+    const response = await fetch(`/api/spots/${encodeURIComponent(spotId)}`);
+    if (!response.ok) throw new Error("Failed to fetch spot details.");
+    showSpotDetails(await response.json());
+  } catch (error) {
+    console.error("Error fetching spot details: ", error);
+    alert(error.message);
+  }
+}
+
+map.on("moveend", () => {
+  if (spotsLayer) displaySpots();
+});
+
 function showSpotDetails(spot) {
   const menu = document.getElementById("spot-details-menu");
   const content = document.getElementById("spot-details-content");
@@ -183,8 +244,9 @@ function showSpotDetails(spot) {
             .map((b) => `<li>${b.trim()}</li>`)
             .join("")}</ul>`
         : "<p>No birds recorded</p>";
+      // A downscaled preview keeps the panel light on phones; tapping it opens the original.
       const image = obs.imagePath
-        ? `<img src="${obs.imagePath}" alt="Spot image" style="max-width: 100%; margin-top: 5px; border-radius: 4px;">`
+        ? `<a href="${obs.imagePath}" target="_blank"><img src="/api/media/image?size=preview&path=${encodeURIComponent(obs.imagePath)}" alt="Spot image" loading="lazy" style="max-width: 100%; margin-top: 5px; border-radius: 4px;"></a>`
         : "";
       const audio = obs.audioPath
         ? `<audio controls src="${obs.audioPath}" style="width: 100%; margin-top: 5px;"></audio>`